@@ -0,0 +1,88 @@
+"""
+Lazily loaded API documentation.
+
+``drf_yasg`` is only imported when a documentation URL is first requested.
+The OpenAPI document is read from ``API_SCHEMA_FILE`` when that file exists
+(see ``manage.py generate_schema``), otherwise generated on the first request,
+and then kept in memory for the life of the worker.
+"""
+import functools
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+_schema_lock = threading.Lock()
+_schema_json = None
+
+
+def get_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Snippets API",
+        default_version='v1',
+        description="Test description",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@snippets.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema_view():
+    from drf_yasg.views import get_schema_view as build_schema_view
+    from rest_framework import permissions
+
+    return build_schema_view(
+        get_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+def generate_schema():
+    """Introspect the API and return the OpenAPI document as JSON bytes."""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(get_info())
+    return OpenAPICodecJson(validators=[]).encode(generator.get_schema(request=None, public=True))
+
+
+def get_schema_json():
+    global _schema_json
+    if _schema_json is None:
+        with _schema_lock:
+            if _schema_json is None:
+                try:
+                    with open(settings.API_SCHEMA_FILE, 'rb') as schema_file:
+                        _schema_json = schema_file.read()
+                except FileNotFoundError:
+                    _schema_json = generate_schema()
+    return _schema_json
+
+
+def schema_response():
+    return HttpResponse(get_schema_json(), content_type='application/json; charset=utf-8')
+
+
+def schema_view(request, format):
+    if format == '.json':
+        return schema_response()
+    view = get_schema_view().without_ui(cache_timeout=settings.API_DOCS_CACHE_TIMEOUT)
+    return view(request, format=format)
+
+
+def ui_view(renderer):
+    def view(request):
+        # The UI pages load their document from "?format=openapi" on the same URL.
+        if request.GET.get('format') == 'openapi':
+            return schema_response()
+        return get_schema_view().with_ui(renderer, cache_timeout=settings.API_DOCS_CACHE_TIMEOUT)(request)
+    return view
+
+
+swagger_ui = ui_view('swagger')
+redoc_ui = ui_view('redoc')
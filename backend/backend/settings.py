@@ -12,11 +12,21 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Local overrides for the environment variables read below.
+if load_dotenv is not None:
+    load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -39,13 +49,25 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'drf_yasg',
     'rest_framework',
     'products',
 ]
 
+# Swagger/ReDoc documentation. Disabled outside DEBUG unless API_DOCS_ENABLED=1;
+# when enabled, drf_yasg is still only imported on the first documentation
+# request and the schema is served from API_SCHEMA_FILE if it exists
+# (manage.py generate_schema writes it).
+API_DOCS_ENABLED = os.environ.get('API_DOCS_ENABLED', '1' if DEBUG else '0') == '1'
+API_SCHEMA_FILE = BASE_DIR / 'openapi.json'
+API_DOCS_CACHE_TIMEOUT = 60 * 60 * 24
+
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index('rest_framework'), 'drf_yasg')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'products.queries.QueryInspectionMiddleware',
+    'products.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,18 +95,87 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Production runs on PostgreSQL configured through POSTGRES_* environment
+# variables; without POSTGRES_DB the project falls back to the local SQLite file.
+
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Reuse connections across requests and ping them before reuse, so
+            # connection setup is paid once per worker instead of per request.
+            'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            # QuerySet.iterator() streams through server-side cursors; set this
+            # when running behind pgbouncer in transaction pooling mode.
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_DISABLE_SERVER_SIDE_CURSORS') == '1',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', 5)),
+                'options': '-c statement_timeout={}'.format(os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 30000)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
     }
+
+# Single-node SQLite deployments: WAL lets readers run alongside a writer,
+# PRAGMAs are applied on every new connection, and IMMEDIATE transactions take
+# the write lock up front so concurrent writers wait on the busy timeout
+# instead of failing with "database is locked". SQLITE_HIGH_CONCURRENCY=0
+# restores the stock configuration.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative means KiB, i.e. 64 MiB per connection
+    'temp_store': 'MEMORY',
 }
+SQLITE_BUSY_TIMEOUT = 20  # seconds
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and os.environ.get('SQLITE_HIGH_CONCURRENCY', '1') == '1':
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': SQLITE_BUSY_TIMEOUT,
+    }
+
+# Read replicas for catalogue GET traffic (see products.db_routers). Each
+# POSTGRES_REPLICA_HOSTS entry becomes a copy of the default connection
+# pointed at that host; SQLITE_REPLICA_NAME names a local SQLite file
+# standing in for a replica.
+
+DATABASE_REPLICAS = []
+if os.environ.get('POSTGRES_DB'):
+    replica_hosts = os.environ.get('POSTGRES_REPLICA_HOSTS', '')
+    for number, host in enumerate(filter(None, replica_hosts.split(',')), start=1):
+        DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+        DATABASE_REPLICAS.append(f'replica{number}')
+elif os.environ.get('SQLITE_REPLICA_NAME'):
+    DATABASES['replica1'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / os.environ['SQLITE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica1')
 
+DATABASE_ROUTERS = ['products.db_routers.CatalogueReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,6 +214,15 @@ USE_TZ = True
 STATIC_ROOT =os.path.join(BASE_DIR, 'staticfiles')
 
 STATIC_URL = 'static/'
+
+# Uploaded media (products.media). MEDIA_SERVE: 'x-accel' (nginx) or
+# 'x-sendfile' (Apache/lighttpd) hand the transfer to the web server, 'django'
+# serves files in-process, 'off' leaves MEDIA_URL entirely to the web server.
+MEDIA_URL = os.environ.get('MEDIA_URL', '/')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', str(BASE_DIR))
+MEDIA_SERVE = os.environ.get('MEDIA_SERVE', 'django' if DEBUG else 'off')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')  # nginx internal location
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60  # seconds
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -132,10 +232,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Cached variants: Basic auth only runs the password hasher once per
+        # BASIC_AUTH_CACHE_TTL, JWT resolves users through an in-process cache.
+        'products.authentication.CachedBasicAuthentication',
+        'products.authentication.CachedJWTAuthentication',
         # Include any additional authentication methods, like JWT
     ],
+    # Views choose a scope (see products.throttling); clients are identified by
+    # user id, or by IP when anonymous.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'products.throttling.BucketRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'catalogue': os.environ.get('THROTTLE_RATE_CATALOGUE', '600/min'),
+        'search': os.environ.get('THROTTLE_RATE_SEARCH', '120/min'),
+        'autocomplete': os.environ.get('THROTTLE_RATE_AUTOCOMPLETE', '600/min'),
+        'cart': os.environ.get('THROTTLE_RATE_CART', '60/min'),
+        'orders': os.environ.get('THROTTLE_RATE_ORDERS', '20/min'),
+    },
     # "DEFAULT_AUTHENTICATION_CLASSES": (
     #     "rest_framework.authentication.TokenAuthentication",
     #     # "beksar.api.restauth.authentication.OptimizedJWTAuthentication",
@@ -172,6 +286,83 @@ SIMPLE_JWT = {
     # 'AUTH_HEADER_TYPES': ('Bearer',),  # Default is 'Bearer', you can customize it
 }
 
+# Shared cache for versioned response caches (products.cache). The default
+# local-memory cache is per process, so entries written by other workers only
+# expire after their timeout; point REDIS_URL at a Redis server to share them.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Delta-sync feed (products.sync).
+SYNC_PAGE_SIZE = 500  # log entries per response by default
+SYNC_MAX_PAGE_SIZE = 2000
+
+HOME_CACHE_TIMEOUT = 60  # seconds
+# Per-city catalogue lists (?city=); invalidated when the city's data changes.
+CITY_CACHE_TIMEOUT = 10 * 60
+# Priced carts (products.carts); dropped on every cart change, so prices lag by at most this.
+CART_CACHE_TIMEOUT = 30  # seconds
+
+# Worker warm-up (backend.warmup), run when backend.wsgi/backend.asgi is loaded;
+# under gunicorn's preload_app that is once in the master, before forking.
+WARM_UP = os.environ.get('WARM_UP', '1') == '1'
+WARM_UP_GC_FREEZE = os.environ.get('WARM_UP_GC_FREEZE', '1') == '1'
+# Origins whose home screen is rendered into the cache at warm-up ("https://host").
+# By default every literal ALLOWED_HOSTS entry, over https only with WARM_UP_HTTPS=1.
+WARM_UP_SCHEME = 'https' if os.environ.get('WARM_UP_HTTPS') == '1' else 'http'
+WARM_UP_ORIGINS = [
+    origin for origin in os.environ.get(
+        'WARM_UP_ORIGINS',
+        ','.join(f'{WARM_UP_SCHEME}://{host}' for host in ALLOWED_HOSTS if host and host[0] not in '*.'),
+    ).split(',') if origin
+]
+
+# In-memory typeahead index (products.typeahead), built when a worker starts.
+TYPEAHEAD_WARM_UP = os.environ.get('TYPEAHEAD_WARM_UP', '1') == '1'
+# Seconds between checks for name changes made by other workers; needs a shared cache (REDIS_URL).
+TYPEAHEAD_SYNC_INTERVAL = 5
+TYPEAHEAD_REBUILD_INTERVAL = 10 * 60  # full rebuild, which also refreshes popularity
+
+# Rate limit counters live in each worker's memory unless a shared cache is
+# configured, in which case limits are enforced across workers.
+THROTTLE_SHARED = os.environ.get('THROTTLE_SHARED', '1' if os.environ.get('REDIS_URL') else '0') == '1'
+
+# Background jobs (products.jobs). Production runs `manage.py run_jobs`; with
+# JOBS_EAGER (the default under DEBUG) jobs run in-process after commit instead.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', '1' if DEBUG else '0') == '1'
+JOBS_RETRY_BACKOFF = 10  # seconds before the first retry, doubled per attempt
+JOBS_VISIBILITY_TIMEOUT = 15 * 60  # running jobs older than this are re-queued
+JOBS_RETENTION_DAYS = 7
+
+# Status change stream (/api/events/, ASGI only). LocalBroker fans out within
+# one process; on PostgreSQL events go through LISTEN/NOTIFY so that every
+# worker's streams receive them.
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', (
+    'products.events.PostgresBroker' if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    else 'products.events.LocalBroker'
+))
+EVENTS_PG_CHANNEL = 'status_events'
+EVENTS_QUEUE_SIZE = 100  # pending events per stream before it is told to resync
+EVENTS_KEEPALIVE = 15  # seconds between keepalive comments on an idle stream
+EVENTS_RETRY_MS = 5000  # client reconnect delay
+
+# SQL inspection (products.queries): N+1 warnings naming the serializer field
+# that issued them, and per-view query_budget checks. Budgets raise instead of
+# logging with QUERY_BUDGETS_ENFORCE, which is on when running tests.
+QUERY_INSPECTION = os.environ.get('QUERY_INSPECTION', '1' if DEBUG else '0') == '1'
+QUERY_BUDGETS_ENFORCE = os.environ.get('QUERY_BUDGETS_ENFORCE', '1' if 'test' in sys.argv[1:2] else '0') == '1'
+QUERY_REPEAT_THRESHOLD = 3  # same statement from the same origin this often is an N+1
+
+# In-process caches used by products.authentication (seconds). User changes
+# evict cached users on every worker through a version kept in CACHES, so
+# without a shared cache (REDIS_URL) other workers can lag by up to the TTL.
+AUTH_USER_CACHE_TTL = 60
+BASIC_AUTH_CACHE_TTL = 300
+
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
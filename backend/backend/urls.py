@@ -16,37 +16,27 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, re_path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from django.conf import settings
-from django.conf.urls.static import static
+from products.media import media_urlpatterns
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Snippets API",
-      default_version='v1',
-      description="Test description",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@snippets.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/", include("products.urls")),
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + media_urlpatterns()
+
+if settings.API_DOCS_ENABLED:
+    # backend.schema imports drf_yasg on the first documentation request only.
+    from backend import schema
+
+    urlpatterns = [
+        path('swagger<format>/', schema.schema_view, name='schema-json'),
+        path('swagger/', schema.swagger_ui, name='schema-swagger-ui'),
+        path('redoc/', schema.redoc_ui, name='schema-redoc'),
+    ] + urlpatterns
@@ -0,0 +1,232 @@
+"""
+Worker warm-up.
+
+``warm_up()`` runs when ``backend.wsgi`` / ``backend.asgi`` is imported. It
+does up front the work the first requests of a worker would otherwise pay for:
+
+- import the views, serializers, DRF/simplejwt classes named in settings and,
+  when the docs are enabled, ``drf_yasg`` and the ``API_SCHEMA_FILE`` document;
+- compile every URL pattern and the reverse lookup tables;
+- build the fields of every serializer, which also fills the models' ``_meta`` caches;
+- build the typeahead index and render the home screen (category tree,
+  banners, featured suppliers) into the response cache for ``WARM_UP_ORIGINS``.
+
+Under gunicorn with ``preload_app`` (see ``gunicorn.conf.py``) this happens
+once in the master, and workers fork with it done. The data is then shared
+copy-on-write, so each worker only pays for the pages it writes to. Database
+connections are closed before the fork so workers never share a socket. The
+heap is moved to the permanent GC generation with ``gc.freeze()``, so the
+collector in the workers does not touch (and copy) those pages.
+
+Each step is timed. ``last_report`` and the log hold the timings and the
+process memory (``memory_usage``).
+"""
+import gc
+import importlib
+import io
+import logging
+import mimetypes
+import os
+import resource
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+MODULES = [
+    'products.views',
+    'products.serializers',
+    'products.projections',
+    'products.carts',
+    'products.sync',
+    'rest_framework.renderers',
+    'rest_framework.parsers',
+    'rest_framework.negotiation',
+    'rest_framework.metadata',
+    'rest_framework_simplejwt.tokens',
+]
+
+# DRF settings whose classes are imported on first use.
+API_SETTINGS = [
+    'DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+    'DEFAULT_METADATA_CLASS', 'DEFAULT_VERSIONING_CLASS', 'DEFAULT_PAGINATION_CLASS',
+    'DEFAULT_FILTER_BACKENDS', 'EXCEPTION_HANDLER',
+]
+
+last_report = None
+
+
+def memory_usage(pid='self'):
+    """
+    Memory of a process in KiB: ``rss``, and from ``smaps_rollup`` (Linux) the
+    ``pss``, ``shared`` and ``private`` parts. Pages still shared with the
+    master after a fork count in ``shared``.
+    """
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            fields = dict(line.split(':', 1) for line in smaps if ':' in line and not line[0].isdigit())
+    except OSError:
+        if pid == 'self':
+            # No /proc: peak RSS is the best there is (bytes on macOS, KiB elsewhere).
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            usage['rss'] = maxrss // 1024 if os.uname().sysname == 'Darwin' else maxrss
+        return usage
+
+    def kib(name):
+        return int(fields.get(name, '0 kB').split()[0])
+
+    usage['rss'] = kib('Rss')
+    usage['pss'] = kib('Pss')
+    usage['shared'] = kib('Shared_Clean') + kib('Shared_Dirty')
+    usage['private'] = kib('Private_Clean') + kib('Private_Dirty')
+    return usage
+
+
+def format_memory(usage):
+    return ', '.join(f'{name} {value / 1024:.1f} MiB' for name, value in usage.items()) or 'memory unknown'
+
+
+def import_modules():
+    for module in MODULES:
+        importlib.import_module(module)
+    from rest_framework.settings import api_settings
+
+    for name in API_SETTINGS:
+        getattr(api_settings, name)
+    if settings.API_DOCS_ENABLED:
+        from backend import schema
+
+        schema.get_schema_view()
+        if os.path.exists(settings.API_SCHEMA_FILE):
+            # Generating a missing document is left to the first docs request.
+            schema.get_schema_json()
+    mimetypes.init()
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+
+def compile_urls():
+    """Compile every pattern (regexes are otherwise compiled on first match) and the reverse tables."""
+    resolver = get_resolver()
+    views = []
+
+    def walk(patterns):
+        for pattern in patterns:
+            pattern.pattern.regex
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern):
+                views.append(pattern.callback)
+
+    walk(resolver.url_patterns)
+    resolver.reverse_dict
+    return views
+
+
+def build_views_and_serializers(views):
+    """Instantiate each DRF view's renderers, parsers and authenticators and each serializer's fields."""
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    from products import serializers as product_serializers
+
+    serializer_classes = {
+        value for value in vars(product_serializers).values()
+        if isinstance(value, type) and issubclass(value, serializers.BaseSerializer)
+        and value.__module__ == product_serializers.__name__
+    }
+    for callback in views:
+        view_class = getattr(callback, 'cls', None)
+        if view_class is None or not issubclass(view_class, APIView):
+            continue
+        view = view_class(**getattr(callback, 'initkwargs', {}))
+        view.get_renderers(), view.get_parsers(), view.get_authenticators()
+        if getattr(view_class, 'serializer_class', None) is not None:
+            serializer_classes.add(view_class.serializer_class)
+
+    for serializer_class in serializer_classes:
+        try:
+            serializer_class().fields
+        except Exception:
+            # Serializers that need arguments or context are built on first use.
+            logger.debug("Serializer %s not built during warm-up", serializer_class.__name__, exc_info=True)
+
+
+def prime_home():
+    """Render the home screen into the shared sections cache for each ``WARM_UP_ORIGINS`` origin."""
+    from products.views import HomeView
+
+    view = HomeView.as_view(throttle_classes=[])
+    for origin in settings.WARM_UP_ORIGINS:
+        origin = urlsplit(origin)
+        request = WSGIRequest({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': '/api/home/',
+            'QUERY_STRING': '',
+            'SERVER_NAME': origin.hostname,
+            'SERVER_PORT': str(origin.port or (443 if origin.scheme == 'https' else 80)),
+            'HTTP_HOST': origin.netloc,
+            'wsgi.url_scheme': origin.scheme,
+            'wsgi.input': io.BytesIO(),
+        })
+        view(request).render()
+
+
+def warm_up(started=None):
+    """Run the warm-up steps; ``started`` is the ``time.perf_counter()`` taken before Django was set up."""
+    global last_report
+    from products import typeahead
+
+    if not settings.WARM_UP:
+        typeahead.warm_up()
+        return None
+
+    timings = {}
+    if started is not None:
+        timings['setup'] = time.perf_counter() - started
+
+    def step(name, function, *args):
+        step_started = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception:
+            # E.g. no database before migrate: whatever failed is loaded by the first requests instead.
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+        finally:
+            timings[name] = time.perf_counter() - step_started
+
+    step('imports', import_modules)
+    views = step('urls', compile_urls) or []
+    step('serializers', build_views_and_serializers, views)
+    step('typeahead', typeahead.warm_up)
+    step('home', prime_home)
+    connections.close_all()
+
+    if settings.WARM_UP_GC_FREEZE:
+        step_started = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        timings['gc_freeze'] = time.perf_counter() - step_started
+
+    last_report = {
+        'pid': os.getpid(),
+        'seconds': {name: round(seconds, 3) for name, seconds in timings.items()},
+        'total_seconds': round(sum(timings.values()), 3),
+        'frozen_objects': gc.get_freeze_count(),
+        'memory_kib': memory_usage(),
+    }
+    logger.info(
+        "Warm-up of pid %s done in %.2fs (%s); %s",
+        last_report['pid'], last_report['total_seconds'],
+        ', '.join(f'{name} {seconds:.2f}s' for name, seconds in last_report['seconds'].items()),
+        format_memory(last_report['memory_kib']),
+    )
+    return last_report
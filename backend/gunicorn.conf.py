@@ -0,0 +1,41 @@
+"""
+gunicorn settings: ``gunicorn backend.wsgi`` from this directory picks them up.
+
+``preload_app`` imports ``backend.wsgi``, and with it the warm-up in
+``backend.warmup``, once in the master. Workers (including the ones
+``max_requests`` recycles) fork from it warm and share its memory
+copy-on-write. The hooks log the startup time and each worker's memory; for
+the memory of a running server, use ``manage.py worker_memory <master pid>``.
+
+For the ASGI application, add ``-k uvicorn.workers.UvicornWorker`` and serve
+``backend.asgi``.
+"""
+import multiprocessing
+import os
+import time
+
+started = time.perf_counter()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    from backend import warmup
+
+    report = warmup.last_report or {}
+    server.log.info(
+        "Master ready in %.2fs (warm-up %ss: %s); %s",
+        time.perf_counter() - started, report.get('total_seconds', '-'),
+        ', '.join(f'{name} {seconds}s' for name, seconds in report.get('seconds', {}).items()) or 'off',
+        warmup.format_memory(warmup.memory_usage()),
+    )
+
+
+def post_worker_init(worker):
+    from backend import warmup
+
+    worker.log.info("Worker %s ready; %s", worker.pid, warmup.format_memory(warmup.memory_usage()))
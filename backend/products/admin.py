@@ -1,20 +1,55 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from .models import (
     Category, Supplier, Product, SupplierPrice, Banner,
     Order, Cart, CartItem, Favorite, Delivery, Application
 )
 
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the PostgreSQL planner's row estimate for unfiltered
+    changelists instead of running ``COUNT(*)`` over the whole table.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 # Inline classes
 class CartItemInline(admin.TabularInline):
     model = CartItem
     extra = 1
+    autocomplete_fields = ['product']
 
 
 class SupplierPriceInline(admin.TabularInline):
     model = SupplierPrice
     extra = 1
     fields = ['supplier', 'price']
+    autocomplete_fields = ['supplier']
 
 
 # Admin classes
@@ -23,6 +58,9 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'parent')
     search_fields = ('name',)
     list_filter = ('parent',)
+    ordering = ('name',)
+    list_select_related = ('parent',)
+    autocomplete_fields = ('parent',)
 
 
 @admin.register(Supplier)
@@ -30,15 +68,24 @@ class SupplierAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'name', 'city', 'rating', 'is_favourite'
     )
-    search_fields = ('name', 'city')
+    # City goes through list_filter, an exact match on the (city, id) index;
+    # a case-insensitive "=city" search could not use it.
+    search_fields = ('^name',)
     list_filter = ('city', 'rating', 'is_favourite')
+    ordering = ('id',)
+    autocomplete_fields = ('categories',)
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'article', 'city', 'description', 'is_favorite', 'get_suppliers')
-    search_fields = ('name', 'article', 'city', 'description')
+class ProductAdmin(LargeTableAdmin):
+    # No description: rendering the full text of every row makes the page heavy.
+    list_display = ('name', 'article', 'city', 'is_favorite', 'get_suppliers')
+    # Prefix/exact lookups only, backed by the Upper(name)/Upper(article) indexes;
+    # a substring match on description would scan the whole table.
+    search_fields = ('^name', '=article')
     list_filter = ('city', 'is_favorite')
+    ordering = ('id',)
+    autocomplete_fields = ('category',)
     fieldsets = (
         (None, {'fields': ('name', 'article')}),
         ('Product Details', {'fields': ('city', 'description', 'characteristics', 'photo', 'category', 'price_wholesale', 'price_retail', 'min_order_quantity', 'delivery_time',)}),
@@ -46,20 +93,32 @@ class ProductAdmin(admin.ModelAdmin):
     )
     inlines = [SupplierPriceInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                'supplierprice_set',
+                queryset=SupplierPrice.objects.select_related('supplier').only('product_id', 'supplier__name'),
+            )
+        )
+
     def get_suppliers(self, obj):
         return ", ".join([str(sp.supplier.name) for sp in obj.supplierprice_set.all()])
     get_suppliers.short_description = 'Suppliers'
 
 
 @admin.register(SupplierPrice)
-class SupplierPriceAdmin(admin.ModelAdmin):
+class SupplierPriceAdmin(LargeTableAdmin):
     list_display = ('supplier', 'product', 'price', 'delivery_time')
-    search_fields = ('supplier__name', 'product__name')
+    search_fields = ('supplier__name__istartswith', 'product__name__istartswith')
+    list_select_related = ('supplier', 'product')
+    autocomplete_fields = ('supplier', 'product')
 
 
 @admin.register(Banner)
 class BannerAdmin(admin.ModelAdmin):
     list_display = ('category', 'supplier', 'product', 'photo_preview')
+    list_select_related = ('category', 'supplier', 'product')
+    autocomplete_fields = ('category', 'supplier', 'product')
 
     def photo_preview(self, obj):
         if obj.photo:
@@ -69,34 +128,46 @@ class BannerAdmin(admin.ModelAdmin):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ('id', 'supplier_details', 'product', 'quantity', 'total_cost')
-    search_fields = ('supplier_details__name', 'product__name')
+    search_fields = ('supplier_details__name__istartswith', 'product__name__istartswith')
     ordering = ('-id',)
+    list_select_related = ('supplier_details', 'product')
+    autocomplete_fields = ('user', 'supplier_details', 'product')
 
 
 @admin.register(Application)
-class ApplicationAdmin(admin.ModelAdmin):
+class ApplicationAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'status', 'payment_method', 'delivery_date', 'created_at')
     search_fields = ('user__username',)
     list_filter = ('status', 'payment_method', 'created_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user', 'orders')
 
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
     list_display = ('user', 'updated_at')
+    ordering = ('id',)
+    search_fields = ('user__username',)
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     inlines = [CartItemInline]
 
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdmin):
     list_display = ('cart', 'product', 'quantity')
+    list_select_related = ('cart__user', 'product')
+    autocomplete_fields = ('cart', 'product')
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'product', 'supplier')
-    search_fields = ('user__username', 'product__name', 'supplier__name')
+    search_fields = ('user__username', 'product__name__istartswith', 'supplier__name__istartswith')
+    list_select_related = ('user', 'product', 'supplier')
+    autocomplete_fields = ('user', 'product', 'supplier')
 
 
 @admin.register(Delivery)
@@ -104,3 +175,5 @@ class DeliveryAdmin(admin.ModelAdmin):
     list_display = ('user', 'address', 'contact_number', 'delivery_date', 'status', 'created_at')
     search_fields = ('user__username', 'address')
     list_filter = ('status', 'delivery_date')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
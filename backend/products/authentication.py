@@ -0,0 +1,105 @@
+import copy
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import TTLCache, bump_version, versioned_key
+
+
+user_cache = TTLCache(ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+basic_credentials_cache = TTLCache(ttl=getattr(settings, 'BASIC_AUTH_CACHE_TTL', 300))
+
+
+def user_cache_key(user_id):
+    # The per-user version lives in the shared cache, so a change evicts the
+    # user from every worker's in-process cache, not just from this one's.
+    return versioned_key(f'user:{user_id}')
+
+
+def get_cached_user(user_id):
+    """
+    Return a user by primary key, hitting the database at most once per
+    ``AUTH_USER_CACHE_TTL`` seconds per worker, or until the user changes.
+    Returns ``None`` for unknown users.
+    """
+    key = user_cache_key(user_id)
+    user = user_cache.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        user_cache.set(key, user)
+    # Hand out a copy so per-request changes never leak into the cache.
+    return copy.copy(user)
+
+
+def evict_user(user_id):
+    bump_version(f'user:{user_id}')
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the user from the token's user id claim
+    through the in-process user cache instead of a query per request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if api_settings.USER_ID_FIELD != 'id':
+            return super().get_user(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    ``BasicAuthentication`` that remembers successful credential checks, so the
+    password hasher only runs on the first request of each ``BASIC_AUTH_CACHE_TTL``
+    window. Credentials are keyed by an HMAC, never stored in clear.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = hmac.new(
+            settings.SECRET_KEY.encode(), f'{userid}:{password}'.encode(), hashlib.sha256
+        ).hexdigest()
+
+        cached = basic_credentials_cache.get(key)
+        if cached is not None:
+            user_id, password_hash = cached
+            user = get_cached_user(user_id)
+            # A changed password hash (or a deactivated user) invalidates the entry.
+            if user is not None and user.is_active and user.password == password_hash:
+                return (user, None)
+            basic_credentials_cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        basic_credentials_cache.set(key, (user.pk, user.password))
+        user_cache.set(user_cache_key(user.pk), user)
+        return (copy.copy(user), auth)
@@ -0,0 +1,102 @@
+import threading
+import time
+from urllib.parse import quote
+
+from django.core.cache import cache
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache whose entries expire after ``ttl`` seconds.
+
+    Each worker process keeps its own copy, so it is only suitable for data
+    where being stale for up to ``ttl`` seconds on other workers is acceptable.
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self._data.items() if expires < now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            # Still full: drop the oldest insertion (dicts keep insertion order).
+            del self._data[next(iter(self._data))]
+
+
+def versioned_key(namespace, *parts):
+    """
+    Build a cache key that embeds the namespace's current version, so
+    ``bump_version(namespace)`` invalidates every key built before it at once.
+    """
+    version = cache.get_or_set(f'version:{namespace}', 1, timeout=None)
+    return ':'.join([namespace, str(version), *map(str, parts)])
+
+
+def bump_version(namespace):
+    """Invalidate the namespace's keys and return its new version."""
+    try:
+        return cache.incr(f'version:{namespace}')
+    except ValueError:
+        cache.set(f'version:{namespace}', 2, timeout=None)
+        return 2
+
+
+def city_namespace(city):
+    return f'catalogue-city:{quote(city)}'
+
+
+def city_cache_key(city, *parts):
+    """
+    Key for a cached catalogue result of one city. ``bump_cities(city)``
+    invalidates that city's results, ``bump_version('catalogue')`` every city's.
+    """
+    return versioned_key(city_namespace(city), versioned_key('catalogue'), *parts)
+
+
+def bump_cities(*cities):
+    for city in set(cities):
+        if city:
+            bump_version(city_namespace(city))
+
+
+def cart_cache_key(user_id, *parts):
+    """Key for a user's cached cart; ``bump_cart(user_id)`` invalidates it."""
+    return versioned_key(f'cart:{user_id}', *parts)
+
+
+def bump_cart(user_id):
+    if user_id is not None:
+        bump_version(f'cart:{user_id}')
@@ -0,0 +1,64 @@
+"""
+The priced cart behind ``GET /api/cart/summary/``.
+
+Each line carries the compact product, the cheapest ``SupplierPrice`` offer
+for it, the unit price and the line total, and the cart its totals, so the app
+renders the cart without fetching products one by one. Lines without any
+supplier offer fall back to the product's retail price; lines without either
+are counted in ``unpriced_lines`` and left out of the total.
+
+Reading a cart runs three queries however many lines it has. The rendered
+cart is cached per user (and host, for the absolute media URLs) for
+``CART_CACHE_TIMEOUT`` seconds; ``signals`` drop it as soon as the cart or
+its items change. Price and product changes show up when the entry expires.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import cart_cache_key
+from .models import Cart, CartItem, SupplierPrice
+from .serializers import CartSummarySerializer
+
+
+def best_supplier_prices(product_ids):
+    """The cheapest ``SupplierPrice`` (with its supplier) of each product, oldest offer first on ties."""
+    best = {}
+    prices = SupplierPrice.objects.filter(product_id__in=product_ids).select_related('supplier')
+    for supplier_price in prices.order_by('product_id', 'price', 'pk'):
+        best.setdefault(supplier_price.product_id, supplier_price)
+    return best
+
+
+def price_cart(cart):
+    """Set ``cart.lines`` (its items, priced) and ``cart.totals``."""
+    lines = []
+    if cart.pk is not None:
+        lines = list(CartItem.objects.filter(cart=cart).select_related('product').order_by('pk'))
+    prices = best_supplier_prices({line.product_id for line in lines})
+
+    total, quantity, unpriced = Decimal('0'), 0, 0
+    for line in lines:
+        line.supplier_price = prices.get(line.product_id)
+        line.unit_price = line.supplier_price.price if line.supplier_price else line.product.price_retail
+        line.line_total = None if line.unit_price is None else line.unit_price * line.quantity
+        quantity += line.quantity
+        if line.line_total is None:
+            unpriced += 1
+        else:
+            total += line.line_total
+
+    cart.lines = lines
+    cart.totals = {'lines': len(lines), 'quantity': quantity, 'unpriced_lines': unpriced, 'total': total}
+    return cart
+
+
+def cart_summary(request):
+    key = cart_cache_key(request.user.pk, request.scheme, request.get_host())
+    data = cache.get(key)
+    if data is None:
+        cart = Cart.objects.filter(user=request.user).first() or Cart(user=request.user)
+        data = CartSummarySerializer(price_cart(cart), context={'request': request}).data
+        cache.set(key, data, settings.CART_CACHE_TIMEOUT)
+    return data
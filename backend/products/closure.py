@@ -0,0 +1,83 @@
+"""
+Maintenance of the ``CategoryClosure`` ancestor index.
+
+``signals`` call ``insert``/``move``/``detach_children`` when a category is
+created, re-parented or deleted; ``rebuild`` recomputes the whole table.
+Each runs in a transaction, so readers never see a subtree between the
+removal of its old ancestor links and the insert of the new ones.
+``subtree(category_id)`` is the subquery used by descendant-aware filters.
+"""
+from django.db import transaction
+
+from .models import Category, CategoryClosure
+
+
+def subtree(category_id):
+    """Ids of the category and all of its descendants, as a subquery."""
+    return CategoryClosure.objects.filter(ancestor_id=category_id).values('descendant_id')
+
+
+def is_descendant(category_id, ancestor_id):
+    """Whether ``category_id`` is ``ancestor_id`` or below it."""
+    if category_id is None or ancestor_id is None:
+        return False
+    return CategoryClosure.objects.filter(ancestor_id=ancestor_id, descendant_id=category_id).exists()
+
+
+@transaction.atomic
+def insert(category):
+    """Add a new (leaf) category below its parent's ancestors."""
+    links = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+    if category.parent_id:
+        links += [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+            for ancestor_id, depth in CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth')
+        ]
+    CategoryClosure.objects.bulk_create(links)
+
+
+@transaction.atomic
+def move(category_id, parent_id):
+    """Re-attach the subtree rooted at ``category_id`` below ``parent_id`` (``None`` for a root)."""
+    descendants = list(
+        CategoryClosure.objects.filter(ancestor_id=category_id).values_list('descendant_id', 'depth')
+    )
+
+    # Drop the links from the old ancestors into the subtree...
+    CategoryClosure.objects.filter(
+        descendant_id__in=subtree(category_id),
+    ).exclude(ancestor_id__in=subtree(category_id)).delete()
+    if parent_id is None:
+        return
+    # ...and link the new parent's ancestors to every category in it.
+    ancestors = CategoryClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+    CategoryClosure.objects.bulk_create([
+        CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+        for ancestor_id, ancestor_depth in ancestors
+        for descendant_id, depth in descendants
+    ])
+
+
+@transaction.atomic
+def detach_children(category_id):
+    """Before a category is deleted: its children become roots (``parent`` is ``SET_NULL``)."""
+    for child_id in Category.objects.filter(parent_id=category_id).values_list('pk', flat=True):
+        move(child_id, None)
+
+
+def rebuild():
+    """Recompute the closure table from ``Category.parent``. Returns the number of links."""
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    links = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    with transaction.atomic():
+        CategoryClosure.objects.all().delete()
+        CategoryClosure.objects.bulk_create(links, batch_size=1000)
+    return len(links)
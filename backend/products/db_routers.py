@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# Replica reads are opt-in per request: ReplicaRoutingMiddleware enables them
+# for safe requests to catalogue views, and any write switches the rest of the
+# request back to the primary so it reads its own writes. The replica is picked
+# once per request, so all of its queries (prefetches included) see the same
+# replication lag. None means the primary.
+_replica = ContextVar('replica', default=None)
+
+CATALOGUE_MODELS = {'category', 'supplier', 'product', 'supplierprice', 'banner'}
+
+
+def begin_request():
+    return _replica.set(None)
+
+
+def end_request(token):
+    _replica.reset(token)
+
+
+def allow_replica_reads():
+    replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+    if replicas:
+        _replica.set(random.choice(replicas))
+
+
+def pin_to_primary():
+    if _replica.get() is not None:
+        _replica.set(None)
+
+
+class CatalogueReplicaRouter:
+    """Send catalogue reads to the current request's replica while it allows them."""
+
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None:
+            return 'default'
+        opts = model._meta
+        if opts.app_label == 'products' and opts.model_name in CATALOGUE_MODELS:
+            return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
@@ -0,0 +1,189 @@
+"""
+Status change events pushed to clients over ``/api/events/``.
+
+Model signals (and bulk transitions) call ``publish_status`` once the
+surrounding transaction commits. The message goes to the configured broker
+(``EVENTS_BROKER``), which fans it out to every open stream of the owning user.
+
+``LocalBroker`` only reaches streams served by the same process, so it is
+correct for a single worker (and the SQLite development setup).
+``PostgresBroker``, the default on PostgreSQL, sends every message through
+``NOTIFY``; each process with open streams ``LISTEN``s on one connection and
+fans the messages out locally, so events published by any web or job worker
+reach streams in every other one.
+"""
+import asyncio
+import functools
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW = object()
+
+
+class Subscription:
+    """Async queue of messages for one stream; must be closed when the stream ends."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Called from any thread; the queue belongs to the stream's event loop.
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client that cannot keep up is told to resync instead of
+            # silently missing events.
+            self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            self.close()
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub keyed by channel name."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # The stream's event loop is already closed.
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Pub/sub across processes over PostgreSQL ``LISTEN``/``NOTIFY`` on
+    ``EVENTS_PG_CHANNEL``. Publishing only needs the request's connection; the
+    listener thread and its connection start with the first subscription.
+    Messages published while the listener reconnects are lost, as with any
+    dropped stream, so clients resync after reconnecting anyway.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+                self._listener.start()
+        return subscription
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message}, separators=(',', ':'))
+        try:
+            with connections['default'].cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [settings.EVENTS_PG_CHANNEL, payload])
+        except DatabaseError:
+            # Runs after the commit: the change itself is saved, only the event is lost.
+            logger.warning("Could not publish event to %s", channel, exc_info=True)
+
+    def deliver(self, payload):
+        """Fan a ``NOTIFY`` payload out to this process's streams."""
+        notify = json.loads(payload)
+        super().publish(notify['channel'], notify['message'])
+
+    def _listen(self):
+        while True:
+            try:
+                self._receive()
+            except Exception:
+                logger.warning("Event listener lost its connection, reconnecting", exc_info=True)
+                time.sleep(1)
+
+    def _receive(self):
+        # A connection of its own, outside Django's per-thread handling: it stays
+        # idle in LISTEN for the life of the process.
+        wrapper = connections['default']
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{settings.EVENTS_PG_CHANNEL}"')
+            while True:
+                if select.select([connection], [], [], settings.EVENTS_KEEPALIVE) == ([], [], []):
+                    # Detects a dead connection while no events arrive.
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.deliver(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish_status(kind, pk, user_id, status, previous_status=None):
+    """Send a ``<kind>.status`` event to the owner's streams after the current transaction commits."""
+    message = {
+        # Unique across workers, since a stream receives events published by any of them.
+        'id': uuid.uuid4().hex,
+        'type': f'{kind}.status',
+        'data': {
+            'id': pk,
+            'status': status,
+            'previous_status': previous_status,
+            'changed_at': now().isoformat(),
+        },
+    }
+    transaction.on_commit(lambda: get_broker().publish(user_channel(user_id), message))
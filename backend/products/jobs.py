@@ -0,0 +1,167 @@
+"""
+Database-backed background jobs.
+
+Register a function with ``@job('name')`` and queue it with
+``enqueue('name', payload)``; ``manage.py run_jobs`` claims and runs queued
+jobs in a pool of worker processes. Jobs are inserted in the caller's
+transaction, so they only become visible once the triggering change commits.
+With ``JOBS_EAGER`` they run in-process right after the commit instead.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min
+from django.utils.timezone import now
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+registry = {}
+
+
+def job(name, max_attempts=3):
+    """Register ``func(**payload)`` as the handler for jobs called ``name``."""
+    def decorator(func):
+        registry[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, dedupe_key=None, delay=None):
+    """
+    Queue a job and return it, or ``None`` when a queued job with the same
+    ``dedupe_key`` already exists. Higher ``priority`` runs first.
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown job {name!r}")
+    payload = payload or {}
+
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: run_eagerly(name, payload))
+        return None
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name,
+                payload=payload,
+                priority=priority,
+                dedupe_key=dedupe_key,
+                max_attempts=registry[name][1],
+                run_at=now() + delay if delay else now(),
+            )
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        return None
+
+
+def run_eagerly(name, payload):
+    try:
+        registry[name][0](**payload)
+    except Exception:
+        logger.exception("Eager job %s failed", name)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit=10):
+    """Mark up to ``limit`` due jobs as running for ``worker`` and return them."""
+    due = Job.objects.filter(status=QUEUED, run_at__lte=now()).order_by('-priority', 'run_at', 'pk')
+    claimed = []
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        for pk in list(due.values_list('pk', flat=True)[:limit]):
+            # The status filter makes the claim safe even without row locks.
+            if Job.objects.filter(pk=pk, status=QUEUED).update(
+                status=RUNNING, started_at=now(), worker=worker, attempts=F('attempts') + 1
+            ):
+                claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('-priority', 'run_at', 'pk'))
+
+
+def run(job):
+    func, _ = registry.get(job.name, (None, None))
+    try:
+        if func is None:
+            raise KeyError(f"Unknown job {job.name!r}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s/%s)", job, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts:
+            retry_in = timedelta(seconds=settings.JOBS_RETRY_BACKOFF * 2 ** (job.attempts - 1))
+            requeue(job.pk, run_at=now() + retry_in, last_error=error)
+        else:
+            Job.objects.filter(pk=job.pk).update(status=FAILED, finished_at=now(), last_error=error)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status=DONE, finished_at=now())
+    return True
+
+
+def requeue(pk, **fields):
+    """
+    Put a job back in the queue. When a job with the same ``dedupe_key`` was
+    queued in the meantime, that one does the work: this job is marked done
+    (superseded) instead, as the unique constraint allows one queued job per key.
+    """
+    try:
+        with transaction.atomic():
+            return Job.objects.filter(pk=pk).update(status=QUEUED, **fields)
+    except IntegrityError:
+        logger.info("Job %s superseded by a queued job with the same dedupe key", pk)
+        fields.pop('run_at', None)
+        fields['last_error'] = f"{fields.get('last_error', '')}Superseded by a queued job with the same dedupe key."
+        Job.objects.filter(pk=pk).update(status=DONE, finished_at=now(), **fields)
+        return 0
+
+
+def reap():
+    """
+    Re-queue jobs whose worker died (or fail them once out of attempts) and
+    drop finished jobs past retention.
+    """
+    stale = Job.objects.filter(
+        status=RUNNING, started_at__lt=now() - timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+    )
+    error = "Worker stopped responding.\n"
+    stale.filter(attempts__gte=F('max_attempts')).update(status=FAILED, finished_at=now(), last_error=error)
+    requeued = 0
+    for pk in stale.values_list('pk', flat=True):
+        requeued += requeue(pk, worker='', last_error=error)
+    cutoff = now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    Job.objects.filter(status=DONE, finished_at__lt=cutoff).delete()
+    return requeued
+
+
+def queue_stats():
+    """Queue depth per status plus latency of jobs finished in the last hour."""
+    depth = dict(Job.objects.values_list('status').annotate(count=Count('pk')).order_by())
+    oldest = Job.objects.filter(status=QUEUED, run_at__lte=now()).aggregate(oldest=Min('run_at'))['oldest']
+    recent = Job.objects.filter(status=DONE, finished_at__gte=now() - timedelta(hours=1)).aggregate(
+        wait=Avg(ExpressionWrapper(F('started_at') - F('run_at'), output_field=DurationField())),
+        run=Avg(ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())),
+        count=Count('pk'),
+    )
+    return {
+        'depth': {status: depth.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+        'oldest_queued_age': (now() - oldest).total_seconds() if oldest else 0,
+        'last_hour': {
+            'done': recent['count'],
+            'avg_wait_seconds': recent['wait'].total_seconds() if recent['wait'] else None,
+            'avg_run_seconds': recent['run'].total_seconds() if recent['run'] else None,
+        },
+    }
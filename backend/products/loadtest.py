@@ -0,0 +1,350 @@
+"""
+Scenario-based load generator for a running server (see the ``load_test``
+and ``seed_load_test`` commands).
+
+Virtual users run journeys modelled on the mobile app:
+
+- ``browse``: home screen, categories, a category's products, a product and its supplier.
+- ``search``: typeahead while typing, then a product search.
+- ``favourite``: favourite a product, list favorites, remove it again.
+- ``order``: cart, ``create_order`` and an application.
+
+Each virtual user logs in as its own seeded user through ``/api/token/`` and
+picks journeys by weight from the mix with its own seeded random generator.
+Two runs against the same seeded data therefore send the same requests.
+Latencies are recorded per endpoint (a name, not the path) and summarized as
+throughput, error rate and percentiles. 429 responses are counted separately
+from errors, so raise the ``THROTTLE_RATE_*`` settings on the server to
+measure capacity rather than the rate limits.
+
+The client is a small HTTP/1.1 keep-alive client on asyncio streams, so the
+tool needs nothing beyond the standard library.
+"""
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class HttpClient:
+    """One keep-alive connection, reopened when the server closes it."""
+
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        head = {'Host': f'{self.host}:{self.port}', 'Accept': 'application/json', **(headers or {})}
+        if body is not None:
+            head['Content-Type'] = 'application/json'
+            head['Content-Length'] = str(len(body))
+        message = f'{method} {path} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in head.items()) + '\r\n'
+        payload = message.encode('latin-1') + (body or b'')
+        for attempt in range(2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(payload)
+                await self.writer.drain()
+                return await asyncio.wait_for(self.read_response(), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # A kept-alive connection the server has closed meanwhile: retry once on a new one.
+                await self.close()
+                if fresh or attempt:
+                    raise
+
+    async def read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            await self.reader.readuntil(b'\r\n')
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.throttled = Counter()
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint, seconds, status, ok):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if status == 429:
+            self.throttled[endpoint] += 1
+        elif not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        every = []
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            every.extend(latencies)
+            rows[endpoint] = self.summarize(latencies, self.errors[endpoint], self.throttled[endpoint], elapsed)
+            statuses = sorted(self.statuses[endpoint].items(), key=lambda item: str(item[0]))
+            rows[endpoint]['statuses'] = {str(code): n for code, n in statuses}
+        rows['total'] = self.summarize(
+            sorted(every), sum(self.errors.values()), sum(self.throttled.values()), elapsed
+        )
+        return rows
+
+    @staticmethod
+    def summarize(latencies, errors, throttled, elapsed):
+        count = len(latencies)
+
+        def percentile(p):
+            # Nearest rank, in milliseconds.
+            return round(latencies[max(0, -(-count * p // 100) - 1)] * 1000, 1) if count else None
+
+        return {
+            'requests': count,
+            'rps': round(count / elapsed, 1) if elapsed else 0,
+            'error_rate': round(errors / count, 4) if count else 0,
+            'throttled': throttled,
+            'p50_ms': percentile(50),
+            'p90_ms': percentile(90),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'max_ms': round(latencies[-1] * 1000, 1) if count else None,
+        }
+
+
+class Session:
+    """A virtual user: one connection, one account, one random generator."""
+
+    def __init__(self, client, stats, rng, prefix):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.prefix = prefix
+        self.token = None
+        self.user_id = None
+        self.pages = None
+
+    async def call(self, endpoint, method, path, data=None, params=None, expect=(200,)):
+        """Send a request and record it; returns the decoded body, or None on failure."""
+        path = f'{self.prefix}{path}' + (f'?{urlencode(params)}' if params else '')
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else None
+        body = json.dumps(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            status, content = await self.client.request(method, path, body, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            await self.client.close()
+            self.stats.record(endpoint, time.perf_counter() - started, 'connection error', False)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, status, status in expect)
+        if status not in expect:
+            return None
+        try:
+            return json.loads(content) if content else {}
+        except ValueError:
+            return None
+
+    async def login(self, username, password):
+        data = await self.call('token', 'POST', 'token/', {'username': username, 'password': password})
+        if not data or 'access' not in data:
+            raise LoadTestError(f"Could not log in as {username}; seed_load_test --users must cover every virtual user")
+        self.token = data['access']
+        claims = self.token.split('.')[1]
+        self.user_id = json.loads(base64.urlsafe_b64decode(claims + '=' * (-len(claims) % 4)))['user_id']
+
+    async def pick_product(self):
+        """A product from a random page of the catalogue."""
+        params = {'page': self.rng.randint(1, self.pages)} if self.pages else None
+        page = await self.call('products:list', 'GET', 'products/', params=params)
+        results = (page or {}).get('results')
+        if not results:
+            return None
+        if self.pages is None:
+            self.pages = math.ceil(page['count'] / len(results))
+        return self.rng.choice(results)
+
+
+def results_of(data):
+    """List responses are paginated on some endpoints and plain lists on others."""
+    if isinstance(data, dict):
+        return data.get('results') or []
+    return data or []
+
+
+async def browse(session):
+    await session.call('home', 'GET', 'home/')
+    categories = await session.call('parent-categories:list', 'GET', 'parent-categories/')
+    category = session.rng.choice(categories) if categories else None
+    if category is not None:
+        data = await session.call('products:list', 'GET', 'products/', params={'category': category['id']})
+        products = results_of(data)
+        await session.call(
+            'suppliers-by-category', 'GET', 'suppliers-by-category/',
+            params={'category_id': category['id'], 'descendants': 'true'},
+        )
+    else:
+        products = []
+    product = session.rng.choice(products) if products else await session.pick_product()
+    if product is None:
+        return
+    await session.call('products:detail', 'GET', f"products/{product['id']}/")
+    await session.call('products:similar', 'GET', f"products/{product['id']}/similar/")
+    if product['suppliers']:
+        supplier = session.rng.choice(product['suppliers'])
+        await session.call('suppliers:products', 'GET', f"suppliers/{supplier['id']}/products/")
+
+
+async def search(session):
+    word = session.rng.choice(SEARCH_WORDS)
+    for length in range(1, min(len(word), 4) + 1):
+        await session.call('autocomplete', 'GET', 'autocomplete/', params={'q': word[:length]})
+    await session.call('products:search', 'GET', 'products/', params={'search': word})
+
+
+async def favourite(session):
+    product = await session.pick_product()
+    if product is None:
+        return
+    data = {'product': product['id']}
+    if product['suppliers']:
+        data['supplier'] = session.rng.choice(product['suppliers'])['id']
+    created = await session.call('favorites:create', 'POST', 'favorites/', data, expect=(201,))
+    await session.call('favorites:list', 'GET', 'favorites/')
+    if created is not None:
+        await session.call(
+            'favorites:delete', 'DELETE', f"favorites/product/{product['id']}/", expect=(204,)
+        )
+
+
+async def order(session):
+    product = await session.pick_product()
+    if product is None or not product['suppliers']:
+        return
+    supplier = session.rng.choice(product['suppliers'])
+    quantity = session.rng.randint(1, 5)
+    await session.call('cart:add', 'POST', 'cart/add_to_cart/', {'product_id': product['id'], 'quantity': quantity})
+    await session.call('cart:list', 'GET', 'cart/')
+    created = await session.call(
+        'orders:create', 'POST', 'custom-orders/create/',
+        {'product_id': product['id'], 'supplier_id': supplier['id'], 'quantity': quantity}, expect=(201,),
+    )
+    await session.call('cart:remove', 'POST', 'cart/remove_from_cart/', {'product_id': product['id']})
+    if created is not None:
+        await session.call(
+            'applications:create', 'POST', 'applications/',
+            {
+                'user': session.user_id,
+                # The API's DATE_INPUT_FORMATS.
+                'delivery_date': f'{date.today() + timedelta(days=session.rng.randint(1, 7))}T00:00:00.000000Z',
+                'payment_method': session.rng.choice(['cash', 'non-cash', 'online']),
+                'comment': "Load test",
+            },
+            expect=(201,),
+        )
+    await session.call('orders:list', 'GET', 'orders/')
+
+
+JOURNEYS = {
+    'browse': browse,
+    'search': search,
+    'favourite': favourite,
+    'order': order,
+}
+DEFAULT_MIX = 'browse=6,search=3,favourite=1,order=1'
+# Words used in the seeded product names (see seed_load_test).
+SEARCH_WORDS = ['beef', 'lamb', 'chicken', 'turkey', 'milk', 'cheese', 'yogurt', 'butter', 'honey', 'dates']
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise LoadTestError(f"Unknown journey {name!r}; choose from {', '.join(JOURNEYS)}")
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise LoadTestError(f"Invalid weight for {name!r}: {weight!r}")
+    if not any(weights.values()):
+        raise LoadTestError("The journey mix needs a positive weight")
+    return weights
+
+
+async def virtual_user(number, url, stats, options, deadline, counts):
+    parts = urlsplit(url)
+    client = HttpClient(parts.hostname, parts.port or 80, timeout=options['timeout'])
+    rng = random.Random(f"{options['seed']}:{number}")
+    session = Session(client, stats, rng, prefix=parts.path.rstrip('/') + '/api/')
+    names, weights = zip(*options['mix'].items())
+    try:
+        await session.login(f"{options['user_prefix']}{number}", options['password'])
+        while time.monotonic() < deadline and sum(counts.values()) < options['max_journeys']:
+            journey = rng.choices(names, weights)[0]
+            counts[journey] += 1
+            await JOURNEYS[journey](session)
+            if options['think_time']:
+                await asyncio.sleep(rng.uniform(0, options['think_time']))
+    finally:
+        await client.close()
+
+
+async def run(url, **options):
+    """Run ``options['concurrency']`` virtual users until the duration or journey limit; returns the report."""
+    if urlsplit(url).scheme != 'http':
+        raise LoadTestError("Only http:// servers are supported")
+    stats = Stats()
+    counts = Counter()
+    started = time.monotonic()
+    deadline = started + options['duration']
+    await asyncio.gather(*(
+        virtual_user(number, url, stats, options, deadline, counts)
+        for number in range(options['concurrency'])
+    ))
+    elapsed = time.monotonic() - started
+    return {
+        'url': url,
+        'seed': options['seed'],
+        'concurrency': options['concurrency'],
+        'mix': options['mix'],
+        'seconds': round(elapsed, 2),
+        'journeys': dict(counts),
+        'endpoints': stats.summary(elapsed),
+    }
@@ -0,0 +1,55 @@
+import base64
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from products.authentication import (
+    CachedBasicAuthentication, CachedJWTAuthentication, basic_credentials_cache, user_cache
+)
+
+
+class Command(BaseCommand):
+    help = "Measure per-request authentication overhead of the stock and cached authenticators."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per JWT run.")
+        parser.add_argument('--basic-requests', type=int, default=20, help="Requests per Basic auth run.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user('bench-auth-user', password='bench-auth-password')
+            token = str(RefreshToken.for_user(user).access_token)
+            basic = base64.b64encode(b'bench-auth-user:bench-auth-password').decode()
+
+            runs = [
+                ('JWT', JWTAuthentication, f'Bearer {token}', options['requests']),
+                ('JWT (cached)', CachedJWTAuthentication, f'Bearer {token}', options['requests']),
+                ('Basic', BasicAuthentication, f'Basic {basic}', options['basic_requests']),
+                ('Basic (cached)', CachedBasicAuthentication, f'Basic {basic}', options['basic_requests']),
+            ]
+            self.stdout.write(f"{'authenticator':<16} {'requests':>8} {'us/request':>12} {'queries/request':>16}")
+            for label, authenticator_class, header, count in runs:
+                user_cache.clear()
+                basic_credentials_cache.clear()
+                elapsed, queries = self.measure(authenticator_class(), header, count)
+                self.stdout.write(f"{label:<16} {count:>8} {elapsed / count * 1e6:>12.1f} {queries / count:>16.2f}")
+
+            transaction.set_rollback(True)
+
+    def measure(self, authenticator, header, count):
+        factory = APIRequestFactory()
+        requests = [Request(factory.get('/api/products/', HTTP_AUTHORIZATION=header)) for _ in range(count)]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for request in requests:
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries)
@@ -0,0 +1,138 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.models import Category, Order, Product, Supplier, SupplierPrice
+from products.projections import OrderProjection, ProductProjection, ProductsBySupplierProjection
+from products.serializers import ProductsBySupplierSerializer
+from products.views import OrderViewSet, ProductViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the hot list endpoints with their serializers and with their projections, "
+        "check that the JSON is identical and report rows per second (single core)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000, help="Products (and orders) to create.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per path; the best one is reported.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, supplier = self.seed(options['products'])
+            request = Request(APIRequestFactory().get('/api/products/'))
+            request.user = user
+
+            runs = [
+                (
+                    'products',
+                    lambda: self.view(ProductViewSet, request).get_serializer(
+                        self.view(ProductViewSet, request).get_queryset(), many=True
+                    ).data,
+                    lambda: ProductProjection(request).render(self.view(ProductViewSet, request).get_queryset()),
+                ),
+                (
+                    'orders',
+                    lambda: self.view(OrderViewSet, request).get_serializer(
+                        self.view(OrderViewSet, request).get_queryset(), many=True
+                    ).data,
+                    lambda: OrderProjection(request).render(self.view(OrderViewSet, request).get_queryset()),
+                ),
+                (
+                    'supplier products',
+                    lambda: ProductsBySupplierSerializer(
+                        Product.objects.filter(suppliers__id=supplier.pk), many=True,
+                        context={'request': request, 'supplier_id': supplier.pk},
+                    ).data,
+                    lambda: ProductsBySupplierProjection(request, supplier.pk).render(
+                        Product.objects.filter(suppliers__id=supplier.pk)
+                    ),
+                ),
+            ]
+            self.stdout.write(
+                f"{'endpoint':<18} {'rows':>6} {'path':<11} {'rows/s':>10} {'queries':>8} {'speedup':>8}"
+            )
+            for label, serialize, project in runs:
+                expected, rows, serializer_time, serializer_queries = self.measure(serialize, options['repeat'])
+                output, _, projection_time, projection_queries = self.measure(project, options['repeat'])
+                if output != expected:
+                    raise CommandError(f"{label}: projection output differs from the serializer's")
+                self.stdout.write(
+                    f"{label:<18} {rows:>6} {'serializer':<11} {rows / serializer_time:>10.0f} {serializer_queries:>8}"
+                )
+                self.stdout.write(
+                    f"{'':<18} {rows:>6} {'projection':<11} {rows / projection_time:>10.0f} {projection_queries:>8}"
+                    f" {serializer_time / projection_time:>7.1f}x"
+                )
+
+            transaction.set_rollback(True)
+
+    def view(self, view_class, request):
+        view = view_class(request=request, args=(), kwargs={}, action='list', format_kwarg=None)
+        return view
+
+    def measure(self, render, repeat):
+        """Time querying, rendering and JSON encoding of the whole list."""
+        best = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                data = render()
+                content = JSONRenderer().render(data)
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return content, len(data), best, len(queries)
+
+    def seed(self, count):
+        user = get_user_model().objects.create_user('bench-projections-user')
+        categories = []
+        for root in range(3):
+            parent = Category.objects.create(name=f"Bench {root}", logo='category_logos/bench.png')
+            categories.append(parent)
+            for child in range(4):
+                category = Category.objects.create(name=f"Bench {root}.{child}", parent=parent)
+                categories.append(category)
+                for leaf in range(2):
+                    categories.append(Category.objects.create(
+                        name=f"Bench {root}.{child}.{leaf}", parent=category,
+                        logo='category_logos/leaf.png' if leaf else None,
+                    ))
+
+        suppliers = Supplier.objects.bulk_create([
+            Supplier(name=f"Bench supplier {i}", logo='supplier_logos/bench.png' if i % 2 else None,
+                     rating=i % 5, city='Bench', contact_number='0')
+            for i in range(50)
+        ])
+        Supplier.categories.through.objects.bulk_create([
+            Supplier.categories.through(supplier=supplier, category=categories[(i * 7 + j) % len(categories)])
+            for i, supplier in enumerate(suppliers) for j in range(2)
+        ])
+        products = Product.objects.bulk_create([
+            Product(
+                name=f"Bench product {i}", article=f"BP{i}", city='Bench', description="Bench",
+                category=categories[i % len(categories)], characteristics={'weight': i},
+                photo='product_photos/bench.png' if i % 2 else None,
+                price_wholesale=Decimal('8.5'), price_retail=Decimal(i % 100) + Decimal('0.99'),
+                min_order_quantity=i % 10 or None, delivery_time='2 days' if i % 3 else None,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        SupplierPrice.objects.bulk_create([
+            SupplierPrice(supplier=suppliers[(i + j * 17) % len(suppliers)], product=product,
+                          price=Decimal(i % 50) + Decimal('0.5'), delivery_time=f"{j} days")
+            for i, product in enumerate(products) for j in range(3)
+        ], batch_size=1000)
+        Order.objects.bulk_create([
+            Order(user=user, supplier_details=suppliers[i % len(suppliers)], product=product,
+                  quantity=i % 5 + 1, total_cost=product.price_retail * (i % 5 + 1))
+            for i, product in enumerate(products)
+        ], batch_size=1000)
+        return user, suppliers[0]
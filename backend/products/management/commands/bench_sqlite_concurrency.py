@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read throughput under concurrent writes for the stock SQLite "
+        "configuration and the SQLITE_PRAGMAS/IMMEDIATE configuration from settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        configs = [
+            ('stock', {}, 'DEFERRED', 5.0),
+            ('tuned', settings.SQLITE_PRAGMAS, 'IMMEDIATE', settings.SQLITE_BUSY_TIMEOUT),
+        ]
+        self.stdout.write(f"{'config':<8} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+        for label, pragmas, mode, timeout in configs:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.seed(path, options['rows'])
+                result = self.run(path, pragmas, mode, timeout, options)
+            self.stdout.write(
+                f"{label:<8} {result['reads'] / options['seconds']:>10.0f} "
+                f"{result['writes'] / options['seconds']:>10.0f} {result['errors']:>14}"
+            )
+
+    def seed(self, path, rows):
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, cart_id INTEGER, quantity INTEGER)")
+        connection.execute("CREATE INDEX item_cart ON item (cart_id)")
+        connection.executemany(
+            "INSERT INTO item (cart_id, quantity) VALUES (?, 1)", ((n % 500,) for n in range(rows))
+        )
+        connection.commit()
+        connection.close()
+
+    def connect(self, path, pragmas, timeout):
+        connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        for name, value in pragmas.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+    def run(self, path, pragmas, mode, timeout, options):
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def count(name):
+            with lock:
+                counts[name] += 1
+
+        def reader(number):
+            connection = self.connect(path, pragmas, timeout)
+            cart = number
+            while time.monotonic() < deadline:
+                cart = (cart + 7) % 500
+                try:
+                    connection.execute("SELECT id, quantity FROM item WHERE cart_id = ?", (cart,)).fetchall()
+                    count('reads')
+                except sqlite3.OperationalError:
+                    count('errors')
+            connection.close()
+
+        def writer(number):
+            # Mirrors add_to_cart: read the line, then update it, in one transaction.
+            connection = self.connect(path, pragmas, timeout)
+            cart = number
+            while time.monotonic() < deadline:
+                cart = (cart + 11) % 500
+                try:
+                    connection.execute(f"BEGIN {mode}")
+                    row = connection.execute("SELECT id FROM item WHERE cart_id = ? LIMIT 1", (cart,)).fetchone()
+                    connection.execute("UPDATE item SET quantity = quantity + 1 WHERE id = ?", (row[0],))
+                    connection.execute("COMMIT")
+                    count('writes')
+                except sqlite3.OperationalError:
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    count('errors')
+            connection.close()
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild the \"similar products\" neighbours from orders, carts and favourites. Run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help="Neighbours kept per product.")
+        parser.add_argument('--max-basket', type=int, default=200, help="Products considered per user.")
+
+    def handle(self, *args, **options):
+        # NumPy is only needed here, not by the web workers.
+        from products import recommendations
+
+        started = time.perf_counter()
+        written = recommendations.build(top_n=options['top'], max_basket=options['max_basket'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} product neighbours in {elapsed:.1f}s."))
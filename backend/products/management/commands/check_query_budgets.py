@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.utils.timezone import localdate
+
+from products.models import (
+    Application, Banner, Cart, CartItem, Category, Delivery, Favorite, Order, Product, Supplier, SupplierPrice
+)
+
+ENDPOINTS = [
+    '/api/home/',
+    '/api/parent-categories/',
+    '/api/categories/',
+    '/api/categories/{category}/',
+    '/api/suppliers/',
+    '/api/suppliers/{supplier}/',
+    '/api/suppliers/{supplier}/products/',
+    '/api/suppliers-by-category/?category_id={category}',
+    '/api/products/',
+    '/api/products/?search=Budget',
+    '/api/products/{product}/',
+    '/api/products/{product}/similar/',
+    '/api/supplier-prices/',
+    '/api/banners/',
+    '/api/autocomplete/?q=bu',
+    '/api/sync/',
+    '/api/sync/?cursor=1&limit=50',
+    '/api/orders/',
+    '/api/favorites/',
+    '/api/cart/',
+    '/api/cart/summary/',
+    '/api/applications/',
+    '/api/deliveries/',
+]
+
+
+def seed(rows):
+    """Generated data for ENDPOINTS: the user making the requests and the ids the paths need."""
+    user = get_user_model().objects.create_user('query-budget-user', is_staff=True)
+    root = Category.objects.create(name="Budget root")
+    categories = [Category.objects.create(name=f"Budget {n}", parent=root) for n in range(3)]
+    suppliers = []
+    for n in range(rows):
+        supplier = Supplier.objects.create(
+            name=f"Budget supplier {n}", rating=4, city='Budget', contact_number='0'
+        )
+        supplier.categories.set([root, categories[n % 3]])
+        suppliers.append(supplier)
+    products = []
+    for n in range(rows):
+        product = Product.objects.create(
+            name=f"Budget product {n}", article=f"QB{n}", city='Budget', description="Budget",
+            category=categories[n % 3], characteristics={}, price_retail=Decimal('10.00'),
+        )
+        for supplier in (suppliers[n], suppliers[(n + 1) % rows]):
+            SupplierPrice.objects.create(supplier=supplier, product=product, price=Decimal('9.00'), delivery_time='1 day')
+        products.append(product)
+    cart = Cart.objects.create(user=user)
+    orders = []
+    for n, product in enumerate(products):
+        CartItem.objects.create(cart=cart, product=product, quantity=1)
+        Favorite.objects.create(user=user, product=product, supplier=suppliers[n])
+        orders.append(Order.objects.create(user=user, supplier_details=suppliers[n], product=product))
+        Banner.objects.create(product=product, photo='banners/budget.png')
+        Delivery.objects.create(
+            user=user, address="Budget", contact_number='0', delivery_date=localdate()
+        )
+        application = Application.objects.create(user=user, delivery_date=localdate())
+        application.orders.set([orders[-1]])
+    return user, {'category': root.pk, 'supplier': suppliers[0].pk, 'product': products[0].pk}
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the hot API endpoints against generated data and fail if a view runs more "
+        "queries than its query_budget or repeats a statement per row (N+1)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20, help="Rows per list; N+1s grow with it, budgets do not.")
+        parser.add_argument('--allow-repeated', action='store_true', help="Report N+1s without failing.")
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic(), override_settings(QUERY_INSPECTION=True, QUERY_BUDGETS_ENFORCE=False):
+            user, ids = seed(options['rows'])
+            client = Client()
+            client.force_login(user)
+
+            self.stdout.write(f"{'endpoint':<52} {'status':>6} {'queries':>8} {'budget':>7}")
+            for endpoint in ENDPOINTS:
+                path = endpoint.format(**ids)
+                response = client.get(path)
+                report = response.query_report
+                budget = '-' if report['budget'] is None else report['budget']
+                self.stdout.write(f"{path:<52} {response.status_code:>6} {report['count']:>8} {budget:>7}")
+                if response.status_code >= 500:
+                    failures.append(f"{path}: status {response.status_code}")
+                if report['budget'] is not None and report['count'] > report['budget']:
+                    failures.append(f"{path}: {report['count']} queries, budget {report['budget']}")
+                for query in report['repeated']:
+                    self.stdout.write(f"    {query['count']} x from {query['origin']}: {query['sql'][:160]}")
+                    if not options['allow_repeated']:
+                        failures.append(f"{path}: {query['count']} x the same query from {query['origin']}")
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Query checks failed:\n" + '\n'.join(failures))
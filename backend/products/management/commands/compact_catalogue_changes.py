@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from products.models import CatalogueChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete delta-sync log entries superseded by a later entry for the same object. "
+        "Clients at any cursor still receive the object's latest state."
+    )
+
+    def handle(self, *args, **options):
+        latest = CatalogueChange.objects.values('kind', 'object_id').annotate(latest=Max('position')).values('latest')
+        deleted, _ = CatalogueChange.objects.exclude(position__in=latest).delete()
+        self.stdout.write(f"Deleted {deleted} superseded entries, {CatalogueChange.objects.count()} left.")
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI document served by /swagger.json, /swagger/ and /redoc/ to API_SCHEMA_FILE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.API_SCHEMA_FILE))
+
+    def handle(self, *args, **options):
+        with open(options['output'], 'wb') as schema_file:
+            schema_file.write(generate_schema())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.loadtest import DEFAULT_MIX, LoadTestError, parse_mix, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay mobile app journeys against a running server and report throughput, "
+        "error rate and latency percentiles per endpoint. Run seed_load_test first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server root, without /api.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Virtual users running at once.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to run.")
+        parser.add_argument('--max-journeys', type=int, default=None, help="Stop after this many journeys.")
+        parser.add_argument('--mix', default=DEFAULT_MIX, help="Journey weights, e.g. browse=6,search=3,order=1.")
+        parser.add_argument('--seed', type=int, default=1, help="Seed of the virtual users' choices.")
+        parser.add_argument('--think-time', type=float, default=0, help="Up to this many seconds between journeys.")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds to wait for a response.")
+        parser.add_argument('--user-prefix', default='loadtest-')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--json', dest='json_path', help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            options['mix'] = parse_mix(options['mix'])
+            report = asyncio.run(run(
+                options['url'].rstrip('/'),
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                max_journeys=options['max_journeys'] or float('inf'),
+                mix=options['mix'],
+                seed=options['seed'],
+                think_time=options['think_time'],
+                timeout=options['timeout'],
+                user_prefix=options['user_prefix'],
+                password=options['password'],
+            ))
+        except (LoadTestError, OSError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            f"{report['seconds']}s, {options['concurrency']} virtual users, journeys: "
+            + ', '.join(f'{name}={count}' for name, count in sorted(report['journeys'].items()))
+        )
+        self.stdout.write(
+            f"{'endpoint':<24} {'requests':>8} {'req/s':>8} {'errors':>7} {'429':>5} "
+            f"{'p50':>7} {'p90':>7} {'p95':>7} {'p99':>7} {'max':>7}"
+        )
+        for endpoint, row in report['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<24} {row['requests']:>8} {row['rps']:>8} {row['error_rate']:>7.1%} "
+                f"{row['throttled']:>5} {self.ms(row['p50_ms'])} {self.ms(row['p90_ms'])} "
+                f"{self.ms(row['p95_ms'])} {self.ms(row['p99_ms'])} {self.ms(row['max_ms'])}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as file:
+                json.dump(report, file, indent=2)
+
+    @staticmethod
+    def ms(value):
+        return f"{'-' if value is None else value:>7}"
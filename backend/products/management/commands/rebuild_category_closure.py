@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products import closure
+
+
+class Command(BaseCommand):
+    help = "Recompute the category ancestor index (CategoryClosure) from Category.parent."
+
+    def handle(self, *args, **options):
+        links = closure.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {links} category links."))
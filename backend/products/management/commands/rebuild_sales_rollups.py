@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from products import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or backfill) the daily supplier sales rollups from orders and applications."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--date-to', help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--supplier', type=int, help="Only rebuild rows of this supplier id.")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            value = options[name]
+            if value:
+                dates[name] = parse_date(value)
+                if dates[name] is None:
+                    raise CommandError(f"--{name.replace('_', '-')} must be formatted as YYYY-MM-DD")
+
+        written = rollups.rebuild(supplier_id=options['supplier'], **dates)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from products import jobs
+
+
+logger = logging.getLogger(__name__)
+
+
+def work(batch_size, idle_sleep, stop):
+    # Each forked worker must open its own database connections.
+    connections.close_all()
+    # Shutdown is coordinated by the parent through ``stop`` so that a job is
+    # never interrupted halfway.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    worker = jobs.worker_name()
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            claimed = jobs.claim(worker, limit=batch_size)
+            for job in claimed:
+                jobs.run(job)
+        except Exception:
+            # E.g. the database went away: jobs left running are re-queued by ``reap``.
+            logger.exception("Job worker %s failed, retrying", worker)
+            connections.close_all()
+            claimed = []
+        if not claimed:
+            stop.wait(idle_sleep)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--reap-interval', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        connections.close_all()
+
+        def spawn():
+            process = context.Process(
+                target=work, args=(options['batch_size'], options['idle_sleep'], stop), daemon=True
+            )
+            process.start()
+            return process
+
+        pool = [spawn() for _ in range(options['processes'])]
+        self.stdout.write(f"Started {len(pool)} job workers.")
+
+        # Only record the signal here: setting the event from inside a handler
+        # can deadlock on the event's own lock.
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+
+        # The parent only supervises: it re-queues jobs of dead workers and
+        # restarts processes that exited unexpectedly.
+        next_reap = 0
+        while not stopping:
+            if time.monotonic() >= next_reap:
+                try:
+                    requeued = jobs.reap()
+                except Exception:
+                    logger.exception("Reaping stale jobs failed")
+                    requeued = 0
+                if requeued:
+                    self.stdout.write(f"Re-queued {requeued} stale jobs.")
+                connections.close_all()
+                next_reap = time.monotonic() + options['reap_interval']
+            for index, process in enumerate(pool):
+                if not process.is_alive():
+                    pool[index] = spawn()
+            time.sleep(0.5)
+
+        stop.set()
+        for process in pool:
+            process.join()
+        self.stdout.write("Job workers stopped.")
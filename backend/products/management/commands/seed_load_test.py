@@ -0,0 +1,96 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.cache import bump_cities, bump_version
+from products.loadtest import SEARCH_WORDS
+from products.sync import record_changes
+from products.models import Category, Product, Supplier, SupplierPrice
+
+CATALOGUE_PREFIX = "Load test"
+CITIES = ['Almaty', 'Astana', 'Shymkent', 'Karaganda']
+
+
+class Command(BaseCommand):
+    help = (
+        "Create (or recreate) the users and catalogue that load_test runs against. "
+        "The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Accounts; load_test needs one per virtual user.")
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--suppliers', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--user-prefix', default='loadtest-')
+        parser.add_argument('--password', default='loadtest-password')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        User = get_user_model()
+        with transaction.atomic():
+            self.clear(options['user_prefix'])
+
+            template = User(username='template')
+            template.set_password(options['password'])
+            User.objects.bulk_create([
+                User(username=f"{options['user_prefix']}{n}", password=template.password)
+                for n in range(options['users'])
+            ])
+
+            categories = []
+            for root in ('Meat', 'Dairy', 'Poultry', 'Grocery'):
+                parent = Category.objects.create(name=f"{CATALOGUE_PREFIX} {root}")
+                for child in range(3):
+                    categories.append(Category.objects.create(name=f"{parent.name} {child}", parent=parent))
+
+            suppliers = Supplier.objects.bulk_create([
+                Supplier(
+                    name=f"{CATALOGUE_PREFIX} supplier {n}", rating=round(rng.uniform(3, 5), 1),
+                    city=rng.choice(CITIES), contact_number=f"+7700{n:07d}",
+                )
+                for n in range(options['suppliers'])
+            ])
+            Supplier.categories.through.objects.bulk_create([
+                Supplier.categories.through(supplier=supplier, category=category)
+                for supplier in suppliers for category in rng.sample(categories, 3)
+            ])
+
+            products = Product.objects.bulk_create([
+                Product(
+                    name=f"{rng.choice(SEARCH_WORDS).title()} {rng.choice(['premium', 'farm', 'classic'])} {n}",
+                    article=f"LT{n:06d}", city=rng.choice(CITIES), description=CATALOGUE_PREFIX,
+                    category=rng.choice(categories), characteristics={'weight': rng.randint(1, 20)},
+                    price_wholesale=Decimal(rng.randint(500, 5000)), price_retail=Decimal(rng.randint(600, 6000)),
+                    min_order_quantity=rng.randint(1, 10), delivery_time=f"{rng.randint(1, 5)} days",
+                )
+                for n in range(options['products'])
+            ], batch_size=1000)
+            SupplierPrice.objects.bulk_create([
+                SupplierPrice(
+                    supplier=supplier, product=product,
+                    price=Decimal(rng.randint(500, 6000)), delivery_time=f"{rng.randint(1, 5)} days",
+                )
+                for product in products for supplier in rng.sample(suppliers, rng.randint(1, 3))
+            ], batch_size=1000)
+
+            # bulk_create skips the signals that keep caches, the typeahead index and the sync log in sync.
+            record_changes(Supplier, [supplier.pk for supplier in suppliers])
+            record_changes(Product, [product.pk for product in products])
+            record_changes(SupplierPrice, SupplierPrice.objects.filter(product__in=products).values_list('pk', flat=True))
+            transaction.on_commit(lambda: (bump_cities(*CITIES), bump_version('typeahead')))
+
+        self.stdout.write(
+            f"Created {options['users']} users ({options['user_prefix']}0..), {len(categories)} categories, "
+            f"{len(suppliers)} suppliers and {len(products)} products."
+        )
+
+    def clear(self, user_prefix):
+        get_user_model().objects.filter(username__startswith=user_prefix).delete()
+        Product.objects.filter(description=CATALOGUE_PREFIX).delete()
+        Supplier.objects.filter(name__startswith=f"{CATALOGUE_PREFIX} supplier ").delete()
+        for category in Category.objects.filter(name__startswith=f"{CATALOGUE_PREFIX} ").order_by('-pk'):
+            category.delete()
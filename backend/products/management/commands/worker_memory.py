@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.warmup import memory_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the memory of a server's master process and its workers. 'shared' is what a "
+        "worker still shares with the others copy-on-write; 'pss' splits shared pages evenly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pid', type=int, help="Master process id, e.g. gunicorn's.")
+
+    def handle(self, *args, **options):
+        master = options['pid']
+        try:
+            with open(f'/proc/{master}/task/{master}/children') as children:
+                workers = [int(pid) for pid in children.read().split()]
+        except OSError as error:
+            raise CommandError(f"Cannot read the workers of process {master} (needs Linux /proc): {error}")
+
+        self.stdout.write(f"{'process':<16} {'rss':>9} {'pss':>9} {'shared':>9} {'private':>9}  (MiB)")
+        total = {}
+        for role, pid in [('master', master), *(('worker', pid) for pid in workers)]:
+            usage = memory_usage(pid)
+            if not usage:
+                continue
+            for name, value in usage.items():
+                total[name] = total.get(name, 0) + value
+            self.stdout.write(f"{f'{role} {pid}':<16} " + ' '.join(
+                f"{usage.get(name, 0) / 1024:>9.1f}" for name in ('rss', 'pss', 'shared', 'private')
+            ))
+        self.stdout.write(f"{'total':<16} " + ' '.join(
+            f"{total.get(name, 0) / 1024:>9.1f}" for name in ('rss', 'pss', 'shared', 'private')
+        ))
+        self.stdout.write(f"Footprint of the server (sum of pss): {total.get('pss', 0) / 1024:.1f} MiB")
@@ -0,0 +1,190 @@
+"""
+Serving of uploaded media (product photos, logos, banners).
+
+``MEDIA_SERVE`` picks who sends the bytes:
+
+- ``x-accel``: nginx. The view only checks the path and answers with
+  ``X-Accel-Redirect: MEDIA_ACCEL_PREFIX + path``. nginx then serves the file
+  from an internal location, with ranges, conditional requests and sendfile::
+
+      location /protected-media/ {
+          internal;
+          alias /srv/app/media/;  # MEDIA_ROOT
+          expires 1d;
+      }
+
+- ``x-sendfile``: Apache (mod_xsendfile) or lighttpd, with ``X-Sendfile: <absolute path>``.
+- ``django``: ``serve_media`` sends the file itself. It supports single byte
+  ranges, ETag/Last-Modified conditional requests and HEAD. The body is a
+  ``FileResponse`` over the open file, so a WSGI server with
+  ``wsgi.file_wrapper`` (gunicorn) sends it with ``sendfile()``, without
+  copying it through Python.
+- ``off``: no route. The web server serves ``MEDIA_URL`` from ``MEDIA_ROOT`` itself.
+
+Only files under the models' upload directories are served, never anything
+else in ``MEDIA_ROOT``.
+"""
+import functools
+import mimetypes
+import os
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import FileField
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@functools.cache
+def upload_directories():
+    """First path segment of every ``upload_to`` of the project's file fields."""
+    directories = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField) and isinstance(field.upload_to, str) and field.upload_to:
+                directories.add(field.upload_to.strip('/').split('/')[0])
+    return sorted(directories)
+
+
+def media_urlpatterns():
+    if settings.MEDIA_SERVE == 'off':
+        return []
+    prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    directories = '|'.join(re.escape(directory) for directory in upload_directories())
+    return [re_path(rf'^{prefix}(?P<path>(?:{directories})/.+)$', serve_media, name='media')]
+
+
+class FileRange:
+    """
+    ``length`` bytes of an open file from ``start``. ``fileno()`` and the file
+    position let WSGI servers send it with ``sendfile()``; gunicorn sends
+    exactly ``Content-Length`` bytes from the current offset.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single ``bytes=`` range, or None to send
+    the whole file. Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Malformed or multiple ranges: the whole file is a valid answer.
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: the last N bytes.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    # The URL pattern checks the first segment, but "banners/../x" must not escape it either.
+    path = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, '/')
+    if path.split('/')[0] not in upload_directories():
+        raise Http404
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_SERVE in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SERVE == 'x-accel':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + path
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+    }
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        for name, value in headers.items():
+            conditional.headers.setdefault(name, value)
+        patch_cache_control(conditional, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+        return conditional
+
+    start, end = 0, size - 1
+    partial = False
+    if 'Range' in request.headers and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except ValueError:
+            response = HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}', **headers})
+            return response
+        if byte_range is not None:
+            (start, end), partial = byte_range, True
+    length = end - start + 1 if size else 0
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length), content_type=content_type)
+    response.status_code = 206 if partial else 200
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = str(length)
+    if partial:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
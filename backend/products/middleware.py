@@ -0,0 +1,25 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from . import db_routers
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests to views marked with ``read_replica = True`` read the
+    catalogue from a replica; everything else stays on the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_routers.begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if request.method in SAFE_METHODS and getattr(view_class, 'read_replica', False):
+            db_routers.allow_replica_reads()
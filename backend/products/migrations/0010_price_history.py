@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_city_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('previous_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='products.product')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='products.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supplier', 'product', 'changed_at'], name='price_history_lookup_idx')],
+            },
+        ),
+    ]
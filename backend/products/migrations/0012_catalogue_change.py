@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def log_existing_catalogue(apps, schema_editor):
+    # A first sync (cursor 0) walks the log, so it must list every existing row.
+    CatalogueChange = apps.get_model('products', 'CatalogueChange')
+    for kind in ('category', 'supplier', 'product', 'supplierprice', 'banner'):
+        pks = apps.get_model('products', kind).objects.order_by('pk').values_list('pk', flat=True)
+        CatalogueChange.objects.bulk_create(
+            (CatalogueChange(kind=kind, object_id=pk) for pk in pks.iterator()), batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_category_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('supplier', 'Supplier'), ('product', 'Product'), ('supplierprice', 'Supplier price'), ('banner', 'Banner')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='catalogue_change_object_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_catalogue, migrations.RunPython.noop),
+    ]
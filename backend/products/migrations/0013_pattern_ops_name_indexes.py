@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Admin "^name" search runs UPPER("name"::text) LIKE UPPER('x%'). On PostgreSQL a
+# plain btree only serves LIKE under the C collation; text_pattern_ops serves it
+# under any. SQLite has no operator classes and keeps the plain indexes.
+INDEXES = [
+    ('products_product', 'product_upper_name_idx'),
+    ('products_supplier', 'supplier_upper_name_idx'),
+]
+
+
+def rebuild(apps, schema_editor, opclass):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, index in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {quote(index)}')
+        schema_editor.execute(f'CREATE INDEX {quote(index)} ON {quote(table)} ((UPPER("name"::text)) {opclass})')
+
+
+def use_pattern_ops(apps, schema_editor):
+    rebuild(apps, schema_editor, 'text_pattern_ops')
+
+
+def use_default_ops(apps, schema_editor):
+    rebuild(apps, schema_editor, '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_catalogue_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_pattern_ops, use_default_ops),
+    ]
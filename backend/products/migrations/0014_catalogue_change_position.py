@@ -0,0 +1,78 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+# Sync cursors follow commit order, which log ids do not: on PostgreSQL a
+# transaction can commit after another one that took a later id, and a client
+# past that id would never see its entries. A deferred trigger numbers the
+# entries at commit instead; the advisory lock makes committing transactions
+# take turns, so a position is only handed out once every lower one has been
+# committed. SQLite serializes writers, so the id already is in commit order.
+# A later migration that makes SQLite rebuild the table must recreate its trigger.
+POSTGRESQL_TRIGGER = [
+    'CREATE SEQUENCE products_cataloguechange_position_seq',
+    "SELECT setval('products_cataloguechange_position_seq', COALESCE(MAX(id), 0) + 1, false) "
+    'FROM products_cataloguechange',
+    '''
+    CREATE FUNCTION products_cataloguechange_position() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('products_cataloguechange_position'));
+        UPDATE products_cataloguechange
+        SET position = nextval('products_cataloguechange_position_seq')
+        WHERE id = NEW.id;
+        RETURN NULL;
+    END
+    $$
+    ''',
+    '''
+    CREATE CONSTRAINT TRIGGER products_cataloguechange_position
+    AFTER INSERT ON products_cataloguechange
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION products_cataloguechange_position()
+    ''',
+]
+POSTGRESQL_DROP = [
+    'DROP TRIGGER products_cataloguechange_position ON products_cataloguechange',
+    'DROP FUNCTION products_cataloguechange_position()',
+    'DROP SEQUENCE products_cataloguechange_position_seq',
+]
+SQLITE_TRIGGER = [
+    '''
+    CREATE TRIGGER products_cataloguechange_position
+    AFTER INSERT ON products_cataloguechange
+    BEGIN
+        UPDATE products_cataloguechange SET position = NEW.id WHERE id = NEW.id;
+    END
+    ''',
+]
+SQLITE_DROP = ['DROP TRIGGER products_cataloguechange_position']
+
+
+def add_trigger(apps, schema_editor):
+    # Existing cursors are log ids, so existing entries keep their id as position.
+    schema_editor.execute('UPDATE products_cataloguechange SET position = id')
+    vendor = schema_editor.connection.vendor
+    for statement in {'postgresql': POSTGRESQL_TRIGGER, 'sqlite': SQLITE_TRIGGER}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_trigger(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'postgresql': POSTGRESQL_DROP, 'sqlite': SQLITE_DROP}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_pattern_ops_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cataloguechange',
+            name='position',
+            field=models.PositiveBigIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(add_trigger, drop_trigger),
+    ]
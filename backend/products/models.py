@@ -1,4 +1,6 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 from django.utils.timezone import localtime, now
 from django.contrib.auth.models import User
@@ -19,6 +21,31 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if self.pk and self.parent_id and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.parent_id
+        ).exists():
+            raise ValidationError({'parent': "A category cannot be moved under itself or its subcategories."})
+
+
+class CategoryClosure(models.Model):
+    """
+    Every (ancestor, descendant) pair of the category tree, including each
+    category paired with itself at depth 0. Maintained by ``products.closure``.
+    """
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Its index answers "all categories under X" without touching the table.
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_category_closure'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
 
 class Supplier(models.Model):
     name = models.CharField(max_length=255)
@@ -29,6 +56,13 @@ class Supplier(models.Model):
     categories = models.ManyToManyField(Category, related_name='suppliers')
     contact_number = models.CharField(max_length=15)
 
+    class Meta:
+        indexes = [
+            # text_pattern_ops on PostgreSQL (migration 0013) for admin "^name" search.
+            models.Index(Upper('name'), name='supplier_upper_name_idx'),
+            models.Index(fields=['city', 'id'], name='supplier_city_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -57,6 +91,16 @@ class Product(models.Model):
     min_order_quantity = models.PositiveIntegerField(null=True, blank=True)
     delivery_time = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Case-insensitive prefix/exact lookups used by admin search; the name
+            # index uses text_pattern_ops on PostgreSQL (migration 0013).
+            models.Index(Upper('name'), name='product_upper_name_idx'),
+            models.Index(Upper('article'), name='product_upper_article_idx'),
+            # City-scoped catalogue lists, in primary key order.
+            models.Index(fields=['city', 'id'], name='product_city_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -71,6 +115,26 @@ class SupplierPrice(models.Model):
         return f"{self.supplier.name} - {self.product.name}"
 
 
+class PriceHistory(models.Model):
+    """
+    Append-only log of supplier price changes. ``price`` is null when the
+    supplier stopped offering the product, ``previous_price`` when it started.
+    """
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="price_history")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="price_history")
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    previous_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    changed_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['supplier', 'product', 'changed_at'], name='price_history_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id}/{self.product_id}: {self.previous_price} -> {self.price}"
+
+
 class Banner(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True)
@@ -89,6 +153,7 @@ class Order(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="orders")
     quantity = models.PositiveIntegerField(default=1)
     total_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(default=now, db_index=True)
 
     def save(self, *args, **kwargs):
         """Automatically calculate total cost based on product price and quantity."""
@@ -114,6 +179,13 @@ class Application(models.Model):
         ('completed', 'Completed'),
     ]
 
+    # Status changes accepted by the bulk status endpoint: current -> allowed targets.
+    ALLOWED_TRANSITIONS = {
+        'pending': {'delivering', 'completed'},
+        'delivering': {'pending', 'completed'},
+        'completed': set(),
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applications')
     orders = models.ManyToManyField(Order, related_name='applications')
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHODS, default='cash')
@@ -122,6 +194,12 @@ class Application(models.Model):
     delivery_date = models.DateField(default=now)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status'], name='application_user_status_idx'),
+            models.Index(fields=['delivery_date'], name='application_delivery_date_idx'),
+        ]
+
     def __str__(self):
         return f"Application by {self.user.username} on {localtime(self.created_at)}"
 
@@ -160,6 +238,13 @@ class Delivery(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
+    ALLOWED_TRANSITIONS = {
+        'PENDING': {'IN_TRANSIT', 'CANCELLED'},
+        'IN_TRANSIT': {'DELIVERED', 'CANCELLED'},
+        'DELIVERED': set(),
+        'CANCELLED': set(),
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="deliveries")
     address = models.TextField()
     contact_number = models.CharField(max_length=15)
@@ -168,5 +253,122 @@ class Delivery(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status'], name='delivery_user_status_idx'),
+            models.Index(fields=['delivery_date'], name='delivery_delivery_date_idx'),
+        ]
+
     def __str__(self):
         return f"Delivery for {self.user.username} on {self.delivery_date} ({self.get_status_display()})"
+
+
+class SupplierSalesDaily(models.Model):
+    """Daily sales rollup per (supplier, product), maintained by ``products.rollups``."""
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="sales_daily")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_daily")
+    day = models.DateField()
+    orders_count = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_units = models.IntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'product', 'day'], name='unique_supplier_product_day'),
+        ]
+        indexes = [
+            models.Index(fields=['supplier', 'day'], name='sales_supplier_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id}/{self.product_id} on {self.day}: {self.units} units"
+
+
+class Job(models.Model):
+    """Background job stored in the database and run by ``manage.py run_jobs``."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            # At most one queued job per dedupe key; a running one may be re-queued.
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_dedupe_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class ProductNeighbor(models.Model):
+    """Top-N similar products per product, rebuilt by ``manage.py build_recommendations``."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="neighbors")
+    neighbor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Also the index behind the "similar products" read.
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_product_neighbor_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
+class CatalogueChange(models.Model):
+    """
+    Append-only log of catalogue writes behind the delta-sync feed
+    (``products.sync``). ``position`` is the clients' cursor: a database
+    trigger (migration 0014) sets it in commit order, and it is null until
+    then. ``deleted`` marks a tombstone.
+    """
+    KIND_CHOICES = [
+        ('category', 'Category'),
+        ('supplier', 'Supplier'),
+        ('product', 'Product'),
+        ('supplierprice', 'Supplier price'),
+        ('banner', 'Banner'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=now)
+    position = models.PositiveBigIntegerField(null=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # compact_catalogue_changes keeps only the latest entry per object.
+            models.Index(fields=['kind', 'object_id'], name='catalogue_change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.object_id}{' deleted' if self.deleted else ''}"
@@ -0,0 +1,126 @@
+"""
+Bulk supplier price lists.
+
+A price list is diffed against the supplier's ``SupplierPrice`` rows (read
+in one query, with row locks) and only the differences are written: one
+``bulk_create`` for new products, one ``bulk_update`` for changed rows and
+one DELETE for products dropped from a full list. Every price change,
+removals included, is appended to ``PriceHistory`` in the same transaction
+with one bulk insert (the signals do it for single-row edits and deletes).
+
+``(supplier, product)`` is not unique in the schema. For a listed product
+the oldest row is kept in sync and any other row is deleted, so afterwards
+the supplier has exactly the listed price.
+"""
+from django.db import connections, router, transaction
+from django.utils.timezone import now
+
+from . import db_routers, sync
+from .cache import bump_cities
+from .models import PriceHistory, Product, SupplierPrice
+
+
+class PriceListError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def apply_price_list(supplier, items, full=False):
+    """
+    Bring ``supplier``'s prices in line with ``items`` (dicts with ``product``,
+    ``price`` and optional ``delivery_time``). With ``full``, products missing
+    from ``items`` are removed from the supplier. Returns counts per outcome.
+    """
+    items = {item['product']: item for item in items}
+    known = set(Product.objects.filter(pk__in=items).values_list('pk', flat=True))
+    errors = [{'product': pk, 'error': "Not found"} for pk in items if pk not in known]
+
+    with transaction.atomic():
+        rows = SupplierPrice.objects.select_for_update().filter(supplier=supplier).order_by('pk')
+        if not full:
+            rows = rows.filter(product_id__in=items)
+        existing = {}
+        removed, duplicates = [], []
+        for row in rows.only('pk', 'product_id', 'price', 'delivery_time'):
+            if row.product_id not in items:
+                removed.append(row)
+            elif row.product_id in existing:
+                duplicates.append(row)
+            else:
+                existing[row.product_id] = row
+
+        created, changed, history = [], [], []
+        changed_at = now()
+        for product_id, item in items.items():
+            if product_id not in known:
+                continue
+            row = existing.get(product_id)
+            delivery_time = item.get('delivery_time')
+            if row is None:
+                if delivery_time is None:
+                    errors.append({'product': product_id, 'error': "delivery_time is required for new products"})
+                    continue
+                created.append(SupplierPrice(
+                    supplier=supplier, product_id=product_id, price=item['price'], delivery_time=delivery_time
+                ))
+                history.append(PriceHistory(
+                    supplier=supplier, product_id=product_id, price=item['price'], changed_at=changed_at
+                ))
+                continue
+            if delivery_time is None:
+                delivery_time = row.delivery_time
+            if row.price == item['price'] and row.delivery_time == delivery_time:
+                continue
+            if row.price != item['price']:
+                history.append(PriceHistory(
+                    supplier=supplier, product_id=product_id, price=item['price'],
+                    previous_price=row.price, changed_at=changed_at,
+                ))
+            row.price, row.delivery_time = item['price'], delivery_time
+            changed.append(row)
+        if errors:
+            raise PriceListError(errors)
+
+        history += [
+            PriceHistory(supplier=supplier, product_id=row.product_id, previous_price=row.price, changed_at=changed_at)
+            for row in removed
+        ]
+
+        SupplierPrice.objects.bulk_create(created, batch_size=1000)
+        SupplierPrice.objects.bulk_update(changed, ['price', 'delivery_time'], batch_size=1000)
+        delete_rows([row.pk for row in removed + duplicates])
+        PriceHistory.objects.bulk_create(history, batch_size=1000)
+        sync.record_changes(SupplierPrice, [row.pk for row in created + changed])
+        sync.record_changes(SupplierPrice, [row.pk for row in removed + duplicates], deleted=True)
+
+        if created or changed or removed or duplicates:
+            # Bulk writes skip the signals that keep caches in sync.
+            db_routers.pin_to_primary()
+            touched = [row.product_id for row in created + changed + removed + duplicates]
+            cities = [supplier.city, *Product.objects.filter(pk__in=touched).values_list('city', flat=True).distinct()]
+            transaction.on_commit(lambda: bump_cities(*cities))
+
+    return {
+        'created': len(created),
+        'updated': len(changed),
+        'deleted': len(removed),
+        'duplicates_deleted': len(duplicates),
+        'unchanged': len(items) - len(created) - len(changed),
+    }
+
+
+def delete_rows(pks, batch_size=1000):
+    """
+    Plain DELETEs, without the per-row post_delete receivers that
+    ``QuerySet.delete()`` would fetch and signal every row for; the caller
+    does their work in bulk. Nothing references ``SupplierPrice``, so there
+    is nothing to cascade.
+    """
+    connection = connections[router.db_for_write(SupplierPrice)]
+    table = connection.ops.quote_name(SupplierPrice._meta.db_table)
+    column = connection.ops.quote_name(SupplierPrice._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(batch))})", batch)
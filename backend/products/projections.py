@@ -0,0 +1,333 @@
+"""
+Serializer-free rendering of hot read-only lists.
+
+A ``Projection`` declares the output of a serializer as an ordered list of
+fields read with ``values_list()``. Each row becomes a dict through one
+``itemgetter`` and ``dict(zip())``, and only the fields that need it
+(decimals, file URLs, nested relations) are converted in Python. No model
+instances are built. Each nested relation costs one extra query, and a
+related object is rendered once however many rows refer to it.
+
+The output must stay identical to the serializer a projection replaces.
+``bench_projections`` renders both and compares the JSON.
+"""
+import decimal
+from operator import itemgetter
+
+from django.contrib.auth.models import User
+from django.db.models import Count
+from rest_framework.settings import api_settings
+
+from .models import Category, Order, Product, Supplier, SupplierPrice
+
+
+class Field:
+    """A column copied as is."""
+
+    def __init__(self, name, source=None):
+        self.name = name
+        self.source = source or name
+
+    def converter(self, projection, rows, position):
+        """Return a function applied to the column value of every row, or None to keep it."""
+        return None
+
+
+class DecimalString(Field):
+    """Same output as ``serializers.DecimalField``."""
+
+    def __init__(self, name, source=None, max_digits=10, decimal_places=2):
+        super().__init__(name, source)
+        self.max_digits = max_digits
+        self.decimal_places = decimal_places
+
+    def converter(self, projection, rows, position):
+        quantum = decimal.Decimal('.1') ** self.decimal_places
+        context = decimal.getcontext().copy()
+        context.prec = self.max_digits
+        coerce_to_string = api_settings.COERCE_DECIMAL_TO_STRING
+
+        def convert(value):
+            if value is None:
+                return None
+            value = value.quantize(quantum, context=context)
+            return '{:f}'.format(value) if coerce_to_string else value
+        return convert
+
+
+class FileUrl(Field):
+    """
+    Same output as ``serializers.ImageField``: an absolute URL when there is a
+    request, else the storage URL. With ``relative=False`` it is ``None``
+    without a request, like the ``get_photo`` method fields.
+    """
+
+    def __init__(self, name, source=None, relative=True):
+        super().__init__(name, source)
+        self.relative = relative
+
+    def converter(self, projection, rows, position):
+        storage = projection.model._meta.get_field(self.source).storage
+        request = projection.request
+
+        def convert(name):
+            if not name:
+                return None
+            if request is not None:
+                return request.build_absolute_uri(storage.url(name))
+            return storage.url(name) if self.relative else None
+        return convert
+
+
+class Related(Field):
+    """A nested foreign key object, loaded with one query for all rows."""
+
+    def __init__(self, name, projection, source=None):
+        super().__init__(name, source)
+        self.projection = projection
+
+    def converter(self, projection, rows, position):
+        pks = {row[position] for row in rows} - {None}
+        rendered = self.projection(projection.request).render_by_pk(pks) if pks else {}
+        return rendered.get
+
+
+class Many(Field):
+    """Nested objects reached through a many-to-many table, in ``ordering`` of the links."""
+
+    def __init__(self, name, projection, through, source_field, target_field, ordering='pk'):
+        super().__init__(name, 'pk')
+        self.projection = projection
+        self.through = through
+        self.source_field = source_field
+        self.target_field = target_field
+        self.ordering = ordering
+
+    def converter(self, projection, rows, position):
+        pks = [row[position] for row in rows]
+        links = list(
+            self.through.objects.filter(**{f'{self.source_field}__in': pks})
+            .order_by(self.ordering).values_list(self.source_field, self.target_field)
+        )
+        rendered = self.projection(projection.request).render_by_pk({target for _, target in links})
+        grouped = {}
+        for source, target in links:
+            if target in rendered:
+                grouped.setdefault(source, []).append(rendered[target])
+        return lambda pk: grouped.get(pk, [])
+
+
+class PkList(Field):
+    """The ids linked through a many-to-many table, in ``ordering`` of the links."""
+
+    def __init__(self, name, through, source_field, target_field, ordering='pk'):
+        super().__init__(name, 'pk')
+        self.through = through
+        self.source_field = source_field
+        self.target_field = target_field
+        self.ordering = ordering
+
+    def converter(self, projection, rows, position):
+        links = (
+            self.through.objects.filter(**{f'{self.source_field}__in': [row[position] for row in rows]})
+            .order_by(self.ordering).values_list(self.source_field, self.target_field)
+        )
+        grouped = {}
+        for source, target in links:
+            grouped.setdefault(source, []).append(target)
+        return lambda pk: grouped.get(pk, [])
+
+
+class Projection:
+    model = None
+    fields = ()
+    # Annotations read by some fields, e.g. counts.
+    annotations = {}
+
+    def __init__(self, request=None):
+        self.request = request
+        self.columns = ['pk']
+        positions = []
+        for field in self.fields:
+            if field.source not in self.columns:
+                self.columns.append(field.source)
+            positions.append(self.columns.index(field.source))
+        self.names = [field.name for field in self.fields]
+        self.pick = itemgetter(*positions) if len(positions) > 1 else lambda row: (row[positions[0]],)
+
+    def values(self, queryset):
+        """``queryset`` as the rows ``render_rows`` expects; it can still be sliced or paginated."""
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def render(self, queryset):
+        return self.render_rows(list(self.values(queryset)))
+
+    def render_rows(self, rows):
+        names, pick = self.names, self.pick
+        data = [dict(zip(names, pick(row))) for row in rows]
+        for field in self.fields:
+            convert = field.converter(self, rows, self.columns.index(field.source))
+            if convert is not None:
+                name = field.name
+                for item in data:
+                    item[name] = convert(item[name])
+        return data
+
+    def render_by_pk(self, pks):
+        rows = list(self.values(self.model.objects.filter(pk__in=pks)))
+        return {row[0]: item for row, item in zip(rows, self.render_rows(rows))}
+
+
+class CategoryProjection(Projection):
+    """
+    ``CategorySerializer`` with a ``category_tree`` context: every category
+    with its whole subtree. Like the serializer, children are rendered
+    without the request, so only top-level logos are absolute URLs.
+    """
+    model = Category
+    fields = [
+        Field('id'),
+        Field('children', 'pk'),
+        Field('suppliers_count', 'suppliers_total'),
+        Field('name'),
+        FileUrl('logo'),
+        Field('parent'),
+    ]
+    annotations = {'suppliers_total': Count('suppliers')}
+
+    def render_by_pk(self, pks):
+        categories = {}
+        for category in CategoryProjection().render(Category.objects.order_by('pk')):
+            category['children'] = []
+            categories[category['id']] = category
+        for category in categories.values():
+            if category['parent'] in categories:
+                categories[category['parent']]['children'].append(category)
+
+        rendered = {}
+        for pk in pks & categories.keys():
+            category = categories[pk]
+            if category['logo'] and self.request is not None:
+                category = {**category, 'logo': self.request.build_absolute_uri(category['logo'])}
+            rendered[pk] = category
+        return rendered
+
+
+class SupplierProjection(Projection):
+    model = Supplier
+    fields = [
+        Field('id'),
+        # The serializer's prefetch orders them by id.
+        Many(
+            'categories', CategoryProjection, Supplier.categories.through, 'supplier_id', 'category_id',
+            ordering='category_id',
+        ),
+        Field('name'),
+        FileUrl('logo'),
+        Field('rating'),
+        Field('is_favourite'),
+        Field('city'),
+        Field('contact_number'),
+    ]
+
+
+class ProductProjection(Projection):
+    """``ProductSerializer``."""
+    model = Product
+    fields = [
+        Field('id'),
+        Many('suppliers', SupplierProjection, SupplierPrice, 'product_id', 'supplier_id'),
+        Field('name'),
+        Field('article'),
+        Field('city'),
+        Field('description'),
+        Field('characteristics'),
+        FileUrl('photo'),
+        Field('is_favorite'),
+        DecimalString('price_wholesale'),
+        DecimalString('price_retail'),
+        Field('min_order_quantity'),
+        Field('delivery_time'),
+        Field('category'),
+    ]
+
+
+class OrderUserProjection(Projection):
+    model = User
+    fields = [Field('id'), Field('username'), Field('email')]
+
+
+class OrderSupplierProjection(Projection):
+    model = Supplier
+    fields = [Field('id'), Field('name'), FileUrl('logo')]
+
+
+class OrderProductProjection(Projection):
+    model = Product
+    fields = [
+        Field('id'),
+        Field('name'),
+        Field('article'),
+        Field('city'),
+        FileUrl('photo', relative=False),
+        DecimalString('price_wholesale'),
+        DecimalString('price_retail'),
+        Field('min_order_quantity'),
+        Field('delivery_time'),
+    ]
+
+
+class OrderProjection(Projection):
+    """``OrderSerializer``."""
+    model = Order
+    fields = [
+        Field('id'),
+        Related('user', OrderUserProjection),
+        Related('supplier_details', OrderSupplierProjection),
+        Related('product', OrderProductProjection),
+        Field('quantity'),
+        DecimalString('total_cost'),
+    ]
+
+
+class SupplierPriceField(Field):
+    """``price``/``delivery_time`` of the supplier's first price row for the product."""
+
+    def __init__(self, name):
+        super().__init__(name, 'pk')
+        self.attribute = name
+
+    def converter(self, projection, rows, position):
+        prices = projection.supplier_prices(rows)
+        return lambda pk: prices[pk][self.attribute] if pk in prices else None
+
+
+class ProductsBySupplierProjection(Projection):
+    """``ProductsBySupplierSerializer``."""
+    model = Product
+    fields = [
+        Field('id'),
+        Field('name'),
+        Field('article'),
+        FileUrl('photo', relative=False),
+        SupplierPriceField('price'),
+        SupplierPriceField('delivery_time'),
+        Field('is_favorite'),
+    ]
+
+    def __init__(self, request=None, supplier_id=None):
+        super().__init__(request)
+        self.supplier_id = supplier_id
+        self._supplier_prices = None
+
+    def supplier_prices(self, rows):
+        if self._supplier_prices is None:
+            self._supplier_prices = {}
+            prices = SupplierPrice.objects.filter(
+                supplier_id=self.supplier_id, product_id__in={row[0] for row in rows}
+            ).order_by('pk').values('product_id', 'price', 'delivery_time')
+            for price in prices:
+                self._supplier_prices.setdefault(price['product_id'], price)
+        return self._supplier_prices
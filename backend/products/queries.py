@@ -0,0 +1,168 @@
+"""
+Per-request SQL inspection: query counts, N+1 detection and query budgets.
+
+``inspect_queries()`` records every statement run on any database. Each
+statement gets two things:
+
+- a fingerprint: the SQL with its literals and ``IN`` lists removed;
+- an origin: the serializer field being rendered when it ran, as a path like
+  ``ProductSerializer.suppliers.categories.suppliers_count``. Outside
+  serializers it is the innermost frame in the project's code.
+
+The same fingerprint from the same origin ``QUERY_REPEAT_THRESHOLD`` times or
+more is an N+1.
+
+``QueryInspectionMiddleware`` (on with ``QUERY_INSPECTION``) does this for
+every request. It logs N+1s and checks the view's ``query_budget``, which is
+an int or a dict keyed by viewset action. A request over its budget logs an
+error. With ``QUERY_BUDGETS_ENFORCE`` (on under ``manage.py test``) it raises
+``QueryBudgetExceeded`` instead, which fails the test that made the request.
+``check_query_budgets`` runs the hot endpoints against generated data.
+"""
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import ListSerializer, Serializer
+
+
+logger = logging.getLogger(__name__)
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LISTS = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+
+_serializer_to_representation = Serializer.to_representation.__code__
+_project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """The statement's shape: the same query for different rows has the same fingerprint."""
+    sql = SPACES.sub(' ', sql)
+    sql = NUMBERS.sub('?', STRINGS.sub('?', sql))
+    return IN_LISTS.sub('IN (...)', sql)
+
+
+def field_path(field):
+    """``(root serializer, [field names below it])`` for a bound serializer field."""
+    names = []
+    while field.parent is not None:
+        if field.field_name:
+            names.append(field.field_name)
+        field = field.parent
+    return field, names[::-1]
+
+
+def query_origin():
+    """Serializer field path (or project ``file:line in function``) the current query comes from."""
+    frame = sys._getframe(2)
+    names, root, location = None, None, None
+    while frame is not None:
+        if frame.f_code is _serializer_to_representation and 'field' in frame.f_locals:
+            field_root, field_names = field_path(frame.f_locals['field'])
+            if names is None:
+                names, root = field_names, field_root
+            elif field_root is not root:
+                # A serializer created inside a field (e.g. a method field rendering children).
+                names, root = field_names + names, field_root
+        elif location is None and frame.f_code.co_filename.startswith(_project_dir) \
+                and frame.f_code.co_filename != __file__:
+            path = os.path.relpath(frame.f_code.co_filename, _project_dir)
+            location = f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    if names is not None:
+        serializer = root.child if isinstance(root, ListSerializer) else root
+        return '.'.join([type(serializer).__name__, *names])
+    return location
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((fingerprint(sql), query_origin()))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=None):
+        """Statements run ``threshold`` times or more from the same origin, most frequent first."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [
+            {'count': count, 'origin': origin, 'sql': sql}
+            for (sql, origin), count in Counter(self.queries).most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def inspect_queries():
+    """Record the statements run on every database connection of this thread."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def view_budget(view_func, method):
+    """The ``query_budget`` the view declares for this method (its viewset action), or None."""
+    budget = getattr(getattr(view_func, 'cls', None), 'query_budget', None)
+    if isinstance(budget, dict):
+        action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+        return budget.get(action)
+    return budget
+
+
+def describe(report):
+    lines = [f"{report['count']} queries" + (f" (budget {report['budget']})" if report['budget'] is not None else "")]
+    for query in report['repeated']:
+        lines.append(f"  {query['count']} x from {query['origin']}: {query['sql'][:300]}")
+    return '\n'.join(lines)
+
+
+class QueryInspectionMiddleware:
+    """
+    Inspect each request's queries (see the module docstring). The report is
+    also available to test clients as ``response.query_report`` and in the
+    ``X-Query-Count`` header.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with inspect_queries() as recorder:
+            response = self.get_response(request)
+
+        report = {'count': recorder.count, 'budget': request.query_budget, 'repeated': recorder.repeated()}
+        response.query_report = report
+        response['X-Query-Count'] = str(report['count'])
+        if report['repeated']:
+            logger.warning("Repeated queries in %s %s: %s", request.method, request.path, describe(report))
+        if report['budget'] is not None and report['count'] > report['budget']:
+            message = f"{request.method} {request.path} exceeded its query budget: {describe(report)}"
+            if settings.QUERY_BUDGETS_ENFORCE:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_budget(view_func, request.method)
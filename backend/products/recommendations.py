@@ -0,0 +1,148 @@
+"""
+Offline "customers also bought" neighbours, stored in ``ProductNeighbor``.
+
+Every user is a basket of products they ordered, have in their cart or
+marked as favourite (weighted by ``SIGNAL_WEIGHTS``). Pairs of products in
+the same basket are counted with NumPy in chunks of users, and the counts
+are turned into cosine similarities::
+
+    similarity(a, b) = sum_u w(u, a) * w(u, b) / (|a| * |b|)
+
+Only the ``top_n`` most similar products per product are kept. Baskets are
+capped at ``max_basket`` products (the most weighted ones), which bounds the
+pair count per user, so the build grows linearly with the number of
+interaction rows.
+"""
+import itertools
+
+import numpy as np
+from django.db import transaction
+
+from .models import CartItem, Favorite, Order, ProductNeighbor
+
+
+SIGNAL_WEIGHTS = {
+    'orders': 1.0,
+    'favorites': 0.75,
+    'cart': 0.5,
+}
+
+
+def load_pairs(values):
+    """Read ``(user_id, product_id)`` rows into an ``(n, 2)`` int64 array without building tuples."""
+    flat = itertools.chain.from_iterable(values.iterator(chunk_size=20000))
+    return np.fromiter(flat, dtype=np.int64).reshape(-1, 2)
+
+
+def load_interactions():
+    """Return ``users, products, weights`` with one row per (user, product)."""
+    sources = {
+        'orders': Order.objects.values_list('user_id', 'product_id'),
+        'favorites': Favorite.objects.values_list('user_id', 'product_id'),
+        'cart': CartItem.objects.values_list('cart__user_id', 'product_id'),
+    }
+    rows, weights = [], []
+    for name, values in sources.items():
+        pairs = load_pairs(values.order_by())
+        rows.append(pairs)
+        weights.append(np.full(len(pairs), SIGNAL_WEIGHTS[name]))
+    rows = np.concatenate(rows)
+    weights = np.concatenate(weights)
+
+    # Sum repeated interactions of a user with a product.
+    users, products, summed = reduce_pairs(rows[:, 0], rows[:, 1], weights)
+    # Diminishing returns: ten orders of the same product are not ten times the signal.
+    return users, products, np.log1p(summed)
+
+
+def cap_baskets(users, products, weights, max_basket):
+    """Keep each user's ``max_basket`` most weighted products. Rows stay grouped by user."""
+    order = np.lexsort((-weights, users))
+    users, products, weights = users[order], products[order], weights[order]
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    sizes = np.diff(np.r_[starts, len(users)])
+    position = np.arange(len(users)) - np.repeat(starts, sizes)
+    keep = position < max_basket
+    return users[keep], products[keep], weights[keep]
+
+
+def basket_pairs(products, weights, starts, sizes):
+    """All ordered pairs (a, b), a != b, within each basket and the product of their weights."""
+    # Row i pairs with every row of its basket, so it contributes its basket's size in pairs.
+    row_sizes = np.repeat(sizes, sizes)
+    rows = np.repeat(np.arange(len(products)), row_sizes)
+    block_starts = np.cumsum(row_sizes) - row_sizes
+    row_basket_starts = np.repeat(starts, sizes)
+    columns = np.arange(len(rows)) - np.repeat(block_starts - row_basket_starts, row_sizes)
+    distinct = products[rows] != products[columns]
+    rows, columns = rows[distinct], columns[distinct]
+    return products[rows], products[columns], weights[rows] * weights[columns]
+
+
+def reduce_pairs(left, right, scores):
+    """Sum ``scores`` of identical (left, right) pairs."""
+    base = np.int64(max(left.max(initial=0), right.max(initial=0)) + 1)
+    keys, inverse = np.unique(left * base + right, return_inverse=True)
+    return keys // base, keys % base, np.bincount(inverse, weights=scores, minlength=len(keys))
+
+
+def co_occurrence(users, products, weights, chunk_pairs=5_000_000):
+    """Sum ``w(u, a) * w(u, b)`` over users for every co-occurring pair, a chunk of baskets at a time."""
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    sizes = np.diff(np.r_[starts, len(users)])
+    pairs_before = np.cumsum(sizes.astype(np.int64) ** 2)
+
+    parts = []
+    first = 0
+    while first < len(starts):
+        # Take as many whole baskets as fit into one chunk of pairs.
+        done = pairs_before[first - 1] if first else 0
+        last = max(first + 1, np.searchsorted(pairs_before, done + chunk_pairs, side='right'))
+        chunk_starts = starts[first:last]
+        chunk_sizes = sizes[first:last]
+        begin = chunk_starts[0]
+        end = chunk_starts[-1] + chunk_sizes[-1]
+        parts.append(reduce_pairs(*basket_pairs(
+            products[begin:end], weights[begin:end], chunk_starts - begin, chunk_sizes
+        )))
+        first = last
+
+    if not parts:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float64)
+    return reduce_pairs(*(np.concatenate(columns) for columns in zip(*parts)))
+
+
+def top_neighbors(users, products, weights, top_n):
+    """Return ``product, neighbor, rank, score`` arrays with the ``top_n`` cosine neighbours per product."""
+    left, right, dot = co_occurrence(users, products, weights)
+
+    # Norm of each product's weight vector over users.
+    ids, inverse = np.unique(products, return_inverse=True)
+    norms = np.sqrt(np.bincount(inverse, weights=weights ** 2))
+    score = dot / (norms[np.searchsorted(ids, left)] * norms[np.searchsorted(ids, right)])
+
+    order = np.lexsort((right, -score, left))
+    left, right, score = left[order], right[order], score[order]
+    starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]]) if len(left) else np.array([], dtype=np.int64)
+    sizes = np.diff(np.r_[starts, len(left)])
+    rank = np.arange(len(left)) - np.repeat(starts, sizes)
+    keep = rank < top_n
+    return left[keep], right[keep], rank[keep], score[keep]
+
+
+def build(top_n=20, max_basket=200, batch_size=5000):
+    """Recompute every product's neighbours and replace ``ProductNeighbor``. Returns the rows written."""
+    users, products, weights = load_interactions()
+    users, products, weights = cap_baskets(users, products, weights, max_basket)
+    product, neighbor, rank, score = top_neighbors(users, products, weights, top_n)
+
+    rows = (
+        ProductNeighbor(product_id=p, neighbor_id=n, rank=r, score=s)
+        for p, n, r, s in zip(product.tolist(), neighbor.tolist(), rank.tolist(), score.tolist())
+    )
+    with transaction.atomic():
+        ProductNeighbor.objects.all().delete()
+        while batch := list(itertools.islice(rows, batch_size)):
+            ProductNeighbor.objects.bulk_create(batch)
+    return len(product)
@@ -0,0 +1,156 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate
+
+from .models import Application, Order, SupplierSalesDaily
+
+
+COMPLETED = 'completed'
+
+
+def order_key(order):
+    """Rollup key of an order: (supplier_id, product_id, day)."""
+    return order['supplier_details_id'], order['product_id'], localdate(order['created_at'])
+
+
+def snapshot_order(order):
+    return {
+        'supplier_details_id': order.supplier_details_id,
+        'product_id': order.product_id,
+        'created_at': order.created_at,
+        'quantity': order.quantity,
+        'total_cost': order.total_cost,
+    }
+
+
+def bump(key, **deltas):
+    """
+    Add ``deltas`` to the rollup row identified by ``key``.
+
+    Only increments may create a missing row; decrements against a row that no
+    longer exists (e.g. removed by a cascading delete) are dropped.
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    supplier_id, product_id, day = key
+    rows = SupplierSalesDaily.objects.filter(supplier_id=supplier_id, product_id=product_id, day=day)
+    updates = {name: F(name) + value for name, value in deltas.items()}
+    if rows.update(**updates) or any(value < 0 for value in deltas.values()):
+        return
+
+    try:
+        with transaction.atomic():
+            SupplierSalesDaily.objects.create(
+                supplier_id=supplier_id, product_id=product_id, day=day, **deltas
+            )
+    except IntegrityError:
+        rows.update(**updates)
+
+
+def apply_order(order, sign=1, completed_links=0):
+    """Add (or with ``sign=-1`` remove) an order snapshot's contribution."""
+    quantity = order['quantity'] * sign
+    total_cost = (order['total_cost'] or Decimal('0')) * sign
+    bump(
+        order_key(order),
+        orders_count=sign,
+        units=quantity,
+        revenue=total_cost,
+        completed_units=quantity * completed_links,
+        completed_revenue=total_cost * completed_links,
+    )
+
+
+def completed_links_count(order_id):
+    return Application.orders.through.objects.filter(
+        order_id=order_id, application__status=COMPLETED
+    ).count()
+
+
+def apply_completion(order_ids, sign=1):
+    """
+    Move orders in or out of the completed totals, once per occurrence in
+    ``order_ids`` (an order that belongs to two completed applications counts twice).
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    occurrences = defaultdict(int)
+    for order_id in order_ids:
+        occurrences[order_id] += 1
+
+    orders = Order.objects.filter(pk__in=occurrences).values(
+        'pk', 'supplier_details_id', 'product_id', 'created_at', 'quantity', 'total_cost'
+    )
+    for order in orders:
+        times = occurrences[order['pk']] * sign
+        bump(
+            order_key(order),
+            completed_units=order['quantity'] * times,
+            completed_revenue=(order['total_cost'] or Decimal('0')) * times,
+        )
+
+
+def rebuild(date_from=None, date_to=None, supplier_id=None):
+    """
+    Recompute rollup rows from ``Order``/``Application`` for the given window.
+
+    Returns the number of rollup rows written.
+    """
+    orders = Order.objects.all()
+    links = Application.orders.through.objects.filter(application__status=COMPLETED)
+    rollups = SupplierSalesDaily.objects.all()
+    if date_from:
+        orders = orders.filter(created_at__date__gte=date_from)
+        links = links.filter(order__created_at__date__gte=date_from)
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        orders = orders.filter(created_at__date__lte=date_to)
+        links = links.filter(order__created_at__date__lte=date_to)
+        rollups = rollups.filter(day__lte=date_to)
+    if supplier_id:
+        orders = orders.filter(supplier_details_id=supplier_id)
+        links = links.filter(order__supplier_details_id=supplier_id)
+        rollups = rollups.filter(supplier_id=supplier_id)
+
+    rows = {}
+
+    def row(supplier, product, day):
+        key = (supplier, product, day)
+        if key not in rows:
+            rows[key] = SupplierSalesDaily(supplier_id=supplier, product_id=product, day=day)
+        return rows[key]
+
+    totals = (
+        orders.annotate(day=TruncDate('created_at'))
+        .values('supplier_details_id', 'product_id', 'day')
+        .annotate(orders_count=Count('id'), units=Sum('quantity'), revenue=Sum('total_cost'))
+        .order_by()
+    )
+    for item in totals.iterator(chunk_size=2000):
+        rollup = row(item['supplier_details_id'], item['product_id'], item['day'])
+        rollup.orders_count = item['orders_count']
+        rollup.units = item['units'] or 0
+        rollup.revenue = item['revenue'] or 0
+
+    completed = (
+        links.annotate(day=TruncDate('order__created_at'))
+        .values('order__supplier_details_id', 'order__product_id', 'day')
+        .annotate(units=Sum('order__quantity'), revenue=Sum('order__total_cost'))
+        .order_by()
+    )
+    for item in completed.iterator(chunk_size=2000):
+        rollup = row(item['order__supplier_details_id'], item['order__product_id'], item['day'])
+        rollup.completed_units = item['units'] or 0
+        rollup.completed_revenue = item['revenue'] or 0
+
+    with transaction.atomic():
+        rollups.delete()
+        SupplierSalesDaily.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
@@ -1,12 +1,29 @@
+from decimal import Decimal
+
+from django.db.models import Count
 from rest_framework import serializers
 from .models import (
     Category, Supplier, Product, SupplierPrice,
-    Banner, Order, Cart, CartItem, Favorite, Application, Delivery
+    Banner, Order, Cart, CartItem, Favorite, Application, Delivery, ProductNeighbor, PriceHistory
 )
 from django.contrib.auth.models import User
+from . import closure
+
+
+class SparseFieldsMixin:
+    """
+    Accept a ``fields`` argument listing the only fields to render; used by
+    ``SparseFieldsetMixin`` in the views for ``?fields=``/``?expand=``.
+    """
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
     suppliers_count = serializers.SerializerMethodField()
 
@@ -15,16 +32,40 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_children(self, obj):
+        tree = self.context.get('category_tree')
+        if tree is not None:
+            children = tree.get(obj.pk, [])
+            return CategorySerializer(children, many=True, context={'category_tree': tree}).data if children else []
         children = obj.children.all()
         return CategorySerializer(children, many=True).data if children.exists() else []
 
+    def validate_parent(self, value):
+        if self.instance is not None and closure.is_descendant(getattr(value, 'pk', None), self.instance.pk):
+            raise serializers.ValidationError("A category cannot be moved under itself or its subcategories.")
+        return value
+
     def get_suppliers_count(self, obj):
+        if hasattr(obj, 'suppliers_total'):
+            return obj.suppliers_total
         return obj.suppliers.count()
 
 
+def category_tree():
+    """
+    Load every category once, grouped by parent id, with its suppliers count.
+
+    Pass the result as ``category_tree`` in the serializer context to render
+    nested categories without a query per node.
+    """
+    tree = {}
+    for category in Category.objects.annotate(suppliers_total=Count('suppliers')).order_by('pk'):
+        tree.setdefault(category.parent_id, []).append(category)
+    return tree
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+
+
+class SupplierSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
 
     class Meta:
@@ -32,20 +73,20 @@ class SupplierSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class SupplierPriceSerializer(serializers.ModelSerializer):
+class SupplierPriceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SupplierPrice
         fields = "__all__"
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     suppliers = SupplierSerializer(many=True, read_only=True)
     class Meta:
         model = Product
         fields = "__all__"
 
 
-class BannerSerializer(serializers.ModelSerializer):
+class BannerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Banner
         fields = ['id', 'category', 'supplier', 'product', 'photo']
@@ -80,12 +121,20 @@ class OrderProductSerializer(serializers.ModelSerializer):
         return None
 
 
+class SimilarProductSerializer(serializers.ModelSerializer):
+    product = OrderProductSerializer(source='neighbor', read_only=True)
+
+    class Meta:
+        model = ProductNeighbor
+        fields = ['score', 'product']
+
+
 class OrderUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     supplier_details = OrderSupplierSerializer(read_only=True)
     product = OrderProductSerializer(read_only=True)
     user = OrderUserSerializer(read_only=True)
@@ -127,8 +176,47 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'updated_at', 'items']
 
 
+class CartSupplierPriceSerializer(serializers.ModelSerializer):
+    supplier = OrderSupplierSerializer(read_only=True)
+
+    class Meta:
+        model = SupplierPrice
+        fields = ['id', 'supplier', 'price', 'delivery_time']
+
+
+class CartLineSerializer(serializers.ModelSerializer):
+    product = serializers.SerializerMethodField()
+    supplier_price = CartSupplierPriceSerializer(read_only=True)
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    line_total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = ['id', 'product', 'quantity', 'supplier_price', 'unit_price', 'line_total']
+
+    def get_product(self, obj):
+        return ProductCompactSerializer(obj.product, context=self.context).data
+
+
+class CartTotalsSerializer(serializers.Serializer):
+    lines = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    unpriced_lines = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class CartSummarySerializer(serializers.ModelSerializer):
+    """The cart screen, priced by ``carts.price_cart`` (which sets ``lines`` and ``totals``)."""
+    items = CartLineSerializer(source='lines', many=True, read_only=True)
+    totals = CartTotalsSerializer(read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ['id', 'user', 'updated_at', 'items', 'totals']
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.id')
+    user = serializers.ReadOnlyField(source='user_id')
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())  # Expecting the product ID
     supplier = serializers.PrimaryKeyRelatedField(queryset=Supplier.objects.all(), required=False)
     delivery_time = serializers.SerializerMethodField()
@@ -138,28 +226,30 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ['id', 'user', 'product', 'supplier', "price", "delivery_time"]
 
+    def get_supplier_price(self, obj):
+        # Views listing many favorites pass the prices of all rows at once as
+        # ``supplier_prices``, keyed by (supplier_id, product_id).
+        supplier_prices = self.context.get('supplier_prices')
+        if supplier_prices is not None:
+            return supplier_prices.get((obj.supplier_id, obj.product_id))
+        try:
+            return SupplierPrice.objects.get(
+                supplier=obj.supplier,
+                product=obj.product
+            )
+        except SupplierPrice.DoesNotExist:
+            return None
+
     def get_price(self, obj):
         if obj.supplier and obj.product:
-            try:
-                supplier_price = SupplierPrice.objects.get(
-                    supplier=obj.supplier,
-                    product=obj.product
-                )
-                return supplier_price.price
-            except SupplierPrice.DoesNotExist:
-                return None
+            supplier_price = self.get_supplier_price(obj)
+            return supplier_price.price if supplier_price else None
         return None
 
     def get_delivery_time(self, obj):
         if obj.supplier and obj.product:
-            try:
-                supplier_price = SupplierPrice.objects.get(
-                    supplier=obj.supplier,
-                    product=obj.product
-                )
-                return supplier_price.delivery_time
-            except SupplierPrice.DoesNotExist:
-                return None
+            supplier_price = self.get_supplier_price(obj)
+            return supplier_price.delivery_time if supplier_price else None
         return None
 
     def validate(self, data):
@@ -177,6 +267,18 @@ class FavoriteSerializer(serializers.ModelSerializer):
 
         return data
 
+    @staticmethod
+    def supplier_prices_for(favorites):
+        """Fetch the ``supplier_prices`` context for ``favorites`` in one query."""
+        pairs = {(f.supplier_id, f.product_id) for f in favorites if f.supplier_id}
+        if not pairs:
+            return {}
+        prices = SupplierPrice.objects.filter(
+            supplier_id__in={supplier_id for supplier_id, _ in pairs},
+            product_id__in={product_id for _, product_id in pairs},
+        )
+        return {(sp.supplier_id, sp.product_id): sp for sp in prices}
+
     def to_representation(self, instance):
         """
         Customize the serialized output to include nested product and supplier details.
@@ -220,7 +322,7 @@ class SupplierCompactSerializer(serializers.ModelSerializer):
 
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     orders = ApplicationOrderSerializer(many=True, read_only=True)
 
     class Meta:
@@ -233,7 +335,8 @@ class ApplicationSerializer(serializers.ModelSerializer):
 
     #here
     def create(self, validated_data):
-        orders = validated_data.pop('orders')
+        # ``orders`` is read-only, so it is only present when a caller passes it to save().
+        orders = validated_data.pop('orders', [])
         application = Application.objects.create(**validated_data)
         application.orders.set(orders)
         return application
@@ -254,6 +357,37 @@ class DeliverySerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'address', 'contact_number', 'status', 'delivery_date', 'created_at', 'updated_at']
 
 
+class BulkStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.CharField(max_length=20)
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    updates = BulkStatusItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class PriceListItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    delivery_time = serializers.CharField(max_length=255, required=False)
+
+
+class PriceListSerializer(serializers.Serializer):
+    full = serializers.BooleanField(default=False)
+    items = PriceListItemSerializer(many=True, max_length=50000)
+
+    def validate_items(self, items):
+        if len({item['product'] for item in items}) != len(items):
+            raise serializers.ValidationError("Each product may only appear once.")
+        return items
+
+
+class PriceHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceHistory
+        fields = ['product', 'price', 'previous_price', 'changed_at']
+
+
 class SupplierByCategorySerializer(serializers.ModelSerializer):
     product_count = serializers.IntegerField()
     min_delivery_time = serializers.CharField()
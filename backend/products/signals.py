@@ -0,0 +1,376 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import closure, db_routers, events, rollups, sync, typeahead
+from .cache import bump_cart, bump_cities, bump_version
+from .authentication import evict_user
+from .models import (
+    Application, Banner, Cart, CartItem, Category, Delivery, Order, PriceHistory, Product, Supplier,
+    SupplierPrice
+)
+
+
+# Read-your-writes: once a request writes anything, its remaining reads go to the primary.
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def pin_request_to_primary(sender, **kwargs):
+    db_routers.pin_to_primary()
+
+
+# Sales rollups
+
+@receiver(pre_save, sender=Order)
+def remember_order_rollup(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = Order.objects.filter(pk=instance.pk).values(
+        'supplier_details_id', 'product_id', 'created_at', 'quantity', 'total_cost'
+    ).first()
+
+
+@receiver(post_save, sender=Order)
+def update_order_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    links = 0 if created else rollups.completed_links_count(instance.pk)
+    if previous:
+        rollups.apply_order(previous, sign=-1, completed_links=links)
+    rollups.apply_order(rollups.snapshot_order(instance), completed_links=links)
+
+
+@receiver(pre_delete, sender=Order)
+def detach_deleted_order(sender, instance, **kwargs):
+    # Clearing the links here (and for applications below) means every
+    # (application, order) pair leaves the completed totals exactly once, even
+    # when both sides are removed by the same cascade.
+    instance.applications.clear()
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_rollup(sender, instance, **kwargs):
+    rollups.apply_order(rollups.snapshot_order(instance), sign=-1)
+
+
+@receiver(pre_save, sender=Application)
+def remember_application_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_status = Application.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Application)
+def update_application_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    was_completed = getattr(instance, '_previous_status', None) == rollups.COMPLETED
+    is_completed = instance.status == rollups.COMPLETED
+    if was_completed != is_completed:
+        order_ids = instance.orders.values_list('pk', flat=True)
+        rollups.apply_completion(order_ids, sign=1 if is_completed else -1)
+
+
+@receiver(pre_delete, sender=Application)
+def detach_deleted_application(sender, instance, **kwargs):
+    instance.orders.clear()
+
+
+@receiver(m2m_changed, sender=Application.orders.through)
+def update_application_orders_rollup(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    sign = 1 if action == 'post_add' else -1
+
+    if not reverse:
+        if instance.status != rollups.COMPLETED:
+            return
+        if action == 'pre_clear':
+            pk_set = instance.orders.values_list('pk', flat=True)
+        rollups.apply_completion(pk_set, sign=sign)
+        return
+
+    applications = Application.objects.filter(status=rollups.COMPLETED)
+    if action == 'pre_clear':
+        applications = applications.filter(orders=instance)
+    else:
+        applications = applications.filter(pk__in=pk_set)
+    rollups.apply_completion([instance.pk] * applications.count(), sign=sign)
+
+
+# Status change events
+
+@receiver(pre_save, sender=Delivery)
+def remember_delivery_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_status = Delivery.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=Delivery)
+def publish_status_change(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_status', None)
+    if raw or (not created and previous == instance.status):
+        return
+    events.publish_status(sender._meta.model_name, instance.pk, instance.user_id, instance.status, previous)
+
+
+# Price history for single-row edits (bulk price lists write their own, see pricelists).
+
+@receiver(pre_save, sender=SupplierPrice)
+def remember_price(sender, instance, raw=False, **kwargs):
+    instance._previous_price = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_price = SupplierPrice.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=SupplierPrice)
+def record_price_change(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_price', None)
+    if raw or (not created and previous == instance.price):
+        return
+    PriceHistory.objects.create(
+        supplier_id=instance.supplier_id, product_id=instance.product_id,
+        price=instance.price, previous_price=previous,
+    )
+
+
+@receiver(post_delete, sender=SupplierPrice)
+def record_price_removal(sender, instance, origin=None, **kwargs):
+    # Not when the supplier or product itself is being deleted: its history goes with it.
+    if not (isinstance(origin, SupplierPrice) or getattr(origin, 'model', None) is SupplierPrice):
+        return
+    PriceHistory.objects.create(
+        supplier_id=instance.supplier_id, product_id=instance.product_id, previous_price=instance.price
+    )
+
+
+# Typeahead index
+
+def names_changed(update_fields, *names):
+    return update_fields is None or any(name in update_fields for name in names)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Supplier)
+def remember_names(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = ['name', 'article'] if sender is Product else ['name']
+    instance._previous_names = None
+    if raw or instance.pk is None or not names_changed(update_fields, *fields):
+        return
+    instance._previous_names = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+def names_unchanged(instance, *fields):
+    return getattr(instance, '_previous_names', None) == tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Other saves would bump the version and make every worker rebuild for nothing.
+    if raw or not names_changed(update_fields, 'name', 'article') or names_unchanged(instance, 'name', 'article'):
+        return
+    entry = typeahead.product_entry(instance.pk, instance.name, instance.article)
+    transaction.on_commit(lambda: typeahead.index.upsert((typeahead.PRODUCT, entry['id']), entry))
+
+
+@receiver(post_save, sender=Supplier)
+def index_supplier(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not names_changed(update_fields, 'name') or names_unchanged(instance, 'name'):
+        return
+    entry = typeahead.supplier_entry(instance.pk, instance.name)
+    transaction.on_commit(lambda: typeahead.index.upsert((typeahead.SUPPLIER, entry['id']), entry))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Supplier)
+def unindex_deleted(sender, instance, **kwargs):
+    key = (sender._meta.model_name, instance.pk)
+    transaction.on_commit(lambda: typeahead.index.remove(key))
+
+
+def add_order_popularity(order, amount):
+    keys = [(typeahead.PRODUCT, order.product_id), (typeahead.SUPPLIER, order.supplier_details_id)]
+
+    def apply():
+        for key in keys:
+            typeahead.index.add_score(key, amount)
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Order)
+def count_order_popularity(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_order_popularity(instance, 1)
+
+
+@receiver(post_delete, sender=Order)
+def uncount_order_popularity(sender, instance, **kwargs):
+    add_order_popularity(instance, -1)
+
+
+# Authentication caches
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_cached_user(sender, instance, **kwargs):
+    evict_user(instance.pk)
+    # Again after the commit: a request in between may have cached the old row.
+    transaction.on_commit(lambda: evict_user(instance.pk))
+
+
+# Home screen cache
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(m2m_changed, sender=Supplier.categories.through)
+def invalidate_home_sections(sender, **kwargs):
+    # After the commit, or a concurrent request could cache the old sections under the new version.
+    transaction.on_commit(lambda: bump_version('home'))
+
+
+# City catalogue caches: only the cities whose catalogue changed are invalidated.
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Supplier)
+def remember_city(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_city = None
+    if raw or instance.pk is None or (update_fields is not None and 'city' not in update_fields):
+        return
+    instance._previous_city = sender.objects.filter(pk=instance.pk).values_list('city', flat=True).first()
+
+
+def invalidate_cities(*cities):
+    transaction.on_commit(lambda: bump_cities(*cities))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_city(sender, instance, **kwargs):
+    invalidate_cities(instance.city, getattr(instance, '_previous_city', None))
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def invalidate_supplier_cities(sender, instance, **kwargs):
+    # Products list their suppliers, so the cities of the supplier's products change too.
+    product_cities = Product.objects.filter(suppliers=instance).values_list('city', flat=True).distinct()
+    invalidate_cities(instance.city, getattr(instance, '_previous_city', None), *product_cities)
+
+
+@receiver(post_save, sender=SupplierPrice)
+@receiver(post_delete, sender=SupplierPrice)
+def invalidate_supplier_price_cities(sender, instance, **kwargs):
+    invalidate_cities(
+        Product.objects.filter(pk=instance.product_id).values_list('city', flat=True).first(),
+        Supplier.objects.filter(pk=instance.supplier_id).values_list('city', flat=True).first(),
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(m2m_changed, sender=Supplier.categories.through)
+def invalidate_all_cities(sender, **kwargs):
+    # Categories are nested in every city's results.
+    transaction.on_commit(lambda: bump_version('catalogue'))
+
+
+# Priced cart cache (products.carts)
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_cart(instance.user_id))
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_of_item(sender, instance, **kwargs):
+    if CartItem.cart.is_cached(instance):
+        user_id = instance.cart.user_id
+    else:
+        user_id = Cart.objects.filter(pk=instance.cart_id).values_list('user_id', flat=True).first()
+    transaction.on_commit(lambda: bump_cart(user_id))
+
+
+# Delta-sync change log (products.sync)
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=SupplierPrice)
+@receiver(post_save, sender=Banner)
+def log_catalogue_save(sender, instance, **kwargs):
+    sync.record_changes(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=SupplierPrice)
+@receiver(post_delete, sender=Banner)
+def log_catalogue_delete(sender, instance, **kwargs):
+    sync.record_changes(sender, [instance.pk], deleted=True)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Supplier)
+@receiver(pre_delete, sender=Product)
+def log_catalogue_set_null(sender, instance, **kwargs):
+    # SET_NULL and m2m link deletes are plain UPDATE/DELETE queries without signals.
+    name = sender._meta.model_name
+    sync.record_changes(Banner, Banner.objects.filter(**{name: instance}).values_list('pk', flat=True))
+    if sender is Category:
+        sync.record_changes(Category, instance.children.values_list('pk', flat=True))
+        sync.record_changes(Supplier, instance.suppliers.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Supplier.categories.through)
+def log_supplier_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync.record_changes(Supplier, [instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        sync.record_changes(Supplier, pk_set)
+    elif action == 'pre_clear':
+        sync.record_changes(Supplier, instance.suppliers.values_list('pk', flat=True))
+
+
+# Category closure table
+
+@receiver(pre_save, sender=Category)
+def remember_category_parent(sender, instance, raw=False, **kwargs):
+    instance._previous_parent_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_parent_id = Category.objects.filter(pk=instance.pk).values_list('parent_id', flat=True).first()
+    if instance.parent_id != instance._previous_parent_id and closure.is_descendant(instance.parent_id, instance.pk):
+        raise ValueError(f"Category {instance.pk} cannot be moved under its own subtree")
+
+
+@receiver(post_save, sender=Category)
+def update_category_closure(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixtures may load children before parents; run rebuild_category_closure afterwards.
+        return
+    if created:
+        closure.insert(instance)
+    elif instance.parent_id != instance._previous_parent_id:
+        closure.move(instance.pk, instance.parent_id)
+
+
+@receiver(pre_delete, sender=Category)
+def detach_deleted_category(sender, instance, **kwargs):
+    closure.detach_children(instance.pk)
@@ -0,0 +1,117 @@
+"""
+Delta sync of the catalogue for the app's offline copy.
+
+Every insert, update and delete of a category, supplier, product, supplier
+price or banner appends a ``CatalogueChange`` in the same transaction: the
+signals cover single-row writes, cascades and ``SET_NULL`` updates, and
+``record_changes`` is called explicitly after ``bulk_create``/``bulk_update``.
+The 0012 migration logged the rows that existed before, so a first sync from
+cursor 0 walks the whole catalogue.
+
+``changes_since(cursor)`` reads the next page of the log by ``position`` and
+returns the current rows of the objects it names, plus tombstones for those
+deleted. A client stores the returned ``cursor`` and asks again while
+``has_more`` is true. Refresh traffic is proportional to the number of
+changes, not to the catalogue size.
+
+Log ids are handed out at insert time, and on PostgreSQL a transaction can
+commit after another one that took a later id. Positions are set by a
+database trigger when the transaction commits, in commit order (see
+migration 0014), so once a client has seen a position no lower one can
+appear. Entries of transactions still in flight have none yet and are not
+served, however long the transaction runs.
+``compact_catalogue_changes`` drops entries superseded by a later one for the
+same object.
+"""
+from .models import Banner, CatalogueChange, Category, Product, Supplier, SupplierPrice
+from .projections import DecimalString, Field, FileUrl, PkList, Projection
+
+
+class CategoryRow(Projection):
+    model = Category
+    fields = [Field('id'), Field('name'), FileUrl('logo'), Field('parent', 'parent_id')]
+
+
+class SupplierRow(Projection):
+    model = Supplier
+    fields = [
+        Field('id'), Field('name'), FileUrl('logo'), Field('rating'), Field('is_favourite'), Field('city'),
+        Field('contact_number'),
+        PkList('categories', Supplier.categories.through, 'supplier_id', 'category_id', ordering='category_id'),
+    ]
+
+
+class ProductRow(Projection):
+    model = Product
+    fields = [
+        Field('id'), Field('name'), Field('article'), Field('city'), Field('description'),
+        Field('category', 'category_id'), Field('characteristics'), FileUrl('photo'), Field('is_favorite'),
+        DecimalString('price_wholesale'), DecimalString('price_retail'), Field('min_order_quantity'),
+        Field('delivery_time'),
+    ]
+
+
+class SupplierPriceRow(Projection):
+    model = SupplierPrice
+    fields = [
+        Field('id'), Field('supplier', 'supplier_id'), Field('product', 'product_id'), DecimalString('price'),
+        Field('delivery_time'),
+    ]
+
+
+class BannerRow(Projection):
+    model = Banner
+    fields = [
+        Field('id'), Field('category', 'category_id'), Field('supplier', 'supplier_id'),
+        Field('product', 'product_id'), FileUrl('photo'),
+    ]
+
+
+# Response key and row projection of each tracked model, in the order a client can apply them.
+TRACKED = {
+    Category: ('categories', CategoryRow),
+    Supplier: ('suppliers', SupplierRow),
+    Product: ('products', ProductRow),
+    SupplierPrice: ('supplier_prices', SupplierPriceRow),
+    Banner: ('banners', BannerRow),
+}
+MODELS = {model._meta.model_name: model for model in TRACKED}
+
+
+def record_changes(model, pks, deleted=False):
+    """Log a write to the ``model`` rows ``pks``; call it for writes that send no signals."""
+    kind = model._meta.model_name
+    CatalogueChange.objects.bulk_create(
+        [CatalogueChange(kind=kind, object_id=pk, deleted=deleted) for pk in pks], batch_size=1000
+    )
+
+
+def changes_since(cursor, limit, request=None):
+    entries = list(
+        CatalogueChange.objects.filter(position__gt=cursor).order_by('position')
+        .values_list('position', 'kind', 'object_id', 'deleted')[:limit]
+    )
+    has_more = len(entries) == limit
+
+    touched, tombstones = {}, {}
+    for _, kind, object_id, deleted in entries:
+        touched.setdefault(kind, set()).add(object_id)
+        if deleted:
+            tombstones.setdefault(kind, set()).add(object_id)
+        else:
+            tombstones.get(kind, set()).discard(object_id)
+
+    upserted, removed = {}, {}
+    for model, (key, projection) in TRACKED.items():
+        kind = model._meta.model_name
+        rows = projection(request).render_by_pk(touched[kind]) if kind in touched else {}
+        upserted[key] = [rows[pk] for pk in sorted(rows)]
+        # A row that is gone without a tombstone on this page gets its tombstone on a later page.
+        removed[key] = sorted(tombstones.get(kind, set()) - rows.keys())
+
+    return {
+        'cursor': entries[-1][0] if entries else cursor,
+        'has_more': has_more,
+        'upserted': upserted,
+        'deleted': removed,
+    }
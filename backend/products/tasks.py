@@ -0,0 +1,20 @@
+from .jobs import job
+from .models import Favorite, Product, Supplier
+
+
+@job('sync_favourite_flags')
+def sync_favourite_flags(product_id, supplier_id=None):
+    """Recompute the denormalized favourite flags after a favorite is added or removed."""
+    product = Product.objects.filter(pk=product_id).first()
+    if product is not None:
+        is_favorite = Favorite.objects.filter(product_id=product_id).exists()
+        if product.is_favorite != is_favorite:
+            product.is_favorite = is_favorite
+            product.save(update_fields=['is_favorite'])
+
+    supplier = Supplier.objects.filter(pk=supplier_id).first() if supplier_id else None
+    if supplier is not None:
+        is_favourite = Favorite.objects.filter(supplier_id=supplier_id).exists()
+        if supplier.is_favourite != is_favourite:
+            supplier.is_favourite = is_favourite
+            supplier.save(update_fields=['is_favourite'])
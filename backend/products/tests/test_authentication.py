@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from products.authentication import (
+    CachedBasicAuthentication, CachedJWTAuthentication, basic_credentials_cache, user_cache,
+)
+from products.cache import bump_version
+
+
+class AuthenticationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        basic_credentials_cache.clear()
+        self.user = get_user_model().objects.create_user('buyer', password='secret')
+        self.token = AccessToken.for_user(self.user)
+
+    def jwt_user(self):
+        return CachedJWTAuthentication().get_user(self.token)
+
+    def test_jwt_user_is_cached_between_requests(self):
+        self.assertEqual(self.jwt_user().pk, self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.jwt_user()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_cached_user_is_a_copy(self):
+        self.jwt_user().first_name = 'changed'
+        self.assertEqual(self.jwt_user().first_name, '')
+
+    def test_deactivation_evicts_the_user(self):
+        self.jwt_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.jwt_user()
+
+    def test_deleted_user_is_rejected(self):
+        self.jwt_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.jwt_user()
+
+    def test_eviction_on_another_worker_reaches_this_one(self):
+        self.jwt_user()
+        # The row changes without this process's signal handlers running; only
+        # the shared version moves, as it would when another worker saves it.
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.jwt_user()
+        bump_version(f'user:{self.user.pk}')
+        with self.assertRaises(AuthenticationFailed):
+            self.jwt_user()
+
+    def test_basic_credentials_are_cached(self):
+        auth = CachedBasicAuthentication()
+        user, _ = auth.authenticate_credentials('buyer', 'secret')
+        self.assertEqual(user.pk, self.user.pk)
+        with self.assertNumQueries(0):
+            user, _ = auth.authenticate_credentials('buyer', 'secret')
+        self.assertEqual(user.pk, self.user.pk)
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials('buyer', 'wrong')
+
+    def test_password_change_invalidates_basic_credentials(self):
+        auth = CachedBasicAuthentication()
+        auth.authenticate_credentials('buyer', 'secret')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('changed')
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials('buyer', 'secret')
+        user, _ = auth.authenticate_credentials('buyer', 'changed')
+        self.assertEqual(user.pk, self.user.pk)
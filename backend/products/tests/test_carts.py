@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from products.carts import price_cart
+from products.models import Cart, CartItem, Category, Product, Supplier, SupplierPrice
+
+
+class CartSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('buyer')
+        self.client.force_login(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        self.category = Category.objects.create(name="Meat")
+        self.suppliers = [
+            Supplier.objects.create(name=f"Farm {n}", rating=5, city='A', contact_number='0') for n in range(3)
+        ]
+
+    def product(self, price_retail=None, offers=()):
+        product = Product.objects.create(
+            name="Beef", article="B", city='A', description='', category=self.category, characteristics={},
+            price_retail=price_retail,
+        )
+        for supplier, price in offers:
+            SupplierPrice.objects.create(
+                supplier=self.suppliers[supplier], product=product, price=Decimal(price), delivery_time='1d'
+            )
+        return product
+
+    def add(self, product, quantity):
+        return CartItem.objects.create(cart=self.cart, product=product, quantity=quantity)
+
+    def test_cheapest_offer_wins_and_ties_go_to_the_oldest(self):
+        product = self.product(Decimal('99'), offers=[(0, '7.00'), (1, '5.00'), (2, '5.00')])
+        self.add(product, 2)
+        line = price_cart(self.cart).lines[0]
+        self.assertEqual(line.supplier_price.supplier, self.suppliers[1])
+        self.assertEqual((line.unit_price, line.line_total), (Decimal('5.00'), Decimal('10.00')))
+
+    def test_retail_fallback_and_unpriced_lines(self):
+        self.add(self.product(offers=[(0, '3.50')]), 2)
+        self.add(self.product(Decimal('4.25')), 3)
+        self.add(self.product(), 5)
+        cart = price_cart(self.cart)
+        self.assertEqual([line.unit_price for line in cart.lines], [Decimal('3.50'), Decimal('4.25'), None])
+        self.assertIsNone(cart.lines[1].supplier_price)
+        self.assertIsNone(cart.lines[2].line_total)
+        self.assertEqual(cart.totals, {
+            'lines': 3, 'quantity': 10, 'unpriced_lines': 1, 'total': Decimal('7.00') + Decimal('12.75'),
+        })
+
+    def test_empty_and_missing_carts(self):
+        self.assertEqual(price_cart(self.cart).totals, {'lines': 0, 'quantity': 0, 'unpriced_lines': 0, 'total': 0})
+        self.assertEqual(price_cart(Cart(user=self.user)).lines, [])
+
+    def test_constant_query_count(self):
+        counts = []
+        for lines in (1, 10):
+            CartItem.objects.all().delete()
+            for _ in range(lines):
+                self.add(self.product(Decimal('2'), offers=[(0, '1.00'), (1, '1.50')]), 1)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(price_cart(self.cart).totals['lines'], lines)
+            counts.append(len(queries))
+        # Items with their products, and the offers with their suppliers.
+        self.assertEqual(counts, [2, 2])
+
+    def test_endpoint_is_cached_until_the_cart_changes(self):
+        product = self.product(Decimal('2.00'))
+        summary = self.client.get('/api/cart/summary/').json()
+        self.assertEqual(summary['totals']['lines'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/cart/add_to_cart/', {'product_id': product.pk})
+        self.assertEqual(response.status_code, 200)
+        summary = self.client.get('/api/cart/summary/').json()
+        self.assertEqual((summary['totals']['quantity'], summary['totals']['total']), (1, '2.00'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/cart/summary/').json(), summary)
+        self.assertFalse([query for query in queries if 'products_cartitem' in query['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/cart/remove_from_cart/', {'product_id': product.pk})
+        self.assertEqual(self.client.get('/api/cart/summary/').json()['totals']['lines'], 0)
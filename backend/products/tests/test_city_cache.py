@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from products.models import Category, Product, Supplier, SupplierPrice
+
+
+def names(response):
+    data = response.json()
+    rows = data['results'] if isinstance(data, dict) else data
+    return sorted(row['name'] for row in rows)
+
+
+class CityPartitionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Meat")
+        self.suppliers = {
+            city: Supplier.objects.create(name=f"Farm {city}", rating=5, city=city, contact_number='0')
+            for city in 'AB'
+        }
+        self.products = {
+            city: Product.objects.create(
+                name=f"Beef {city}", article=city, city=city, description='', category=self.category,
+                characteristics={},
+            )
+            for city in 'AB'
+        }
+
+    def products_in(self, city):
+        return names(self.client.get('/api/products/', {'city': city}))
+
+    def suppliers_in(self, city):
+        return names(self.client.get('/api/suppliers/', {'city': city}))
+
+    def test_lists_are_scoped_to_the_city(self):
+        self.assertEqual(self.products_in('A'), ["Beef A"])
+        self.assertEqual(self.suppliers_in('B'), ["Farm B"])
+
+    def test_write_in_one_city_keeps_the_other_cached(self):
+        self.assertEqual(self.products_in('A'), ["Beef A"])
+        self.assertEqual(self.products_in('B'), ["Beef B"])
+        # Changed behind the signals' back: B is only fresh if its list was re-read.
+        Product.objects.filter(pk=self.products['B'].pk).update(name="Stale B")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products['A'].name = "Lamb A"
+            self.products['A'].save()
+        self.assertEqual(self.products_in('A'), ["Lamb A"])
+        self.assertEqual(self.products_in('B'), ["Beef B"])
+
+    def test_product_moving_city_invalidates_both_cities(self):
+        self.assertEqual(self.products_in('A'), ["Beef A"])
+        self.assertEqual(self.products_in('B'), ["Beef B"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products['A'].city = 'B'
+            self.products['A'].save()
+        self.assertEqual(self.products_in('A'), [])
+        self.assertEqual(self.products_in('B'), ["Beef A", "Beef B"])
+
+    def test_supplier_moving_city_invalidates_both_cities(self):
+        self.assertEqual(self.suppliers_in('A'), ["Farm A"])
+        self.assertEqual(self.suppliers_in('B'), ["Farm B"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.suppliers['A'].city = 'B'
+            self.suppliers['A'].save()
+        self.assertEqual(self.suppliers_in('A'), [])
+        self.assertEqual(self.suppliers_in('B'), ["Farm A", "Farm B"])
+
+    def test_supplier_change_invalidates_the_cities_of_its_products(self):
+        SupplierPrice.objects.create(
+            supplier=self.suppliers['A'], product=self.products['B'], price=Decimal('5'), delivery_time='1d'
+        )
+        self.assertEqual(self.products_in('B'), ["Beef B"])
+        version = cache.get('version:catalogue-city:B')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.suppliers['A'].name = "Ranch A"
+            self.suppliers['A'].save()
+        self.assertGreater(cache.get('version:catalogue-city:B'), version)
+
+    def test_searches_are_not_cached(self):
+        self.assertEqual(self.products_in('A'), ["Beef A"])
+        Product.objects.filter(pk=self.products['A'].pk).update(name="Lamb A")
+        response = self.client.get('/api/products/', {'city': 'A', 'search': 'Lamb'})
+        self.assertEqual(names(response), ["Lamb A"])
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products import closure
+from products.models import Category, CategoryClosure, Product
+
+
+def links():
+    return set(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+class ClosureTests(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name="Root")
+        self.meat = Category.objects.create(name="Meat", parent=self.root)
+        self.beef = Category.objects.create(name="Beef", parent=self.meat)
+        self.other = Category.objects.create(name="Other")
+
+    def assert_matches_rebuild(self):
+        maintained = links()
+        closure.rebuild()
+        self.assertEqual(maintained, links())
+
+    def test_insert_links_every_ancestor(self):
+        self.assertEqual(
+            set(CategoryClosure.objects.filter(descendant=self.beef).values_list('ancestor_id', 'depth')),
+            {(self.beef.pk, 0), (self.meat.pk, 1), (self.root.pk, 2)},
+        )
+        self.assert_matches_rebuild()
+
+    def test_move_reattaches_the_subtree(self):
+        self.meat.parent = self.other
+        self.meat.save()
+        self.assertEqual(set(closure.subtree(self.other.pk).values_list('descendant_id', flat=True)),
+                         {self.other.pk, self.meat.pk, self.beef.pk})
+        self.assertEqual(set(closure.subtree(self.root.pk).values_list('descendant_id', flat=True)), {self.root.pk})
+        self.assert_matches_rebuild()
+
+    def test_move_to_root_and_delete_detach_children(self):
+        self.meat.parent = None
+        self.meat.save()
+        self.assert_matches_rebuild()
+        self.meat.delete()
+        self.assertTrue(CategoryClosure.objects.filter(ancestor=self.beef, descendant=self.beef).exists())
+        self.assertEqual(CategoryClosure.objects.filter(descendant=self.beef).count(), 1)
+        self.assert_matches_rebuild()
+
+    def test_failed_move_leaves_the_links_untouched(self):
+        before = links()
+        with mock.patch.object(CategoryClosure.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                closure.move(self.meat.pk, self.other.pk)
+        self.assertEqual(links(), before)
+
+    def test_cycles_are_rejected(self):
+        self.root.parent = self.beef
+        with self.assertRaises(ValueError):
+            self.root.save()
+        response = APIClient().patch(f'/api/categories/{self.root.pk}/', {'parent': self.beef.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_category_filter_includes_descendants(self):
+        product = Product.objects.create(
+            name="Steak", article="S1", city='A', description='', category=self.beef, characteristics={}
+        )
+        response = APIClient().get(f'/api/products/?category={self.root.pk}')
+        self.assertEqual([row['id'] for row in response.json()['results']], [product.pk])
+        response = APIClient().get(f'/api/products/?category={self.other.pk}')
+        self.assertEqual(response.json()['results'], [])
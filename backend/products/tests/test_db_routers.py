@@ -0,0 +1,67 @@
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from products.middleware import ReplicaRoutingMiddleware
+from products.models import Category, Job
+
+
+class CatalogueView:
+    read_replica = True
+
+
+def catalogue_view(request):
+    return HttpResponse()
+
+
+catalogue_view.cls = CatalogueView
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(TestCase):
+    def request(self, view, method='get'):
+        """Run ``view`` inside the middleware, as a request to a catalogue view would."""
+        seen = []
+
+        def get_response(request):
+            middleware.process_view(request, catalogue_view, (), {})
+            seen.extend(view())
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(getattr(RequestFactory(), method)('/'))
+        return seen
+
+    def test_one_replica_per_request(self):
+        replicas = set()
+        for _ in range(30):
+            seen = self.request(lambda: [router.db_for_read(Category) for _ in range(10)])
+            self.assertEqual(len(set(seen)), 1)
+            replicas.update(seen)
+        # Requests are spread over the replicas.
+        self.assertEqual(replicas, {'replica1', 'replica2'})
+
+    def test_only_catalogue_models_use_the_replica(self):
+        seen = self.request(lambda: [router.db_for_read(Category), router.db_for_read(Job)])
+        self.assertIn(seen[0], ('replica1', 'replica2'))
+        self.assertEqual(seen[1], 'default')
+
+    def test_writes_pin_the_rest_of_the_request_to_the_primary(self):
+        def view():
+            before = router.db_for_read(Category)
+            Category.objects.create(name="Meat")
+            return [before, router.db_for_read(Category)]
+
+        before, after = self.request(view)
+        self.assertIn(before, ('replica1', 'replica2'))
+        self.assertEqual(after, 'default')
+
+    def test_unsafe_requests_and_other_requests_stay_on_the_primary(self):
+        self.assertEqual(self.request(lambda: [router.db_for_read(Category)], method='post'), ['default'])
+        self.request(lambda: [])
+        # Nothing leaks out of a request.
+        self.assertEqual(router.db_for_read(Category), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.request(lambda: [router.db_for_read(Category)]), ['default'])
@@ -0,0 +1,35 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from products import events
+
+
+class PostgresBrokerTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = events.PostgresBroker()
+        # The listener needs PostgreSQL.
+        patcher = mock.patch.object(events.PostgresBroker, '_listen')
+        self.listen = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_publish_notifies_the_channel(self):
+        cursor = mock.MagicMock()
+        with mock.patch.object(events, 'connections') as connections:
+            connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+            self.broker.publish('user:1', {'id': 1, 'type': 'delivery.status'})
+        sql, (channel, payload) = cursor.execute.call_args.args
+        self.assertEqual((sql, channel), ('SELECT pg_notify(%s, %s)', 'status_events'))
+        self.assertEqual(json.loads(payload), {'channel': 'user:1', 'message': {'id': 1, 'type': 'delivery.status'}})
+
+    async def test_notifications_reach_local_streams_of_the_channel(self):
+        mine, other = self.broker.subscribe('user:1'), self.broker.subscribe('user:2')
+        self.broker._listener.join()
+        self.listen.assert_called_once()
+        self.broker.deliver(json.dumps({'channel': 'user:1', 'message': {'id': 7}}))
+        self.assertEqual(await mine.get(), {'id': 7})
+        self.assertTrue(other.queue.empty())
+        mine.close()
+        other.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from products.models import Category, Supplier
+
+
+class HomeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Meat")
+        suppliers = Supplier.objects.bulk_create([
+            Supplier(name=f"Farm {n}", rating=n % 5, city='A', contact_number='0') for n in range(15)
+        ])
+        self.category.suppliers.add(*suppliers)
+
+    def test_nested_categories_count_every_supplier(self):
+        response = self.client.get('/api/home/').json()
+        self.assertEqual(response['categories'][0]['suppliers_count'], 15)
+        # Only 10 suppliers are featured; their categories still count all 15.
+        self.assertEqual(len(response['suppliers']), 10)
+        for supplier in response['suppliers']:
+            self.assertEqual([category['suppliers_count'] for category in supplier['categories']], [15])
+
+    def test_sections_are_invalidated_after_the_commit(self):
+        self.client.get('/api/home/')
+        version = cache.get('version:home')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Lamb"
+            self.category.save()
+            self.assertEqual(cache.get('version:home'), version)
+        self.assertGreater(cache.get('version:home'), version)
+        self.assertEqual(self.client.get('/api/home/').json()['categories'][0]['name'], "Lamb")
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from products import jobs
+from products.models import Job
+
+
+calls = []
+
+
+@jobs.job('test_flaky', max_attempts=2)
+def flaky(fail=False):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError("flaky")
+
+
+@override_settings(JOBS_EAGER=False, JOBS_RETRY_BACKOFF=10, JOBS_VISIBILITY_TIMEOUT=60)
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        # Failures are logged as warnings; keep the test output quiet.
+        patcher = mock.patch.object(jobs, 'logger')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def claim_one(self):
+        claimed = jobs.claim('test-worker', limit=1)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_enqueue_dedupes_queued_jobs(self):
+        first = jobs.enqueue('test_flaky', dedupe_key='key')
+        self.assertIsNotNone(first)
+        self.assertIsNone(jobs.enqueue('test_flaky', dedupe_key='key'))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        jobs.enqueue('test_flaky', {'fail': True})
+        job = self.claim_one()
+        self.assertFalse(jobs.run(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, jobs.QUEUED)
+        self.assertGreater(job.run_at, now() + timedelta(seconds=5))
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=now())
+        self.assertFalse(jobs.run(self.claim_one()))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (jobs.FAILED, 2))
+        self.assertEqual(calls, [True, True])
+
+    def test_retry_is_superseded_by_a_queued_duplicate(self):
+        jobs.enqueue('test_flaky', {'fail': True}, dedupe_key='key')
+        job = self.claim_one()
+        # Enqueued while the first one runs, as the favourite flags are.
+        duplicate = jobs.enqueue('test_flaky', dedupe_key='key')
+        self.assertIsNotNone(duplicate)
+
+        self.assertFalse(jobs.run(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, jobs.DONE)
+        self.assertIn('Superseded', job.last_error)
+        self.assertEqual(Job.objects.get(pk=duplicate.pk).status, jobs.QUEUED)
+
+    def test_reap_requeues_stale_jobs(self):
+        jobs.enqueue('test_flaky', dedupe_key='key')
+        job = self.claim_one()
+        Job.objects.filter(pk=job.pk).update(started_at=now() - timedelta(minutes=5))
+        self.assertEqual(jobs.reap(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (jobs.QUEUED, ''))
+
+    def test_reap_supersedes_stale_jobs_with_a_queued_duplicate(self):
+        jobs.enqueue('test_flaky', dedupe_key='key')
+        job = self.claim_one()
+        duplicate = jobs.enqueue('test_flaky', dedupe_key='key')
+        Job.objects.filter(pk=job.pk).update(started_at=now() - timedelta(minutes=5))
+
+        self.assertEqual(jobs.reap(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, jobs.DONE)
+        self.assertEqual(Job.objects.get(pk=duplicate.pk).status, jobs.QUEUED)
+
+    def test_reap_fails_stale_jobs_out_of_attempts(self):
+        jobs.enqueue('test_flaky')
+        job = self.claim_one()
+        Job.objects.filter(pk=job.pk).update(attempts=2, started_at=now() - timedelta(minutes=5))
+        self.assertEqual(jobs.reap(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, jobs.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_worker_survives_database_errors(self):
+        from products.management.commands import run_jobs
+
+        stop = mock.Mock()
+        stop.is_set.side_effect = [False, False, True]
+        with mock.patch.object(run_jobs.jobs, 'claim', side_effect=[RuntimeError("database gone"), []]), \
+                mock.patch.object(run_jobs, 'connections'), self.assertLogs(run_jobs.logger, 'ERROR'):
+            run_jobs.work(1, 0, stop)
+        self.assertEqual(stop.wait.call_count, 2)
@@ -0,0 +1,98 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from products import loadtest
+
+
+class ParseMixTests(SimpleTestCase):
+    def test_weights(self):
+        self.assertEqual(
+            loadtest.parse_mix(' browse=6, search=0.5,order'), {'browse': 6.0, 'search': 0.5, 'order': 1.0}
+        )
+
+    def test_default_mix_parses(self):
+        self.assertEqual(set(loadtest.parse_mix(loadtest.DEFAULT_MIX)), set(loadtest.JOURNEYS))
+
+    def test_errors(self):
+        for mix in ('checkout=1', 'browse=many', 'browse=0,search=0'):
+            with self.subTest(mix=mix), self.assertRaises(loadtest.LoadTestError):
+                loadtest.parse_mix(mix)
+
+
+class SummarizeTests(SimpleTestCase):
+    def test_nearest_rank_percentiles(self):
+        latencies = [n / 1000 for n in range(1, 101)]
+        summary = loadtest.Stats.summarize(latencies, errors=5, throttled=2, elapsed=10)
+        self.assertEqual(
+            summary,
+            {
+                'requests': 100, 'rps': 10.0, 'error_rate': 0.05, 'throttled': 2,
+                'p50_ms': 50.0, 'p90_ms': 90.0, 'p95_ms': 95.0, 'p99_ms': 99.0, 'max_ms': 100.0,
+            },
+        )
+
+    def test_ranks_round_up(self):
+        # Nearest rank of p50 in 3 samples is the 2nd, of p90 the 3rd.
+        summary = loadtest.Stats.summarize([0.001, 0.002, 0.003], 0, 0, 1)
+        self.assertEqual((summary['p50_ms'], summary['p90_ms']), (2.0, 3.0))
+        summary = loadtest.Stats.summarize([0.004], 0, 0, 1)
+        self.assertEqual((summary['p50_ms'], summary['p99_ms'], summary['max_ms']), (4.0, 4.0, 4.0))
+
+    def test_no_requests(self):
+        summary = loadtest.Stats.summarize([], 0, 0, 0)
+        self.assertEqual((summary['requests'], summary['rps'], summary['error_rate']), (0, 0, 0))
+        self.assertIsNone(summary['p50_ms'])
+        self.assertIsNone(summary['max_ms'])
+
+    def test_summary_counts_throttling_apart_from_errors(self):
+        stats = loadtest.Stats()
+        stats.record('home', 0.01, 200, True)
+        stats.record('home', 0.02, 429, False)
+        stats.record('cart', 0.03, 500, False)
+        summary = stats.summary(elapsed=1)
+        self.assertEqual(summary['home']['statuses'], {'200': 1, '429': 1})
+        self.assertEqual((summary['home']['throttled'], summary['home']['error_rate']), (1, 0))
+        self.assertEqual((summary['total']['requests'], summary['total']['throttled']), (3, 1))
+        self.assertEqual(summary['total']['max_ms'], 30.0)
+
+
+class ReadResponseTests(SimpleTestCase):
+    async def read(self, data, eof=False):
+        client = loadtest.HttpClient('localhost', 80)
+        client.reader = asyncio.StreamReader()
+        client.reader.feed_data(data)
+        if eof:
+            client.reader.feed_eof()
+        response = await client.read_response()
+        return response, client
+
+    async def test_content_length_body_keeps_the_connection(self):
+        (status, body), client = await self.read(
+            b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\nContent-Type: text/plain\r\n\r\nhello'
+            b'HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n'
+        )
+        self.assertEqual((status, body), (200, b'hello'))
+        self.assertIsNotNone(client.reader)
+        # The next response on the connection starts right after the body.
+        self.assertEqual(await client.read_response(), (204, b''))
+
+    async def test_chunked_body(self):
+        (status, body), client = await self.read(
+            b'HTTP/1.1 201 Created\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'4\r\n{"id\r\n6;name=value\r\n": 12}\r\n0\r\n\r\n'
+        )
+        self.assertEqual((status, body), (201, b'{"id": 12}'))
+        self.assertIsNotNone(client.reader)
+
+    async def test_connection_close(self):
+        (status, body), client = await self.read(
+            b'HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 2\r\n\r\n{}'
+        )
+        self.assertEqual((status, body), (200, b'{}'))
+        self.assertIsNone(client.reader)
+
+    async def test_body_until_eof(self):
+        (status, body), client = await self.read(b'HTTP/1.0 404 Not Found\r\n\r\nmissing', eof=True)
+        self.assertEqual((status, body), (404, b'missing'))
+        self.assertIsNone(client.reader)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from products.media import parse_range, serve_media
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+        # The end is clamped to the last byte.
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+
+    def test_whole_file_for_malformed_or_multiple_ranges(self):
+        for header in ('bytes=-', 'bytes=a-b', 'items=0-9', 'bytes=0-1,5-6', ''):
+            self.assertIsNone(parse_range(header, 100), header)
+
+    def test_unsatisfiable(self):
+        for header, size in (('bytes=100-', 100), ('bytes=9-5', 100), ('bytes=0-', 0)):
+            with self.assertRaises(ValueError):
+                parse_range(header, size)
+
+
+class ServeMediaTests(SimpleTestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        os.makedirs(os.path.join(root, 'banners'))
+        with open(os.path.join(root, 'banners', 'a.png'), 'wb') as file:
+            file.write(self.content)
+        with open(os.path.join(root, 'secret.txt'), 'w') as file:
+            file.write('secret')
+        self.enterContext(override_settings(MEDIA_ROOT=root, MEDIA_SERVE='django'))
+        self.factory = RequestFactory()
+
+    def get(self, path='banners/a.png', method='get', **headers):
+        return serve_media(getattr(self.factory, method)('/' + path, headers=headers), path)
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), self.content)
+
+    def test_range(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), self.content[10:20])
+
+        response = self.get(Range='bytes=-4')
+        self.assertEqual(self.body(response), self.content[-4:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.get(Range='bytes=0-9', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), len(self.content))
+
+        etag = self.get()['ETag']
+        response = self.get(Range='bytes=0-9', **{'If-Range': etag})
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    def test_conditional_requests(self):
+        first = self.get()
+        first.close()
+        response = self.get(**{'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = self.get(**{'If-Modified-Since': first['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_head(self):
+        response = self.get(method='head')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response.content, b'')
+
+    def test_missing_files_and_paths_outside_upload_directories(self):
+        for path in ('banners/missing.png', 'banners', 'secret.txt', 'banners/../secret.txt', '../etc/passwd'):
+            with self.assertRaises(Http404, msg=path):
+                self.get(path)
+
+    def test_web_server_offload(self):
+        with override_settings(MEDIA_SERVE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/banners/a.png')
+        self.assertEqual(response.content, b'')
+
+        with override_settings(MEDIA_SERVE='x-sendfile'):
+            response = self.get()
+        self.assertTrue(response['X-Sendfile'].endswith(os.path.join('banners', 'a.png')))
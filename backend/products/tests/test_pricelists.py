@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from products.models import CatalogueChange, Category, PriceHistory, Product, Supplier, SupplierPrice
+from products.pricelists import apply_price_list
+
+
+class PriceListTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Meat")
+        self.supplier = Supplier.objects.create(name="Farm", rating=5, city='A', contact_number='0')
+        self.products = [
+            Product.objects.create(
+                name=f"Product {n}", article=f"P{n}", city='A', description='', category=category,
+                characteristics={},
+            )
+            for n in range(25)
+        ]
+
+    def offer(self, products):
+        for product in products:
+            SupplierPrice.objects.create(supplier=self.supplier, product=product, price=Decimal('5'), delivery_time='1d')
+
+    def test_updates_creates_and_history(self):
+        self.offer(self.products[:2])
+        result = apply_price_list(self.supplier, [
+            {'product': self.products[0].pk, 'price': Decimal('6')},
+            {'product': self.products[1].pk, 'price': Decimal('5')},
+            {'product': self.products[2].pk, 'price': Decimal('7'), 'delivery_time': '2d'},
+        ])
+        self.assertEqual(result, {'created': 1, 'updated': 1, 'deleted': 0, 'duplicates_deleted': 0, 'unchanged': 1})
+        self.assertTrue(PriceHistory.objects.filter(
+            product=self.products[0], price=Decimal('6'), previous_price=Decimal('5')
+        ).exists())
+
+    def test_full_list_removal_is_bulk(self):
+        counts = []
+        for removed in (2, 20):
+            SupplierPrice.objects.all().delete()
+            PriceHistory.objects.all().delete()
+            self.offer(self.products[:removed + 1])
+            with CaptureQueriesContext(connection) as queries:
+                result = apply_price_list(self.supplier, [{'product': self.products[0].pk, 'price': Decimal('5')}], full=True)
+            self.assertEqual(result['deleted'], removed)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+        removed_pks = set(CatalogueChange.objects.filter(kind='supplierprice', deleted=True).values_list('object_id', flat=True))
+        self.assertEqual(SupplierPrice.objects.filter(pk__in=removed_pks).count(), 0)
+        self.assertEqual(
+            PriceHistory.objects.filter(price__isnull=True, previous_price=Decimal('5')).count(), 20
+        )
+
+    def test_duplicate_rows_of_listed_products_are_deleted(self):
+        self.offer(self.products[:2])
+        self.offer(self.products[:1])
+        oldest = SupplierPrice.objects.filter(product=self.products[0]).earliest('pk')
+        result = apply_price_list(self.supplier, [{'product': self.products[0].pk, 'price': Decimal('6')}])
+        self.assertEqual((result['updated'], result['deleted'], result['duplicates_deleted']), (1, 0, 1))
+        self.assertEqual(
+            list(SupplierPrice.objects.filter(product=self.products[0]).values_list('pk', 'price')),
+            [(oldest.pk, Decimal('6'))],
+        )
+        # Not listed, not a full list: kept.
+        self.assertTrue(SupplierPrice.objects.filter(product=self.products[1]).exists())
+        # The product is still offered, so no removal is recorded in the history.
+        self.assertFalse(PriceHistory.objects.filter(price__isnull=True).exists())
+
+    def test_price_history_of_unknown_supplier(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get(f'/api/suppliers/{self.supplier.pk}/price-history/').status_code, 200)
+        self.assertEqual(self.client.get('/api/suppliers/999999/price-history/').status_code, 404)
+        self.assertEqual(self.client.get('/api/suppliers/abc/price-history/').status_code, 404)
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.management.commands.bench_projections import Command as BenchProjections
+from products.models import Product
+from products.projections import OrderProjection, ProductProjection, ProductsBySupplierProjection
+from products.serializers import ProductsBySupplierSerializer
+from products.views import OrderViewSet, ProductViewSet
+
+
+class ProjectionTests(TestCase):
+    """Projections replace serializers on hot lists, so their JSON must be byte for byte the same."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.supplier = BenchProjections().seed(60)
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get('/api/products/'))
+        self.request.user = self.user
+
+    def queryset(self, view_class):
+        return BenchProjections().view(view_class, self.request).get_queryset()
+
+    def assert_same_json(self, serialized, projected):
+        self.assertTrue(serialized)
+        self.assertEqual(JSONRenderer().render(projected), JSONRenderer().render(serialized))
+
+    def test_products(self):
+        view = BenchProjections().view(ProductViewSet, self.request)
+        self.assert_same_json(
+            view.get_serializer(self.queryset(ProductViewSet), many=True).data,
+            ProductProjection(self.request).render(self.queryset(ProductViewSet)),
+        )
+
+    def test_orders(self):
+        view = BenchProjections().view(OrderViewSet, self.request)
+        self.assert_same_json(
+            view.get_serializer(self.queryset(OrderViewSet), many=True).data,
+            OrderProjection(self.request).render(self.queryset(OrderViewSet)),
+        )
+
+    def test_products_by_supplier(self):
+        products = Product.objects.filter(suppliers__id=self.supplier.pk)
+        self.assert_same_json(
+            ProductsBySupplierSerializer(
+                products, many=True, context={'request': self.request, 'supplier_id': self.supplier.pk}
+            ).data,
+            ProductsBySupplierProjection(self.request, self.supplier.pk).render(products),
+        )
+
+    def test_list_endpoint_matches_the_serializer(self):
+        self.client.force_login(self.user)
+        full = self.client.get('/api/products/').json()['results']
+        # ?fields= goes through the serializer.
+        serialized = self.client.get('/api/products/', {'fields': ','.join(full[0])}).json()['results']
+        self.assertEqual(serialized, full)
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from products.management.commands.check_query_budgets import ENDPOINTS, seed
+from products.queries import QueryBudgetExceeded
+from products.views import CartViewSet
+
+
+@override_settings(QUERY_INSPECTION=True, QUERY_BUDGETS_ENFORCE=True)
+class QueryBudgetTests(TestCase):
+    """
+    The hot endpoints against 20 rows per list. A view over its ``query_budget``
+    raises ``QueryBudgetExceeded`` from the middleware, which fails the test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.ids = seed(20)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_endpoints_stay_within_budget_without_n_plus_one(self):
+        for endpoint in ENDPOINTS:
+            path = endpoint.format(**self.ids)
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertLess(response.status_code, 500)
+                self.assertEqual(response.query_report['repeated'], [])
+
+    def test_exceeding_a_budget_fails_the_request(self):
+        with mock.patch.object(CartViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/cart/')
@@ -0,0 +1,117 @@
+import functools
+import math
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products import recommendations
+from products.models import Category, Favorite, Order, Product, ProductNeighbor, Supplier
+
+
+class SimilarProductsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Meat")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {n}", article=f"P{n}", city='A', description='', category=category,
+                characteristics={},
+            )
+            for n in range(3)
+        ]
+        ProductNeighbor.objects.create(product=self.products[0], neighbor=self.products[2], rank=0, score=0.9)
+        ProductNeighbor.objects.create(product=self.products[0], neighbor=self.products[1], rank=1, score=0.5)
+
+    def test_neighbors_in_rank_order(self):
+        response = APIClient().get(f'/api/products/{self.products[0].pk}/similar/')
+        self.assertEqual([row['product']['id'] for row in response.json()],
+                         [self.products[2].pk, self.products[1].pk])
+
+    def test_unknown_or_malformed_product_is_not_found(self):
+        self.assertEqual(APIClient().get('/api/products/abc/similar/').status_code, 404)
+        self.assertEqual(APIClient().get('/api/products/999999/similar/').status_code, 404)
+        self.assertEqual(APIClient().get(f'/api/products/{self.products[1].pk}/similar/').json(), [])
+
+
+class NeighborComputationTests(TestCase):
+    def naive_neighbors(self, baskets, top_n):
+        """Pairwise cosine similarity with plain loops over ``{user: {product: weight}}``."""
+        dots, norms = {}, {}
+        for basket in baskets.values():
+            for a, weight_a in basket.items():
+                norms[a] = norms.get(a, 0) + weight_a ** 2
+                for b, weight_b in basket.items():
+                    if a != b:
+                        dots[a, b] = dots.get((a, b), 0) + weight_a * weight_b
+        neighbors = {}
+        for (a, b), dot in dots.items():
+            neighbors.setdefault(a, []).append((-dot / math.sqrt(norms[a] * norms[b]), b))
+        return {a: [(b, -score) for score, b in sorted(scored)[:top_n]] for a, scored in neighbors.items()}
+
+    def test_matches_naive_pairwise_counts(self):
+        rng = np.random.default_rng(0)
+        baskets = {}
+        for user in range(60):
+            products = rng.choice(40, size=rng.integers(1, 12), replace=False)
+            baskets[user] = {int(product): float(rng.random()) + 0.1 for product in products}
+        users, products, weights = (np.array(column) for column in zip(*(
+            (user, product, weight) for user, basket in baskets.items() for product, weight in basket.items()
+        )))
+
+        # A small chunk size so the baskets are split over many chunks.
+        with mock.patch.object(recommendations, 'co_occurrence', functools.partial(
+            recommendations.co_occurrence, chunk_pairs=50
+        )):
+            product, neighbor, rank, score = recommendations.top_neighbors(users, products, weights, top_n=5)
+
+        computed = {}
+        for p, n, r, s in zip(product.tolist(), neighbor.tolist(), rank.tolist(), score.tolist()):
+            self.assertEqual(r, len(computed.setdefault(p, [])))
+            computed[p].append((n, s))
+        expected = self.naive_neighbors(baskets, top_n=5)
+        self.assertEqual(computed.keys(), expected.keys())
+        for p, rows in expected.items():
+            self.assertEqual([n for n, _ in computed[p]], [n for n, _ in rows])
+            np.testing.assert_allclose([s for _, s in computed[p]], [s for _, s in rows])
+
+    def test_baskets_are_capped_to_the_most_weighted_products(self):
+        users = np.array([1, 1, 1, 2, 1])
+        products = np.array([10, 11, 12, 10, 13])
+        weights = np.array([0.1, 0.9, 0.5, 0.3, 0.7])
+        users, products, weights = recommendations.cap_baskets(users, products, weights, max_basket=2)
+        self.assertEqual(list(zip(users.tolist(), products.tolist())), [(1, 11), (1, 13), (2, 10)])
+
+    def test_build_without_interactions(self):
+        category = Category.objects.create(name="Meat")
+        product = Product.objects.create(
+            name="Beef", article="B", city='A', description='', category=category, characteristics={},
+        )
+        ProductNeighbor.objects.create(product=product, neighbor=product, rank=0, score=1)
+        self.assertEqual(recommendations.build(), 0)
+        self.assertFalse(ProductNeighbor.objects.exists())
+
+    def test_build_from_orders_and_favorites(self):
+        category = Category.objects.create(name="Meat")
+        supplier = Supplier.objects.create(name="Farm", rating=5, city='A', contact_number='0')
+        products = [
+            Product.objects.create(
+                name=f"Product {n}", article=f"P{n}", city='A', description='', category=category,
+                characteristics={},
+            )
+            for n in range(4)
+        ]
+        for n in range(3):
+            user = get_user_model().objects.create_user(f'user{n}')
+            for product in (products[0], products[1 if n else 2]):
+                Order.objects.create(user=user, supplier_details=supplier, product=product, quantity=1, total_cost=1)
+            Favorite.objects.create(user=user, product=products[3])
+
+        self.assertEqual(recommendations.build(top_n=2, max_basket=2), 4)
+        # products[3], a favourite, is the least weighted and is capped out of every basket.
+        self.assertEqual(
+            list(ProductNeighbor.objects.filter(product=products[0]).order_by('rank').values_list('neighbor', flat=True)),
+            [products[1].pk, products[2].pk],
+        )
+        self.assertFalse(ProductNeighbor.objects.filter(product=products[3]).exists())
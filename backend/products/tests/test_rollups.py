@@ -0,0 +1,118 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils.timezone import now
+
+from products import rollups
+from products.models import Application, Category, Order, Product, Supplier, SupplierSalesDaily
+
+
+def rollup_rows():
+    """Rollup rows by key, leaving out rows whose totals all went back to zero."""
+    rows = {}
+    for row in SupplierSalesDaily.objects.values_list(
+        'supplier_id', 'product_id', 'day', 'orders_count', 'units', 'revenue', 'completed_units', 'completed_revenue'
+    ):
+        if any(row[3:]):
+            rows[row[:3]] = row[3:]
+    return rows
+
+
+class RollupFixture(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('buyer')
+        category = Category.objects.create(name="Meat")
+        self.suppliers = [
+            Supplier.objects.create(name=f"Farm {n}", rating=5, city='A', contact_number='0') for n in range(2)
+        ]
+        self.products = [
+            Product.objects.create(
+                name=f"Product {n}", article=f"P{n}", city='A', description='', category=category,
+                characteristics={}, price_retail=Decimal('2.50'),
+            )
+            for n in range(2)
+        ]
+
+    def order(self, supplier=0, product=0, quantity=1, **fields):
+        return Order.objects.create(
+            user=self.user, supplier_details=self.suppliers[supplier], product=self.products[product],
+            quantity=quantity, **fields
+        )
+
+    def application(self, *orders, status='pending'):
+        application = Application.objects.create(user=self.user, status=status)
+        application.orders.add(*orders)
+        return application
+
+    def assert_matches_rebuild(self):
+        maintained = rollup_rows()
+        rollups.rebuild()
+        self.assertEqual(maintained, rollup_rows())
+
+
+class RollupTests(RollupFixture):
+    def test_order_create_update_delete(self):
+        first = self.order(quantity=2)
+        self.order(supplier=1, product=1, created_at=now() - timedelta(days=3))
+        self.assert_matches_rebuild()
+        self.assertEqual(len(rollup_rows()), 2)
+
+        first.quantity, first.total_cost = 5, Decimal('12.50')
+        first.save()
+        self.assert_matches_rebuild()
+
+        # Moving an order to another key moves its contribution.
+        first.product, first.created_at = self.products[1], now() - timedelta(days=1)
+        first.save()
+        self.assert_matches_rebuild()
+
+        first.delete()
+        self.assert_matches_rebuild()
+
+    def test_completion_toggles(self):
+        orders = [self.order(quantity=n + 1) for n in range(3)]
+        application = self.application(*orders)
+        self.assert_matches_rebuild()
+
+        for status in ('completed', 'delivering', 'completed'):
+            application.status = status
+            application.save()
+            self.assert_matches_rebuild()
+        self.assertEqual(next(iter(rollup_rows().values()))[3], 6)
+
+    def test_m2m_changes_of_completed_applications(self):
+        orders = [self.order(), self.order(quantity=2), self.order(product=1)]
+        application = self.application(orders[0], status='completed')
+        application.orders.add(orders[1], orders[2])
+        self.assert_matches_rebuild()
+
+        application.orders.remove(orders[0])
+        self.assert_matches_rebuild()
+
+        # From the order's side, with an order in two completed applications.
+        other = self.application(status='completed')
+        orders[1].applications.add(other)
+        self.assert_matches_rebuild()
+        orders[1].applications.remove(application)
+        self.assert_matches_rebuild()
+        orders[1].applications.clear()
+        self.assert_matches_rebuild()
+
+        application.orders.clear()
+        self.assert_matches_rebuild()
+
+    def test_cascades(self):
+        orders = [self.order(), self.order(supplier=1), self.order(supplier=1, product=1)]
+        self.application(*orders, status='completed')
+        self.application(orders[1], status='completed')
+
+        self.products[1].delete()
+        self.assert_matches_rebuild()
+        self.suppliers[0].delete()
+        self.assert_matches_rebuild()
+        # The user's orders and applications go in one cascade.
+        self.user.delete()
+        self.assert_matches_rebuild()
+        self.assertEqual(rollup_rows(), {})
@@ -0,0 +1,93 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from products.models import CatalogueChange, Category, Product, Supplier, SupplierPrice
+
+
+class CatalogueSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Meat")
+        self.supplier = Supplier.objects.create(name="Farm", rating=5, city='A', contact_number='0')
+        self.product = Product.objects.create(
+            name="Beef", article="B1", city='A', description='', category=self.category, characteristics={},
+        )
+        self.price = SupplierPrice.objects.create(
+            supplier=self.supplier, product=self.product, price=Decimal('5.50'), delivery_time='1d'
+        )
+
+    def sync(self, cursor=0, limit=500):
+        response = self.client.get('/api/sync/', {'cursor': cursor, 'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_first_sync_returns_every_row(self):
+        page = self.sync()
+        self.assertFalse(page['has_more'])
+        self.assertEqual([row['id'] for row in page['upserted']['products']], [self.product.pk])
+        self.assertEqual(page['upserted']['supplier_prices'][0]['price'], '5.50')
+        self.assertEqual(page['upserted']['suppliers'][0]['categories'], [])
+        self.assertEqual(page['cursor'], CatalogueChange.objects.latest('position').position)
+
+    def test_deletes_send_tombstones(self):
+        cursor = self.sync()['cursor']
+        price_pk, product_pk = self.price.pk, self.product.pk
+        self.product.delete()
+
+        page = self.sync(cursor)
+        self.assertEqual(page['deleted']['products'], [product_pk])
+        # The cascade removed the supplier price too.
+        self.assertEqual(page['deleted']['supplier_prices'], [price_pk])
+        self.assertEqual(page['upserted']['products'], [])
+        self.assertEqual(self.sync(page['cursor'])['deleted']['products'], [])
+
+    def test_recreated_objects_are_upserted_not_deleted(self):
+        cursor = self.sync()['cursor']
+        CatalogueChange.objects.create(kind='banner', object_id=999, deleted=True)
+        self.category.name = "Lamb"
+        self.category.save()
+
+        page = self.sync(cursor)
+        self.assertEqual(page['deleted']['banners'], [999])
+        self.assertEqual([row['name'] for row in page['upserted']['categories']], ["Lamb"])
+        self.assertEqual(page['deleted']['categories'], [])
+
+    def test_pages_follow_the_cursor(self):
+        seen, cursor, has_more = set(), 0, True
+        while has_more:
+            page = self.sync(cursor, limit=1)
+            seen.update(row['id'] for row in page['upserted']['products'])
+            cursor, has_more = page['cursor'], page['has_more']
+        self.assertEqual(seen, {self.product.pk})
+        self.assertEqual(cursor, CatalogueChange.objects.latest('position').position)
+
+    def test_entries_of_uncommitted_transactions_arrive_after_they_commit(self):
+        cursor = self.sync()['cursor']
+        # A transaction still in flight: its entry has an id but no position yet.
+        pending = CatalogueChange.objects.create(kind='product', object_id=self.product.pk)
+        CatalogueChange.objects.filter(pk=pending.pk).update(position=None)
+        self.supplier.name = "Other farm"
+        self.supplier.save()
+
+        page = self.sync(cursor)
+        self.assertEqual(page['upserted']['products'], [])
+        self.assertEqual([row['name'] for row in page['upserted']['suppliers']], ["Other farm"])
+
+        # It commits after the later entry and gets the next position.
+        CatalogueChange.objects.filter(pk=pending.pk).update(position=page['cursor'] + 1)
+        page = self.sync(page['cursor'])
+        self.assertEqual([row['id'] for row in page['upserted']['products']], [self.product.pk])
+
+    def test_compaction_keeps_the_latest_entry_per_object(self):
+        for name in ("Lamb", "Chicken"):
+            self.category.name = name
+            self.category.save()
+        call_command('compact_catalogue_changes', stdout=StringIO())
+
+        entries = CatalogueChange.objects.filter(kind='category', object_id=self.category.pk)
+        self.assertEqual(entries.count(), 1)
+        self.assertEqual(self.sync()['upserted']['categories'][0]['name'], "Chicken")
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products import events
+from products.models import Application, Delivery
+from products.tests.test_rollups import RollupFixture, rollup_rows
+from products.transitions import TransitionError, bulk_transition
+
+
+class BulkTransitionTests(RollupFixture):
+    def setUp(self):
+        super().setUp()
+        self.applications = [self.application(self.order(quantity=n + 1)) for n in range(4)]
+        self.broker = mock.Mock()
+        patcher = mock.patch.object(events, 'get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def statuses(self):
+        return list(Application.objects.order_by('pk').values_list('status', flat=True))
+
+    def test_invalid_batches_change_nothing(self):
+        Application.objects.filter(pk=self.applications[3].pk).update(status='completed')
+        updates = [
+            (self.applications[0].pk, 'delivering'),
+            (self.applications[1].pk, 'shipped'),
+            (self.applications[2].pk, 'delivering'),
+            (self.applications[2].pk, 'completed'),
+            (self.applications[3].pk, 'pending'),
+            (999999, 'completed'),
+        ]
+        with self.assertRaises(TransitionError) as raised:
+            bulk_transition(Application.objects.all(), updates)
+        self.assertEqual([error['id'] for error in raised.exception.errors], [
+            self.applications[1].pk, self.applications[2].pk, self.applications[3].pk, 999999,
+        ])
+        self.assertEqual(self.statuses(), ['pending', 'pending', 'pending', 'completed'])
+
+    def test_one_update_per_target_status(self):
+        updates = [(application.pk, 'delivering') for application in self.applications[:3]]
+        updates.append((self.applications[3].pk, 'completed'))
+        with CaptureQueriesContext(connection) as queries:
+            result = bulk_transition(Application.objects.all(), updates)
+        self.assertEqual(result, {'updated': {'delivering': 3, 'completed': 1}, 'unchanged': 0})
+        application_updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE') and 'products_application' in query['sql'].split('SET')[0]
+        ]
+        self.assertEqual(len(application_updates), 2)
+        self.assertEqual(self.statuses(), ['delivering', 'delivering', 'delivering', 'completed'])
+
+    def test_unchanged_rows(self):
+        result = bulk_transition(Application.objects.all(), [(self.applications[0].pk, 'pending')])
+        self.assertEqual(result, {'updated': {}, 'unchanged': 1})
+
+    def test_completion_updates_the_rollups(self):
+        pks = [application.pk for application in self.applications]
+        bulk_transition(Application.objects.all(), [(pk, 'completed') for pk in pks[:3]])
+        self.assert_matches_rebuild()
+        self.assertEqual(sum(row[3] for row in rollup_rows().values()), 1 + 2 + 3)
+
+        # Delivering applications can go back to pending without touching the completed totals.
+        bulk_transition(Application.objects.all(), [(pks[3], 'delivering')])
+        bulk_transition(Application.objects.all(), [(pks[3], 'pending')])
+        self.assert_matches_rebuild()
+
+    def test_publishes_one_event_per_changed_row_after_commit(self):
+        updates = [(self.applications[0].pk, 'delivering'), (self.applications[1].pk, 'pending')]
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Application.objects.all(), updates)
+            self.broker.publish.assert_not_called()
+        channel, message = self.broker.publish.call_args.args
+        self.assertEqual(self.broker.publish.call_count, 1)
+        self.assertEqual(channel, events.user_channel(self.user.pk))
+        self.assertEqual(message['type'], 'application.status')
+        self.assertEqual(
+            {key: message['data'][key] for key in ('id', 'status', 'previous_status')},
+            {'id': self.applications[0].pk, 'status': 'delivering', 'previous_status': 'pending'},
+        )
+
+    def test_deliveries_through_the_endpoint(self):
+        deliveries = [
+            Delivery.objects.create(user=self.user, address='A', contact_number='0') for _ in range(2)
+        ]
+        self.client.force_login(get_user_model().objects.create_user('dispatcher', is_staff=True))
+        response = self.client.post('/api/deliveries/bulk-status/', {'updates': [
+            {'id': deliveries[0].pk, 'status': 'IN_TRANSIT'}, {'id': deliveries[1].pk, 'status': 'DELIVERED'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['id'] for error in response.json()['details']], [deliveries[1].pk])
+
+        response = self.client.post('/api/deliveries/bulk-status/', {'updates': [
+            {'id': deliveries[0].pk, 'status': 'IN_TRANSIT'}, {'id': deliveries[1].pk, 'status': 'CANCELLED'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': {'IN_TRANSIT': 1, 'CANCELLED': 1}, 'unchanged': 0})
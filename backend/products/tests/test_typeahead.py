@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from products import typeahead
+from products.models import Category, Product, Supplier
+
+
+@override_settings(TYPEAHEAD_SYNC_INTERVAL=0)
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Beef Sausage", article="BS-1", city='A', description='', characteristics={},
+            category=Category.objects.create(name="Meat"),
+        )
+        self.supplier = Supplier.objects.create(name="Halal Farm", rating=5, city='A', contact_number='0')
+        self.index = typeahead.PrefixIndex()
+        self.index.build()
+        patcher = mock.patch.object(typeahead, 'index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def names(self, query):
+        return [result['name'] for result in self.index.search(query)]
+
+    def test_search_matches_words_and_articles(self):
+        self.assertEqual(self.names('saus'), ["Beef Sausage"])
+        self.assertEqual(self.names('bs 1'), ["Beef Sausage"])
+        self.assertEqual(self.names('farm'), ["Halal Farm"])
+
+    def test_renames_are_applied_in_place(self):
+        version = cache.get('version:typeahead')
+        self.product.name = "Lamb Chops"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.assertEqual(self.names('lamb'), ["Lamb Chops"])
+        self.assertEqual(self.names('saus'), [])
+        self.assertEqual(cache.get('version:typeahead'), version + 1)
+
+    def test_saves_without_name_changes_do_not_bump_the_version(self):
+        version = cache.get('version:typeahead')
+        self.product.city = 'B'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.product.save()
+            self.supplier.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(cache.get('version:typeahead'), version)
+
+    def test_stale_index_is_rebuilt_in_the_background(self):
+        cache.incr('version:typeahead')
+        with mock.patch.object(self.index, 'build') as build, \
+                mock.patch.object(typeahead.threading, 'Thread') as thread:
+            self.assertEqual(self.names('saus'), ["Beef Sausage"])
+        build.assert_not_called()
+        self.assertEqual(thread.call_args.kwargs['target'], self.index._rebuild)
+        thread.return_value.start.assert_called_once()
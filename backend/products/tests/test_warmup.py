@@ -0,0 +1,26 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from backend import warmup
+from products.models import Category
+
+
+@override_settings(WARM_UP=True, WARM_UP_GC_FREEZE=False, WARM_UP_ORIGINS=['http://testserver'])
+class WarmUpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name="Meat")
+
+    def test_warm_up_runs_every_step_and_closes_connections(self):
+        # Patched: the in-memory test database can't be reopened once closed.
+        with mock.patch.object(warmup.connections, 'close_all') as close_all, \
+                self.assertNoLogs('backend.warmup', 'WARNING'):
+            report = warmup.warm_up()
+        close_all.assert_called_once_with()
+        self.assertEqual(list(report['seconds']), ['imports', 'urls', 'serializers', 'typeahead', 'home'])
+        # The home screen was primed, so the first request is served from the cache.
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/home/', HTTP_HOST='testserver')
+        self.assertEqual(response.json()['categories'][0]['name'], "Meat")
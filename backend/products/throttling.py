@@ -0,0 +1,176 @@
+"""
+Per-user (or per-IP for anonymous clients) rate limits per endpoint class.
+
+Views pick a scope with ``throttle_scope`` or ``get_throttle_scope(request)``;
+rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``. Requests are
+checked against an in-process token bucket, so the common path does no I/O.
+With ``THROTTLE_SHARED`` (on when a shared cache is configured) a sliding
+window counter in the default cache is used instead, so the limit holds
+across workers; if that cache is unreachable the local bucket takes over.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBuckets:
+    """Thread-safe in-process token buckets keyed by client and scope."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, duration, now):
+        """Take one token; return 0 if allowed, else the seconds until the next token."""
+        refill = capacity / duration
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                if key not in self._buckets and len(self._buckets) >= self.maxsize:
+                    self._evict(now)
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / refill
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _evict(self, now):
+        # Idle clients are the ones whose bucket would be full again anyway.
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated > 3600]
+        for key in idle:
+            del self._buckets[key]
+        if len(self._buckets) >= self.maxsize:
+            del self._buckets[next(iter(self._buckets))]
+
+
+buckets = TokenBuckets()
+
+_stats_lock = threading.Lock()
+allowed_counts = Counter()
+throttled_counts = Counter()
+
+
+def record(scope, allowed):
+    with _stats_lock:
+        (allowed_counts if allowed else throttled_counts)[scope] += 1
+    if not allowed:
+        # Rejections are rare, so they are also counted across workers.
+        try:
+            cache.add(f'throttle:rejected:{scope}', 0, timeout=None)
+            cache.incr(f'throttle:rejected:{scope}')
+        except Exception:
+            pass
+
+
+def throttle_stats():
+    rates = settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})
+    try:
+        shared = cache.get_many([f'throttle:rejected:{scope}' for scope in rates])
+    except Exception:
+        shared = {}
+    with _stats_lock:
+        return {
+            'backend': 'shared' if settings.THROTTLE_SHARED else 'local',
+            'scopes': {
+                scope: {
+                    'rate': rate,
+                    'allowed_this_worker': allowed_counts[scope],
+                    'throttled_this_worker': throttled_counts[scope],
+                    'throttled_total': shared.get(f'throttle:rejected:{scope}', 0),
+                }
+                for scope, rate in rates.items()
+            },
+        }
+
+
+class BucketRateThrottle(SimpleRateThrottle):
+    """
+    Throttle on the view's scope, per user id or client IP.
+
+    Subclasses may fix ``scope``; otherwise it is taken from the view, and a
+    view without a scope is not throttled.
+    """
+    scope = None
+
+    def __init__(self):
+        # The rate is resolved per request, once the scope is known.
+        pass
+
+    def get_scope(self, request, view):
+        if self.scope:
+            return self.scope
+        get_throttle_scope = getattr(view, 'get_throttle_scope', None)
+        if get_throttle_scope is not None:
+            return get_throttle_scope(request)
+        return getattr(view, 'throttle_scope', None)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{self.scope_name}:{ident}'
+
+    def allow_request(self, request, view):
+        self.scope_name = self.get_scope(request, view)
+        if not self.scope_name or self.scope_name not in self.THROTTLE_RATES:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.THROTTLE_RATES[self.scope_name])
+        key = self.get_cache_key(request, view)
+        now = time.time()
+
+        self.retry_after = None
+        if settings.THROTTLE_SHARED:
+            try:
+                self.retry_after = self.consume_shared(key, now)
+            except Exception:
+                logger.warning("Shared throttle cache unavailable, using local buckets", exc_info=True)
+        if self.retry_after is None:
+            self.retry_after = buckets.consume(key, self.num_requests, self.duration, now)
+
+        allowed = not self.retry_after
+        record(self.scope_name, allowed)
+        return allowed
+
+    def consume_shared(self, key, now):
+        """
+        Sliding window counter: the previous window's count, weighted by how
+        much of it still overlaps the last ``duration`` seconds, plus the
+        current window's count.
+        """
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        current_key, previous_key = f'{key}:{window}', f'{key}:{window - 1}'
+        cache.add(current_key, 0, timeout=self.duration * 2)
+        current = cache.incr(current_key)
+        previous = cache.get(previous_key, 0)
+        weight = 1 - elapsed / self.duration
+        if previous * weight + current <= self.num_requests:
+            return 0
+        # Rejected requests do not use up the allowance.
+        cache.decr(current_key)
+        if previous:
+            # Time until enough of the previous window has slid out.
+            needed = (previous * weight + current - self.num_requests) / previous
+            return max(needed * self.duration, 0.001)
+        return self.duration - elapsed
+
+    def wait(self):
+        return self.retry_after
+
+
+class OrderRateThrottle(BucketRateThrottle):
+    scope = 'orders'
@@ -0,0 +1,89 @@
+"""
+Bulk status transitions for models with ``STATUS_CHOICES`` and ``ALLOWED_TRANSITIONS``.
+
+The whole batch is validated against the current statuses (read with row
+locks) before anything is written, and then applied with one UPDATE per
+target status, so a batch of any size costs a handful of queries.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import events, rollups
+from .models import Application
+
+
+class TransitionError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def bulk_transition(queryset, updates):
+    """
+    Apply ``updates`` (an iterable of ``(pk, status)``) to rows of ``queryset``.
+
+    Either every update is valid and applied, or ``TransitionError`` is raised
+    with one error per offending row and nothing is written. Returns the number
+    of rows moved to each status; rows already in their target status are left
+    untouched and counted under ``unchanged``.
+    """
+    model = queryset.model
+    statuses = dict(model.STATUS_CHOICES)
+    targets = {}
+    errors = []
+    for pk, status in updates:
+        if status not in statuses:
+            errors.append({'id': pk, 'error': f"Unknown status {status!r}"})
+        elif targets.setdefault(pk, status) != status:
+            errors.append({'id': pk, 'error': "Conflicting target statuses in one request"})
+
+    with transaction.atomic():
+        rows = queryset.select_for_update().filter(pk__in=targets).values_list('pk', 'status', 'user_id')
+        current = {}
+        owners = {}
+        for pk, status, user_id in rows:
+            current[pk] = status
+            owners[pk] = user_id
+        by_target = defaultdict(list)
+        unchanged = 0
+        for pk, status in targets.items():
+            if pk not in current:
+                errors.append({'id': pk, 'error': "Not found"})
+            elif current[pk] == status:
+                unchanged += 1
+            elif status not in model.ALLOWED_TRANSITIONS.get(current[pk], ()):
+                errors.append({'id': pk, 'error': f"Cannot change status from {current[pk]} to {status}"})
+            else:
+                by_target[status].append(pk)
+        if errors:
+            raise TransitionError(errors)
+
+        fields = {'updated_at': now()} if any(f.name == 'updated_at' for f in model._meta.fields) else {}
+        updated = {}
+        for status, pks in by_target.items():
+            updated[status] = model.objects.filter(pk__in=pks).update(status=status, **fields)
+
+        if model is Application:
+            apply_completion_changes(current, by_target)
+        for status, pks in by_target.items():
+            for pk in pks:
+                events.publish_status(model._meta.model_name, pk, owners[pk], status, current[pk])
+
+    return {'updated': updated, 'unchanged': unchanged}
+
+
+def apply_completion_changes(previous, by_target):
+    # queryset.update() skips the signals that keep the sales rollups in sync.
+    completed = by_target.get(rollups.COMPLETED, [])
+    reopened = [
+        pk for status, pks in by_target.items() if status != rollups.COMPLETED
+        for pk in pks if previous[pk] == rollups.COMPLETED
+    ]
+    for pks, sign in ((completed, 1), (reopened, -1)):
+        if pks:
+            order_ids = Application.orders.through.objects.filter(
+                application_id__in=pks
+            ).values_list('order_id', flat=True)
+            rollups.apply_completion(order_ids, sign=sign)
@@ -0,0 +1,223 @@
+"""
+In-memory prefix index for the autocomplete endpoint.
+
+Every worker keeps a sorted list of ``(term, key)`` pairs, where the terms
+of a product are its name, each word of its name and its article, and those
+of a supplier are its name and each word of it. A query is two bisects plus
+a top-k selection by popularity (number of orders); results for one- and
+two-letter prefixes, which match the most entries, are memoized.
+
+The index is built at worker startup (``warm_up()`` from the WSGI/ASGI
+modules, or on the first query) and updated by signals after each commit in
+the worker that made the change; saves that leave the name and article alone
+do not touch it. Other workers notice name changes through the ``typeahead``
+cache version and rebuild; popularity is refreshed by a full rebuild every
+``TYPEAHEAD_REBUILD_INTERVAL`` seconds. Rebuilds run in a background thread
+and swap the new index in, so queries keep being served from the old one and
+never wait for the database.
+
+The version only reaches other workers through a shared cache (``REDIS_URL``).
+With the default per-process cache they pick up other workers' changes at
+the next periodic rebuild.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Count
+
+from .cache import bump_version
+from .models import Order, Product, Supplier
+
+
+logger = logging.getLogger(__name__)
+
+PRODUCT, SUPPLIER = 'product', 'supplier'
+WORD = re.compile(r'\w+')
+# Upper bound for prefix range ends in bisect.
+MAX_CHAR = '\U0010ffff'
+
+
+def normalize(text):
+    return ' '.join(WORD.findall((text or '').casefold()))
+
+
+def product_entry(pk, name, article):
+    return {'type': PRODUCT, 'id': pk, 'name': name, 'article': article}
+
+
+def supplier_entry(pk, name):
+    return {'type': SUPPLIER, 'id': pk, 'name': name}
+
+
+def entry_terms(entry):
+    name = normalize(entry['name'])
+    terms = {name, *name.split()}
+    if entry.get('article'):
+        terms.add(normalize(entry['article']))
+    terms.discard('')
+    return terms
+
+
+class PrefixIndex:
+    memoized_prefix_length = 2
+    memoized_results = 50
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._terms = []
+        self._entries = {}
+        self._scores = {}
+        self._memo = {}
+        self.version = None
+        self.built_at = None
+        self.checked_at = 0
+        self._rebuilding = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def build(self):
+        """Load every product and supplier name and their order counts."""
+        version = cache.get_or_set('version:typeahead', 1, timeout=None)
+        entries = {}
+        for pk, name, article in Product.objects.values_list('pk', 'name', 'article').iterator(chunk_size=5000):
+            entries[PRODUCT, pk] = product_entry(pk, name, article)
+        for pk, name in Supplier.objects.values_list('pk', 'name').iterator(chunk_size=5000):
+            entries[SUPPLIER, pk] = supplier_entry(pk, name)
+
+        scores = {}
+        orders = Order.objects.order_by()
+        for pk, count in orders.values_list('product_id').annotate(count=Count('pk')):
+            scores[PRODUCT, pk] = count
+        for pk, count in orders.values_list('supplier_details_id').annotate(count=Count('pk')):
+            scores[SUPPLIER, pk] = count
+
+        terms = sorted((term, key) for key, entry in entries.items() for term in entry_terms(entry))
+        with self._lock:
+            self._entries, self._scores, self._terms, self._memo = entries, scores, terms, {}
+            self.version = version
+            self.built_at = self.checked_at = time.monotonic()
+        return len(entries)
+
+    def refresh_if_stale(self):
+        if not self.is_built:
+            # Only when warm-up was skipped or failed: there is nothing to serve yet.
+            self.build()
+            return
+        now = time.monotonic()
+        if now - self.checked_at < settings.TYPEAHEAD_SYNC_INTERVAL:
+            return
+        self.checked_at = now
+        if (
+            now - self.built_at >= settings.TYPEAHEAD_REBUILD_INTERVAL
+            or cache.get('version:typeahead', 1) != self.version
+        ):
+            self.rebuild_in_background()
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding is not None and self._rebuilding.is_alive():
+                return
+            self._rebuilding = threading.Thread(target=self._rebuild, name='typeahead-rebuild', daemon=True)
+            self._rebuilding.start()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception:
+            logger.warning("Typeahead index rebuild failed", exc_info=True)
+        finally:
+            # The thread's own connection.
+            connection.close()
+
+    def search(self, query, limit=10, kind=None):
+        self.refresh_if_stale()
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        memoize = len(prefix) <= self.memoized_prefix_length and limit <= self.memoized_results
+        with self._lock:
+            if memoize and (prefix, kind) in self._memo:
+                return self._memo[prefix, kind][:limit]
+            low = bisect.bisect_left(self._terms, (prefix,))
+            high = bisect.bisect_left(self._terms, (prefix + MAX_CHAR,), low)
+            keys = {key for _, key in self._terms[low:high] if kind is None or key[0] == kind}
+            count = self.memoized_results if memoize else limit
+            best = heapq.nsmallest(count, keys, key=self._rank)
+            results = [self._entries[key] for key in best]
+            if memoize:
+                self._memo[prefix, kind] = results
+        return results[:limit]
+
+    def _rank(self, key):
+        entry = self._entries[key]
+        return -self._scores.get(key, 0), len(entry['name']), entry['name'], key
+
+    def upsert(self, key, entry):
+        if self.is_built:
+            with self._lock:
+                self._discard(key)
+                self._entries[key] = entry
+                for term in entry_terms(entry):
+                    bisect.insort(self._terms, (term, key))
+                self._forget(entry)
+        self._bump()
+
+    def remove(self, key):
+        if self.is_built:
+            with self._lock:
+                self._discard(key)
+        self._bump()
+
+    def _bump(self):
+        version = bump_version('typeahead')
+        if self.version is not None and version == self.version + 1:
+            # Only our own change happened since the last sync.
+            self.version = version
+        else:
+            self.checked_at = 0
+
+    def add_score(self, key, amount):
+        with self._lock:
+            if key not in self._entries:
+                return
+            self._scores[key] = self._scores.get(key, 0) + amount
+            self._forget(self._entries[key])
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry_terms(entry):
+            index = bisect.bisect_left(self._terms, (term, key))
+            if index < len(self._terms) and self._terms[index] == (term, key):
+                del self._terms[index]
+        self._forget(entry)
+
+    def _forget(self, entry):
+        # Drop memoized results the entry may appear in.
+        for term in entry_terms(entry):
+            for length in range(1, self.memoized_prefix_length + 1):
+                for kind in (None, entry['type']):
+                    self._memo.pop((term[:length], kind), None)
+
+
+index = PrefixIndex()
+
+
+def warm_up():
+    """Build the index when a worker starts; a failure leaves it to the first query."""
+    if not settings.TYPEAHEAD_WARM_UP:
+        return
+    try:
+        index.build()
+    except DatabaseError:
+        logger.warning("Typeahead index not built at startup", exc_info=True)
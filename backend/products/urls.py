@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, SupplierViewSet, ProductViewSet, SupplierPriceViewSet,
     BannerViewSet, OrderViewSet, CartViewSet, FavoriteViewSet, ParentCategoryViewSet,SuppliersByCategoryView, ProductsBySupplierView,
-    create_order, ListOrdersAPIView, ApplicationViewSet
+    create_order, ListOrdersAPIView, ApplicationViewSet, DeliveryViewSet, SupplierSalesView, HomeView, MetricsView,
+    status_events, AutocompleteView, CatalogueSyncView
 )
 
 # Router for all endpoints
@@ -18,11 +19,18 @@ router.register(r'orders', OrderViewSet)
 router.register(r'cart', CartViewSet, basename='cart')
 router.register(r'favorites', FavoriteViewSet, basename='favorites')
 router.register(r'applications', ApplicationViewSet, basename='application')
+router.register(r'deliveries', DeliveryViewSet, basename='delivery')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('home/', HomeView.as_view(), name='home'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('events/', status_events, name='status-events'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('sync/', CatalogueSyncView.as_view(), name='catalogue-sync'),
     path('suppliers-by-category/', SuppliersByCategoryView.as_view(), name='suppliers-by-category'),
     path('suppliers/<int:supplier_id>/products/', ProductsBySupplierView.as_view(), name='products-by-supplier'),
+    path('suppliers/<int:supplier_id>/sales/', SupplierSalesView.as_view(), name='supplier-sales'),
     path('custom-orders/create/', create_order, name='create_order'),
     path('orders/', ListOrdersAPIView.as_view(), name='list-orders'),
     path('favorites/product/<int:product_id>/', FavoriteViewSet.as_view({'delete': 'destroy'}), name='favorite-delete-by-product'),
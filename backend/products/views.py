@@ -1,21 +1,49 @@
-from .models import Category, Supplier, Product, SupplierPrice, Banner, Order, Application, CartItem, Cart, Favorite
+from .models import (
+    Category, Supplier, Product, SupplierPrice, Banner, Order, Application, CartItem, Cart, Favorite,
+    SupplierSalesDaily, Delivery, ProductNeighbor, PriceHistory
+)
 from .serializers import (
     CategorySerializer, SupplierSerializer, ProductSerializer,
-    SupplierPriceSerializer, BannerSerializer, OrderSerializer, SupplierByCategorySerializer, ProductsBySupplierSerializer,
-    ApplicationSerializer, CartSerializer, CartItemSerializer, FavoriteSerializer
+    SupplierPriceSerializer, BannerSerializer, OrderSerializer, SupplierByCategorySerializer,
+    ApplicationSerializer, CartSerializer, CartItemSerializer, FavoriteSerializer, category_tree,
+    DeliverySerializer, BulkStatusSerializer, SimilarProductSerializer, PriceListSerializer,
+    PriceHistorySerializer
 )
+from .cache import city_cache_key, versioned_key
+from .jobs import enqueue, queue_stats
+from .transitions import TransitionError, bulk_transition
+from .pricelists import PriceListError, apply_price_list
+from .projections import OrderProjection, ProductProjection, ProductsBySupplierProjection
+from .events import OVERFLOW, get_broker, user_channel
+from .authentication import CachedJWTAuthentication
+from .throttling import OrderRateThrottle, throttle_stats
+from . import carts, closure, sync, typeahead
 from rest_framework.views import APIView
-from django.db.models import Q, Count, Min
-from django.db import models
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from decimal import Decimal
 
-from rest_framework.exceptions import NotFound, PermissionDenied
+from django.db.models import Q, Count, Min, OuterRef, Subquery, Sum, Prefetch
+from django.db.models.functions import Coalesce
+from django.db import models, transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser, SAFE_METHODS
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
-from django.utils.timezone import now
+from django.utils.timezone import now, localdate
+from django.utils.dateparse import parse_date
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework import status
@@ -23,50 +51,311 @@ from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 
 
-class ParentCategoryViewSet(ReadOnlyModelViewSet):
+def annotated_categories():
+    # For prefetching through a supplier: Count('suppliers') would reuse the join
+    # the prefetch filters on and only count the suppliers being prefetched.
+    counts = (
+        Supplier.categories.through.objects.filter(category=OuterRef('pk')).order_by()
+        .values('category').annotate(total=Count('pk')).values('total')
+    )
+    return Category.objects.annotate(suppliers_total=Coalesce(Subquery(counts), 0)).order_by('pk')
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` / ``?expand=`` support for read requests.
+
+    ``fields=id,name,photo`` renders only those fields and loads only their
+    columns with ``.only()``. Relations listed in ``sparse_prefetches`` (and
+    annotations in ``sparse_annotations``) are only loaded when their field is
+    rendered; ``expand=suppliers`` adds such a relation to a ``fields`` list.
+    Without ``fields`` every field is rendered, as before.
+    """
+    sparse_prefetches = {}
+    sparse_annotations = {}
+    # Fields whose nested categories are rendered from a shared category_tree().
+    category_tree_fields = ()
+
+    def is_read_request(self):
+        # request is None while drf_yasg introspects the view.
+        return self.request is not None and self.request.method in ('GET', 'HEAD')
+
+    def requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            fields = self.is_read_request() and self.request.query_params.get('fields')
+            if fields:
+                expand = self.request.query_params.get('expand', '')
+                self._requested_fields = {
+                    name.strip() for name in f'{fields},{expand}'.split(',') if name.strip()
+                }
+        return self._requested_fields
+
+    def rendered_fields(self):
+        """Serializer fields that will be rendered for this request."""
+        serializer_fields = self.get_serializer_class()(context={'request': self.request, 'view': self}).fields
+        requested = self.requested_fields()
+        if requested is None:
+            return serializer_fields
+        return {name: field for name, field in serializer_fields.items() if name in requested}
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.category_tree_fields and self.is_read_request():
+            requested = self.requested_fields()
+            if requested is None or requested & set(self.category_tree_fields):
+                context['category_tree'] = category_tree()
+        return context
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+
+    def apply_sparse_fieldset(self, queryset):
+        if not self.is_read_request():
+            return queryset
+
+        rendered = self.rendered_fields()
+        for name, lookups in self.sparse_prefetches.items():
+            if name in rendered:
+                queryset = queryset.prefetch_related(*lookups)
+        for name, annotations in self.sparse_annotations.items():
+            if name in rendered:
+                queryset = queryset.annotate(**annotations)
+        if not queryset.ordered:
+            # Keep the primary key order of the plain table scan, which a
+            # GROUP BY from the annotations would otherwise lose.
+            queryset = queryset.order_by('pk')
+
+        if self.requested_fields() is not None:
+            concrete = {
+                field.name for field in queryset.model._meta.concrete_fields
+            }
+            columns = {field.source.split('.')[0] for field in rendered.values()} & concrete
+            queryset = queryset.only(queryset.model._meta.pk.name, *columns)
+        return queryset
+
+
+class CityPartitionMixin:
+    """
+    ``?city=`` scopes a catalogue list to one city (an indexed filter) and
+    serves it from a per-city cache that is only invalidated when that city's
+    catalogue changes (see ``signals``). Searches are not cached.
+    """
+
+    def get_city(self):
+        return (self.request.query_params.get('city') or '').strip() or None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        city = self.get_city() if self.request is not None else None
+        return queryset.filter(city=city) if city else queryset
+
+    def list(self, request, *args, **kwargs):
+        city = self.get_city()
+        if not city or request.query_params.get(api_settings.SEARCH_PARAM):
+            return super().list(request, *args, **kwargs)
+        # Serialized URLs are absolute, so the host is part of the key.
+        key = city_cache_key(city, request.scheme, request.get_host(), request.get_full_path())
+        data = cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, settings.CITY_CACHE_TIMEOUT)
+            return response
+        return Response(data)
+
+
+class ProjectionListMixin:
+    """
+    Full-representation lists rendered by ``list_projection`` (see
+    ``projections``) from ``values_list()`` rows instead of by the serializer.
+    ``?fields=`` requests still go through the serializer.
+    """
+    list_projection = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_projection is None or self.requested_fields() is not None:
+            return super().list(request, *args, **kwargs)
+        projection = self.list_projection(request)
+        rows = projection.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.render_rows(page))
+        return Response(projection.render_rows(list(rows)))
+
+
+class CategorySubtreeMixin:
+    """
+    ``?category=<id>`` keeps objects in that category or any category below
+    it, using the ``CategoryClosure`` index (one subquery, whatever the depth).
+    """
+
+    def filter_category_subtree(self, queryset, subtree):
+        return queryset.filter(category_id__in=subtree)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        category_id = self.request.query_params.get('category') if self.request is not None else None
+        if not category_id:
+            return queryset
+        if not category_id.isdigit():
+            raise ValidationError({'category': "A category id is required."})
+        return self.filter_category_subtree(queryset, closure.subtree(int(category_id)))
+
+
+class ParentCategoryViewSet(SparseFieldsetMixin, ReadOnlyModelViewSet):
+    read_replica = True
+    throttle_scope = 'catalogue'
     queryset = Category.objects.filter(parent__isnull=True)
     serializer_class = CategorySerializer
+    sparse_annotations = {'suppliers_count': {'suppliers_total': Count('suppliers')}}
+    category_tree_fields = ('children',)
+    query_budget = {'list': 6, 'retrieve': 6}
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(SparseFieldsetMixin, ModelViewSet):
+    read_replica = True
+    throttle_scope = 'catalogue'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    sparse_annotations = {'suppliers_count': {'suppliers_total': Count('suppliers')}}
+    category_tree_fields = ('children',)
+    query_budget = {'list': 6, 'retrieve': 6}
 
-class SupplierViewSet(ModelViewSet):
+class SupplierViewSet(CategorySubtreeMixin, CityPartitionMixin, SparseFieldsetMixin, ModelViewSet):
+    read_replica = True
+    throttle_scope = 'catalogue'
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
+    sparse_prefetches = {'categories': [Prefetch('categories', queryset=annotated_categories())]}
+    category_tree_fields = ('categories',)
+    query_budget = {'list': 7, 'retrieve': 7}
+
+    def filter_category_subtree(self, queryset, subtree):
+        # A subquery on the m2m table rather than a join, so suppliers are not duplicated.
+        links = Supplier.categories.through.objects.filter(category_id__in=subtree)
+        return queryset.filter(pk__in=links.values('supplier_id'))
+
+    @action(detail=True, methods=['post'], url_path='price-list', permission_classes=[IsAdminUser])
+    def price_list(self, request, pk=None):
+        """
+        Apply a supplier's price list: ``{"full": false, "items": [{"product": 1, "price": "9.90",
+        "delivery_time": "2 days"}]}``. Only rows whose price or delivery time differ are
+        written; with ``full`` the supplier's products missing from ``items`` are removed.
+        """
+        supplier = self.get_object()
+        serializer = PriceListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = apply_price_list(
+                supplier, serializer.validated_data['items'], full=serializer.validated_data['full']
+            )
+        except PriceListError as error:
+            return Response({'error': 'Invalid price list', 'details': error.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='price-history', permission_classes=[IsAdminUser])
+    def price_history(self, request, pk=None):
+        """Price changes of this supplier, newest first; ``?product=`` narrows it to one product."""
+        history = PriceHistory.objects.filter(supplier=self.get_object())
+        product_id = request.query_params.get('product')
+        if product_id:
+            if not product_id.isdigit():
+                return Response({'error': 'Invalid product parameter'}, status=status.HTTP_400_BAD_REQUEST)
+            history = history.filter(product_id=product_id)
+        history = history.order_by('-changed_at', '-pk')
+        page = self.paginate_queryset(history)
+        if page is not None:
+            return self.get_paginated_response(PriceHistorySerializer(page, many=True).data)
+        return Response(PriceHistorySerializer(history[:1000], many=True).data)
 
 class ProductPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(CategorySubtreeMixin, CityPartitionMixin, ProjectionListMixin, SparseFieldsetMixin, ModelViewSet):
+    read_replica = True
+    throttle_scope = 'catalogue'
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     filter_backends = [SearchFilter]
     search_fields = ['name',]
     pagination_class = ProductPagination
+    list_projection = ProductProjection
+    query_budget = {'list': 10, 'retrieve': 8, 'similar': 5}
+    sparse_prefetches = {
+        'suppliers': [Prefetch('suppliers', queryset=Supplier.objects.prefetch_related(
+            Prefetch('categories', queryset=annotated_categories())
+        ))],
+    }
+    category_tree_fields = ('suppliers',)
+
+    def get_throttle_scope(self, request):
+        return 'search' if request.query_params.get(api_settings.SEARCH_PARAM) else self.throttle_scope
 
-class SupplierPriceViewSet(ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Products other customers also ordered, favourited or added to their cart (see build_recommendations)."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'Invalid limit parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        if not pk.isdigit() or not Product.objects.filter(pk=pk).exists():
+            raise NotFound
+        neighbors = ProductNeighbor.objects.filter(product_id=pk).select_related('neighbor').order_by('rank')[:limit]
+        serializer = SimilarProductSerializer(neighbors, many=True, context={'request': request})
+        return Response(serializer.data)
+
+class SupplierPriceViewSet(SparseFieldsetMixin, ModelViewSet):
+    throttle_scope = 'catalogue'
     queryset = SupplierPrice.objects.all()
     serializer_class = SupplierPriceSerializer
+    query_budget = {'list': 5}
 
-class BannerViewSet(ModelViewSet):
+class BannerViewSet(SparseFieldsetMixin, ModelViewSet):
+    read_replica = True
+    throttle_scope = 'catalogue'
     queryset = Banner.objects.all()
     serializer_class = BannerSerializer
+    query_budget = {'list': 5}
 
-class OrderViewSet(ModelViewSet):
+class OrderViewSet(ProjectionListMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    list_projection = OrderProjection
+    query_budget = {'list': 8}
+    sparse_prefetches = {
+        'user': ['user'],
+        'supplier_details': ['supplier_details'],
+        'product': ['product'],
+    }
 
 class CartViewSet(ModelViewSet):
     serializer_class = CartSerializer
     permission_classes = [AllowAny]
+    query_budget = {'list': 6, 'summary': 6}
+
+    def get_throttle_scope(self, request):
+        return 'cart' if request.method not in SAFE_METHODS else None
 
     def get_queryset(self):
         return Cart.objects.filter(user=self.request.user)
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def summary(self, request):
+        """
+        The cart with each line's product, cheapest supplier offer, unit price
+        and line total, plus the cart totals (see ``products.carts``).
+        """
+        return Response(carts.cart_summary(request))
+
     @action(detail=False, methods=["post"])
+    @transaction.atomic
     def add_to_cart(self, request):
         user = request.user
         product_id = request.data.get("product_id")
@@ -81,6 +370,7 @@ class CartViewSet(ModelViewSet):
         return Response({"message": "Item added to cart."})
 
     @action(detail=False, methods=["post"])
+    @transaction.atomic
     def remove_from_cart(self, request):
         user = request.user
         product_id = request.data.get("product_id")
@@ -93,42 +383,50 @@ class CartViewSet(ModelViewSet):
                 return Response({"message": "Item removed from cart."})
         return Response({"error": "Item not found in cart."}, status=404)
 
+def enqueue_favourite_flags(product, supplier=None):
+    supplier_id = supplier.pk if supplier else None
+    enqueue(
+        'sync_favourite_flags',
+        {'product_id': product.pk, 'supplier_id': supplier_id},
+        dedupe_key=f'favourite-flags:{product.pk}:{supplier_id}',
+    )
+
+
 class FavoriteViewSet(ModelViewSet):
     serializer_class = FavoriteSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 6}
 
     def get_queryset(self):
         return Favorite.objects.filter(user=self.request.user).select_related('product', 'supplier')
 
+    def list(self, request, *args, **kwargs):
+        favorites = list(self.get_queryset())
+        context = {
+            **self.get_serializer_context(),
+            'supplier_prices': FavoriteSerializer.supplier_prices_for(favorites),
+        }
+        return Response(FavoriteSerializer(favorites, many=True, context=context).data)
+
     #here
+    @transaction.atomic
     def perform_create(self, serializer):
         product = serializer.validated_data.get('product')
         supplier = serializer.validated_data.get('supplier', None)
 
         favorite = serializer.save(user=self.request.user)
 
+        # The stored flags are refreshed by a background job; the response
+        # already reflects the new favorite.
         product.is_favorite = True
-        product.save()
-
-        if supplier:
-            supplier.is_favorite = True
-            supplier.save()
+        enqueue_favourite_flags(product, supplier)
 
         return favorite
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        product = instance.product
-        supplier = instance.supplier
-
-        if not Favorite.objects.filter(product=product).exclude(pk=instance.pk).exists():
-            product.is_favorite = False
-            product.save()
-
-        if supplier and not Favorite.objects.filter(supplier=supplier).exclude(pk=instance.pk).exists():
-            supplier.is_favorite = False
-            supplier.save()
-
         super().perform_destroy(instance)
+        enqueue_favourite_flags(instance.product, instance.supplier)
 
     def destroy(self, request, *args, **kwargs):
         product_id = kwargs.get('product_id')
@@ -145,33 +443,235 @@ class FavoriteViewSet(ModelViewSet):
 
 
 class SuppliersByCategoryView(APIView):
+    read_replica = True
+    throttle_scope = 'catalogue'
+    query_budget = 6
     def get(self, request):
         category_id = request.query_params.get('category_id')
         if not category_id:
             return Response({'error': 'category_id parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        suppliers = Supplier.objects.filter(categories__id=category_id).annotate(
-            product_count=Count('products', filter=Q(products__suppliers__categories__id=category_id)),
-            min_delivery_time=Min('products__supplierprice__delivery_time', filter=Q(products__suppliers__categories__id=category_id))
+        city = (request.query_params.get('city') or '').strip()
+        if city:
+            key = city_cache_key(city, request.scheme, request.get_host(), request.get_full_path())
+            data = cache.get(key)
+            if data is None:
+                data = self.get_data(request, category_id, city)
+                cache.set(key, data, settings.CITY_CACHE_TIMEOUT)
+            return Response(data, status=status.HTTP_200_OK)
+        return Response(self.get_data(request, category_id), status=status.HTTP_200_OK)
+
+    def get_data(self, request, category_id, city=None):
+        if request.query_params.get('descendants') == 'true':
+            # Include suppliers of every category below category_id.
+            if not category_id.isdigit():
+                raise ValidationError({'category_id': "A category id is required."})
+            subtree = closure.subtree(int(category_id))
+            suppliers = Supplier.objects.filter(
+                pk__in=Supplier.categories.through.objects.filter(category_id__in=subtree).values('supplier_id')
+            )
+            in_category = Q(products__suppliers__categories__id__in=subtree)
+            distinct = True
+        else:
+            suppliers = Supplier.objects.filter(categories__id=category_id)
+            in_category = Q(products__suppliers__categories__id=category_id)
+            distinct = False
+        if city:
+            suppliers = suppliers.filter(city=city)
+        suppliers = suppliers.prefetch_related('categories').annotate(
+            product_count=Count('products', filter=in_category, distinct=distinct),
+            min_delivery_time=Min('products__supplierprice__delivery_time', filter=in_category)
         )
 
         serializer = SupplierByCategorySerializer(suppliers, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
 
 class ProductsBySupplierView(APIView):
+    read_replica = True
+    throttle_scope = 'catalogue'
+    query_budget = 6
     def get(self, request, supplier_id):
         products = Product.objects.filter(suppliers__id=supplier_id)
-        serializer = ProductsBySupplierSerializer(
-            products,
-            many=True,
-            context={'request': request, 'supplier_id': supplier_id}
+        data = ProductsBySupplierProjection(request, supplier_id).render(products)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SupplierSalesView(APIView):
+    """
+    Daily sales stats for one supplier, read from the ``SupplierSalesDaily`` rollups only.
+
+    **Query Parameters:**
+    - `date_from`, `date_to` (YYYY-MM-DD): inclusive window, defaults to the last 30 days.
+    - `top` (int): number of top products to return, defaults to 10.
+    """
+    permission_classes = [IsAdminUser]
+    sums = ('orders_count', 'units', 'revenue', 'completed_units', 'completed_revenue')
+    money = ('revenue', 'completed_revenue')
+
+    def format_row(self, row):
+        # Match DecimalField output of the serializers: two decimal places as strings.
+        for name in self.money:
+            if name in row:
+                row[name] = str(Decimal(row[name] or 0).quantize(Decimal('0.01')))
+        return row
+
+    def get(self, request, supplier_id):
+        date_to = request.query_params.get('date_to')
+        date_from = request.query_params.get('date_from')
+        try:
+            date_to = parse_date(date_to) if date_to else localdate()
+            date_from = parse_date(date_from) if date_from else date_to - timedelta(days=29)
+            top = int(request.query_params.get('top', 10))
+        except ValueError:
+            return Response({'error': 'Invalid date or top parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from is None or date_to is None:
+            return Response({'error': 'Dates must be formatted as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = SupplierSalesDaily.objects.filter(supplier_id=supplier_id, day__range=(date_from, date_to))
+        aggregates = {name: Sum(name) for name in self.sums}
+
+        days = [
+            {'day': row['day'].isoformat(), **{name: row[name] for name in self.sums}}
+            for row in rollups.values('day').annotate(**aggregates).order_by('day')
+        ]
+        totals = self.format_row({name: sum(Decimal(day[name]) for day in days) for name in self.sums})
+        for name in self.sums:
+            if name not in self.money:
+                totals[name] = int(totals[name])
+        days = [self.format_row(day) for day in days]
+
+        top_products = list(
+            rollups.values('product_id').annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-units', '-revenue')[:max(top, 0)]
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        names = dict(
+            Product.objects.filter(pk__in=[row['product_id'] for row in top_products]).values_list('pk', 'name')
+        )
+        for row in top_products:
+            row['name'] = names.get(row['product_id'])
+            self.format_row(row)
+
+        return Response({
+            'supplier_id': supplier_id,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'totals': totals,
+            'days': days,
+            'top_products': top_products,
+        }, status=status.HTTP_200_OK)
+
+
+class HomeView(APIView):
+    """
+    Everything the app's home screen needs in one round trip: banners, top-level
+    categories, featured suppliers and the user's favorites.
+
+    The first three sections are the same for every user and are cached (per
+    host, since they contain absolute media URLs) until a banner, category or
+    supplier changes; favorites are added per request.
+    """
+    read_replica = True
+    throttle_scope = 'catalogue'
+    featured_suppliers = 10
+    query_budget = 10
+
+    def get(self, request):
+        key = versioned_key('home', request.scheme, request.get_host())
+        sections = cache.get(key)
+        if sections is None:
+            sections = self.build_shared_sections(request)
+            cache.set(key, sections, settings.HOME_CACHE_TIMEOUT)
+
+        favorites = []
+        if request.user.is_authenticated:
+            queryset = list(Favorite.objects.filter(user=request.user).select_related('product', 'supplier'))
+            context = {
+                'request': request,
+                'supplier_prices': FavoriteSerializer.supplier_prices_for(queryset),
+            }
+            favorites = FavoriteSerializer(queryset, many=True, context=context).data
+
+        return Response({**sections, 'favorites': favorites}, status=status.HTTP_200_OK)
+
+    def build_shared_sections(self, request):
+        tree = category_tree()
+        context = {'request': request, 'category_tree': tree}
+        suppliers = Supplier.objects.prefetch_related(
+            Prefetch('categories', queryset=annotated_categories())
+        ).order_by('-rating', 'pk')[:self.featured_suppliers]
+        return {
+            'banners': BannerSerializer(Banner.objects.all(), many=True, context=context).data,
+            'categories': CategorySerializer(tree.get(None, []), many=True, context=context).data,
+            'suppliers': SupplierSerializer(suppliers, many=True, context=context).data,
+        }
+
+
+class CatalogueSyncView(APIView):
+    """
+    Catalogue rows created, updated or deleted since a cursor, for the app's
+    offline copy (see ``products.sync``).
+
+    **Query Parameters:**
+    - `cursor` (int): `cursor` of the previous response; 0 or absent for a first sync.
+    - `limit` (int): change log entries to read, 500 by default, at most 2000.
+
+    Repeat with the returned `cursor` while `has_more` is true.
+    """
+    read_replica = True
+    throttle_scope = 'catalogue'
+    query_budget = 10
+
+    def get(self, request):
+        try:
+            cursor = max(int(request.query_params.get('cursor', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE)), 1), settings.SYNC_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'Invalid cursor or limit parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(sync.changes_since(cursor, limit, request))
+
+
+class AutocompleteView(APIView):
+    """
+    Typeahead suggestions from the in-memory prefix index, most ordered first.
+
+    **Query Parameters:**
+    - `q` (str): prefix of a product name, name word or article, or of a supplier name.
+    - `type` (str): `product` or `supplier` to limit the results to one kind.
+    - `limit` (int): number of results, 10 by default, at most 50.
+    """
+    throttle_scope = 'autocomplete'
+    max_limit = 50
+    query_budget = 8
+
+    def get(self, request):
+        kind = request.query_params.get('type') or None
+        if kind not in (None, typeahead.PRODUCT, typeahead.SUPPLIER):
+            return Response({'error': 'type must be product or supplier'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'Invalid limit parameter'}, status=status.HTTP_400_BAD_REQUEST)
+
+        started = time.perf_counter()
+        results = typeahead.index.search(request.query_params.get('q', ''), limit=limit, kind=kind)
+        elapsed = (time.perf_counter() - started) * 1000
+        response = Response({'results': results}, status=status.HTTP_200_OK)
+        response['Server-Timing'] = f'index;dur={elapsed:.3f}'
+        return response
+
+
+class MetricsView(APIView):
+    """Operational counters for staff dashboards."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'jobs': queue_stats(), 'throttling': throttle_stats()}, status=status.HTTP_200_OK)
 
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([OrderRateThrottle])
 def create_order(request):
     """
     Creates a new order.
@@ -251,19 +751,134 @@ def create_order(request):
         status=status.HTTP_201_CREATED
     )
 
-class ListOrdersAPIView(ListAPIView):
+async def stream_user(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    # EventSource cannot send headers, so the access token may come as ?token=.
+    header = request.headers.get('Authorization', '')
+    raw_token = header.split(' ', 1)[1] if header.startswith('Bearer ') else request.GET.get('token')
+    if not raw_token:
+        return None
+    authenticator = CachedJWTAuthentication()
+
+    def authenticate():
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    try:
+        return await sync_to_async(authenticate)()
+    except Exception:
+        return None
+
+
+def format_event(message):
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+async def status_events(request):
+    """
+    Server-sent events with status changes of the user's applications and deliveries.
+
+    Events are ``application.status`` / ``delivery.status`` with
+    ``{"id", "status", "previous_status", "changed_at"}``. A ``resync`` event
+    (sent when the client falls behind) means the client should refetch its
+    lists once and reconnect; it should do the same after any reconnect, since
+    missed events are not replayed. Only served by the ASGI application.
+    """
+    if not hasattr(request, 'scope'):
+        return JsonResponse(
+            {'error': 'The event stream is only available on the ASGI application'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    user = await stream_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    subscription = get_broker().subscribe(user_channel(user.pk))
+
+    async def stream():
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), settings.EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection.
+                    yield ": keepalive\n\n"
+                    continue
+                if message is OVERFLOW:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield format_event(message)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ListOrdersAPIView(ProjectionListMixin, SparseFieldsetMixin, ListAPIView):
     serializer_class = OrderSerializer
+    list_projection = OrderProjection
+    sparse_prefetches = OrderViewSet.sparse_prefetches
+    query_budget = 8
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return self.apply_sparse_fieldset(Order.objects.filter(user=self.request.user))
+
+class BulkStatusMixin:
+    """
+    ``POST <list>/bulk-status/`` for dispatchers (staff only)::
+
+        {"updates": [{"id": 1, "status": "delivering"}, {"id": 2, "status": "completed"}]}
+
+    All rows are validated against the model's ``ALLOWED_TRANSITIONS`` first;
+    if any update is invalid nothing is changed and the errors are returned.
+    """
+
+    @action(detail=False, methods=['post'], url_path='bulk-status', permission_classes=[IsAdminUser])
+    def bulk_status(self, request):
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updates = [(item['id'], item['status']) for item in serializer.validated_data['updates']]
+        try:
+            result = bulk_transition(self.queryset, updates)
+        except TransitionError as error:
+            return Response(
+                {'error': 'Invalid status transitions', 'details': error.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(result, status=status.HTTP_200_OK)
+
 
-class ApplicationViewSet(ModelViewSet):
+class ApplicationViewSet(BulkStatusMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
     permission_classes = [AllowAny]
+    query_budget = {'list': 6}
+    sparse_prefetches = {
+        'orders': [Prefetch('orders', queryset=Order.objects.select_related('supplier_details', 'product'))],
+    }
+
+    def get_throttle_scope(self, request):
+        return 'orders' if self.action == 'create' else None
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(Application.objects.filter(user=self.request.user))
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class DeliveryViewSet(BulkStatusMixin, ModelViewSet):
+    queryset = Delivery.objects.all()
+    serializer_class = DeliverySerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {'list': 5}
 
     def get_queryset(self):
-        return Application.objects.filter(user=self.request.user)
+        return Delivery.objects.filter(user=self.request.user).select_related('user').order_by('-delivery_date', '-pk')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)